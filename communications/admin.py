@@ -1,7 +1,8 @@
 from django.contrib import admin
 from .models import (
     Conversation, Message, Consultation, ConsultationNote,
-    Notification, NotificationTemplate, ChatRoom, ChatRoomMember, ChatMessage
+    Notification, NotificationTemplate, ChatRoom, ChatRoomMember, ChatMessage,
+    OutboundEmail, NotificationBatch, NotificationDelivery
 )
 
 @admin.register(Conversation)
@@ -244,3 +245,43 @@ class ChatMessageAdmin(admin.ModelAdmin):
             'description': 'Message timeline (read-only).'
         }),
     )
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('subject', 'recipients', 'last_error')
+    ordering = ('-created_at',)
+    readonly_fields = ('created_at', 'claimed_at', 'sent_at')
+    fieldsets = (
+        ('Message', {
+            'fields': ('subject', 'body', 'from_email', 'recipients'),
+            'description': 'Queued email content.'
+        }),
+        ('Delivery', {
+            'fields': ('status', 'attempts', 'next_attempt_at', 'last_error'),
+            'description': 'Delivery state and retry schedule.'
+        }),
+        ('Timestamps', {
+            'fields': ('created_at', 'claimed_at', 'sent_at'),
+            'description': 'Queue timeline (read-only).'
+        }),
+    )
+
+
+@admin.register(NotificationBatch)
+class NotificationBatchAdmin(admin.ModelAdmin):
+    list_display = ('template', 'related_event', 'status', 'expanded', 'created_at', 'expanded_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('template__name',)
+    ordering = ('-created_at',)
+    readonly_fields = ('recipients', 'expanded', 'created_at', 'claimed_at', 'expanded_at')
+
+
+@admin.register(NotificationDelivery)
+class NotificationDeliveryAdmin(admin.ModelAdmin):
+    list_display = ('notification', 'channel', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('channel', 'status')
+    search_fields = ('notification__notification_id', 'last_error')
+    ordering = ('-next_attempt_at',)
+    readonly_fields = ('notification', 'claimed_at', 'sent_at')
@@ -4,6 +4,9 @@ from . import api_views
 app_name = 'communications_api'
 
 urlpatterns = [
+    path('contacts/', api_views.ContactDirectoryView.as_view(), name='contact_directory'),
     path('conversations/', api_views.ConversationListView.as_view(), name='conversation_list'),
     path('conversations/<int:pk>/messages/', api_views.MessageListView.as_view(), name='message_list'),
+    path('chat-rooms/<int:pk>/messages/', api_views.ChatRoomMessageListView.as_view(), name='chat_room_message_list'),
+    path('notifications/stream/', api_views.notification_stream, name='notification_stream'),
 ] 
\ No newline at end of file
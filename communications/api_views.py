@@ -1,10 +1,96 @@
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.views import View
 
+from . import directory, streams
+from .history import message_window, serialize_message
+from .models import ChatRoom, ChatRoomMember, Conversation
+
+
 class ConversationListView(View):
     def get(self, request):
         return JsonResponse({"message": "Conversation list API - Coming soon!"})
 
+
+class ContactDirectoryView(View):
+    """
+    The users the requester may chat with, by name/email prefix (?q=),
+    recent conversation partners first; further pages via ?cursor=.
+    """
+    def get(self, request):
+        if not request.user.is_authenticated:
+            return JsonResponse({"error": "Authentication required."}, status=401)
+        try:
+            limit = int(request.GET.get('limit', directory.PAGE_SIZE))
+            page = directory.search(
+                request.user, request.GET.get('q', ''), cursor=request.GET.get('cursor'), limit=limit,
+            )
+        except ValueError as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+        return JsonResponse({
+            "contacts": [
+                dict(contact._asdict(), last_message_at=contact.last_message_at and contact.last_message_at.isoformat())
+                for contact in page.contacts
+            ],
+            "next_cursor": page.next_cursor,
+        })
+
+
 class MessageListView(View):
+    """
+    Older messages of a conversation, newest window first, via ?before=<cursor>.
+    """
     def get(self, request, pk):
-        return JsonResponse({"message": f"Message list API for conversation {pk} - Coming soon!"}) 
\ No newline at end of file
+        if not request.user.is_authenticated:
+            return JsonResponse({"error": "Authentication required."}, status=401)
+        conversation = get_object_or_404(Conversation, pk=pk)
+        if request.user.id not in (conversation.participant1_id, conversation.participant2_id):
+            return JsonResponse({"error": "You are not part of this conversation."}, status=403)
+        return _window_response(request, conversation.messages.all())
+
+
+class ChatRoomMessageListView(View):
+    """
+    Older messages of a group chat room, newest window first, via ?before=<cursor>.
+    """
+    def get(self, request, pk):
+        if not request.user.is_authenticated:
+            return JsonResponse({"error": "Authentication required."}, status=401)
+        room = get_object_or_404(ChatRoom, pk=pk)
+        if not ChatRoomMember.objects.filter(room=room, user=request.user, is_active=True).exists():
+            return JsonResponse({"error": "You are not a member of this group."}, status=403)
+        return _window_response(request, room.messages.all())
+
+
+def _window_response(request, queryset):
+    try:
+        window = message_window(queryset, before=request.GET.get('before'))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return JsonResponse({
+        "messages": [serialize_message(message, request.user) for message in window.messages],
+        "older_cursor": window.older_cursor,
+    })
+
+
+async def notification_stream(request):
+    """
+    The user's new notifications as Server-Sent Events, resuming after the
+    Last-Event-ID header or ?last_id=. Needs the ASGI application; see
+    communications.streams.
+    """
+    user = await sync_to_async(lambda: request.user if request.user.is_authenticated else None)()
+    if user is None:
+        return JsonResponse({"error": "Authentication required."}, status=401)
+    last_id = request.headers.get('Last-Event-ID') or request.GET.get('last_id')
+    if last_id is not None:
+        try:
+            last_id = int(last_id)
+        except ValueError:
+            return JsonResponse({"error": "Invalid last event id."}, status=400)
+    response = StreamingHttpResponse(streams.event_stream(user.id, last_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep nginx from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
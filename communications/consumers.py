@@ -0,0 +1,129 @@
+from abc import ABCMeta, abstractmethod
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ChatMessage, ChatRoomMember, Conversation, Message
+from .realtime import conversation_group, room_group
+from .unread import mark_conversation_read, mark_room_read
+
+# Application close codes (4000-4999 are free for application use)
+CLOSE_UNAUTHENTICATED = 4401
+CLOSE_FORBIDDEN = 4403
+
+
+class ThreadConsumer(AsyncJsonWebsocketConsumer, metaclass=ABCMeta):
+    """
+    Shared socket protocol for a chat thread. Clients send
+    {"type": "message", "content": ...}, {"type": "typing", "is_typing": ...}
+    and {"type": "read"}; they receive "message", "typing" and "read" events.
+    New messages are written to the database and reach every socket through
+    the post_save broadcast, including messages posted through the HTTP form.
+    """
+
+    async def connect(self):
+        self.user = self.scope.get('user')
+        if self.user is None or not self.user.is_authenticated:
+            await self.close(code=CLOSE_UNAUTHENTICATED)
+            return
+        self.thread = await self.get_thread()
+        if self.thread is None:
+            await self.close(code=CLOSE_FORBIDDEN)
+            return
+        self.group_name = self.get_group_name()
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if getattr(self, 'group_name', None):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        kind = content.get('type')
+        if kind == 'message':
+            text = (content.get('content') or '').strip()
+            if text:
+                await self.create_message(text)
+        elif kind == 'typing':
+            await self.channel_layer.group_send(self.group_name, {
+                'type': 'chat.typing',
+                'user_id': self.user.id,
+                'is_typing': bool(content.get('is_typing', True)),
+            })
+        elif kind == 'read':
+            await self.mark_read()
+            await self.channel_layer.group_send(self.group_name, {
+                'type': 'chat.read',
+                'user_id': self.user.id,
+                'read_at': timezone.now().isoformat(),
+            })
+
+    async def chat_message(self, event):
+        message = dict(event['message'], is_own=event['message']['sender_id'] == self.user.id)
+        await self.send_json({'type': 'message', 'message': message})
+
+    async def chat_typing(self, event):
+        if event['user_id'] != self.user.id:
+            await self.send_json({'type': 'typing', 'user_id': event['user_id'], 'is_typing': event['is_typing']})
+
+    async def chat_read(self, event):
+        if event['user_id'] != self.user.id:
+            await self.send_json({'type': 'read', 'user_id': event['user_id'], 'read_at': event['read_at']})
+
+    @abstractmethod
+    def get_group_name(self):
+        """The channel layer group of self.thread."""
+
+    @abstractmethod
+    async def get_thread(self):
+        """The thread the socket's user may join, or None."""
+
+    @abstractmethod
+    async def create_message(self, text):
+        """Save a message from the socket's user to the thread."""
+
+    @abstractmethod
+    async def mark_read(self):
+        """Mark the thread read for the socket's user."""
+
+
+class ConversationConsumer(ThreadConsumer):
+    def get_group_name(self):
+        return conversation_group(self.thread.pk)
+
+    @database_sync_to_async
+    def get_thread(self):
+        return Conversation.objects.filter(
+            Q(participant1=self.user) | Q(participant2=self.user),
+            pk=self.scope['url_route']['kwargs']['conversation_id'],
+        ).first()
+
+    @database_sync_to_async
+    def create_message(self, text):
+        Message.objects.create(conversation=self.thread, sender=self.user, content=text)
+
+    @database_sync_to_async
+    def mark_read(self):
+        mark_conversation_read(self.thread, self.user)
+
+
+class ChatRoomConsumer(ThreadConsumer):
+    def get_group_name(self):
+        return room_group(self.thread.room_id)
+
+    @database_sync_to_async
+    def get_thread(self):
+        # The thread handle for a room socket is the user's membership.
+        return ChatRoomMember.objects.filter(
+            room_id=self.scope['url_route']['kwargs']['room_id'], user=self.user, is_active=True
+        ).first()
+
+    @database_sync_to_async
+    def create_message(self, text):
+        ChatMessage.objects.create(room_id=self.thread.room_id, sender=self.user, content=text)
+
+    @database_sync_to_async
+    def mark_read(self):
+        mark_room_read(self.thread)
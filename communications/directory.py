@@ -0,0 +1,250 @@
+"""
+The chat contact directory: paginated typeahead over the users someone
+may chat with, for the dashboard and /api/contacts/.
+
+Every user has a few ContactDirectoryEntry rows, one per lowercased
+search term: full name, last name, username and email. Searching for a
+prefix is an index range scan of (user_type, is_name, term) per role the
+searcher may contact (users.authorization), merged in term order, so a
+page reads about a page of rows however many users there are. A user
+whose terms match more than once is listed at their first matching term
+only, which keeps them on a single page. An empty query walks only the
+is_name terms, the full name (or username), one per user.
+
+Users the searcher talked to most recently come first on the first page,
+newest conversation first, and are left out of the alphabetical part.
+Later pages continue from an opaque keyset cursor.
+
+communications.signals keeps the entries of saved users current; users
+created with bulk_create need the rebuild_contact_directory command.
+"""
+import base64
+import binascii
+import heapq
+import json
+from collections import namedtuple
+from itertools import chain
+
+from django.db.models import Q
+
+from users import authorization
+from users.models import CustomUser
+
+from .models import ContactDirectoryEntry, Conversation
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Conversation partners considered for the top of the first page.
+RECENT_LIMIT = 50
+TERM_LENGTH = 254
+MAX_BATCH = 2000
+# Largest BigAutoField id.
+MAX_ID = 2 ** 63 - 1
+NAME_FIELDS = ('first_name', 'last_name', 'username', 'email')
+
+Contact = namedtuple('Contact', ['id', 'name', 'email', 'user_type', 'last_message_at'])
+ContactPage = namedtuple('ContactPage', ['contacts', 'next_cursor'])
+
+
+# Terms
+
+def normalize(text):
+    return ' '.join((text or '').lower().split())[:TERM_LENGTH]
+
+
+def search_terms(first_name, last_name, username, email):
+    """
+    The distinct search terms of a user.
+    """
+    terms = {normalize(f'{first_name} {last_name}'), normalize(last_name), normalize(username), normalize(email)}
+    terms.discard('')
+    return terms
+
+
+def name_term(first_name, last_name, username, email):
+    """
+    The term a user is listed under when browsing without a query.
+    """
+    return normalize(f'{first_name} {last_name}') or normalize(username) or normalize(email)
+
+
+def _listed_term(prefix, names):
+    """
+    The one term a user is listed under for prefix, or None if they do not match.
+    """
+    if not prefix:
+        return name_term(*names)
+    return min((term for term in search_terms(*names) if term.startswith(prefix)), default=None)
+
+
+def _entries(user_id, user_type, names):
+    listed = name_term(*names)
+    return [
+        ContactDirectoryEntry(user_id=user_id, user_type=user_type, term=term, is_name=term == listed)
+        for term in search_terms(*names)
+    ]
+
+
+def update_user(user):
+    """
+    Replace the directory entries of a saved user.
+    """
+    ContactDirectoryEntry.objects.filter(user_id=user.pk).delete()
+    ContactDirectoryEntry.objects.bulk_create(
+        _entries(user.pk, user.user_type, [getattr(user, field) for field in NAME_FIELDS])
+    )
+
+
+def rebuild(batch_size=5000):
+    """
+    Recreate every directory entry from the users table; returns the
+    number of users indexed.
+    """
+    ContactDirectoryEntry.objects.all().delete()
+    users, last_id = 0, 0
+    while True:
+        rows = list(
+            CustomUser.objects.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', 'user_type', *NAME_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return users
+        ContactDirectoryEntry.objects.bulk_create(
+            chain.from_iterable(_entries(pk, user_type, names) for pk, user_type, *names in rows),
+            batch_size=batch_size,
+        )
+        users += len(rows)
+        last_id = rows[-1][0]
+
+
+# Cursors
+
+def encode_cursor(term, user_id, recent_shown):
+    """
+    Opaque keyset cursor: the last listed (term, user id), and how many
+    recent contacts the first page showed.
+    """
+    return base64.urlsafe_b64encode(json.dumps([term, user_id, recent_shown]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Inverse of encode_cursor. Raises ValueError on a malformed cursor.
+    """
+    try:
+        term, user_id, recent_shown = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        term, user_id, recent_shown = str(term), int(user_id), int(recent_shown)
+    except (TypeError, UnicodeDecodeError, binascii.Error) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+    if not (0 <= user_id <= MAX_ID and 0 <= recent_shown <= MAX_PAGE_SIZE):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return term, user_id, recent_shown
+
+
+# Search
+
+def _contact(user_id, names, user_type, last_message_at=None):
+    first_name, last_name, username, email = names
+    return Contact(user_id, f'{first_name} {last_name}'.strip() or username, email, user_type, last_message_at)
+
+
+def _recent_contacts(user_id, roles, prefix):
+    """
+    The matching contacts among the user's latest conversation partners,
+    most recent first.
+    """
+    threads = Conversation.objects.filter(last_message_at__isnull=False).order_by('-last_message_at')
+    latest = {}
+    for partner_id, last_message_at in chain(
+        threads.filter(participant1_id=user_id).values_list('participant2_id', 'last_message_at')[:RECENT_LIMIT],
+        threads.filter(participant2_id=user_id).values_list('participant1_id', 'last_message_at')[:RECENT_LIMIT],
+    ):
+        if partner_id != user_id and (partner_id not in latest or last_message_at > latest[partner_id]):
+            latest[partner_id] = last_message_at
+    if not latest:
+        return []
+    partners = CustomUser.objects.filter(pk__in=latest, user_type__in=roles).values_list('pk', 'user_type', *NAME_FIELDS)
+    contacts = [
+        _contact(pk, names, user_type, latest[pk])
+        for pk, user_type, *names in partners
+        if _listed_term(prefix, names) is not None
+    ]
+    contacts.sort(key=lambda contact: contact.last_message_at, reverse=True)
+    return contacts
+
+
+def _prefix_range(prefix):
+    if not prefix:
+        return {}
+    if ord(prefix[-1]) >= 0x10FFFF:
+        return {'term__startswith': prefix}
+    return {'term__gte': prefix, 'term__lt': prefix[:-1] + chr(ord(prefix[-1]) + 1)}
+
+
+def _entries_after(role, is_name, prefix, after, batch):
+    """
+    (term, user_id, role, names) of the entries of one role matching prefix,
+    in (term, user_id) order after the `after` position. Fetched in batches
+    that double in size, as a run of users listed under other terms can
+    skip many rows in a row.
+    """
+    while True:
+        # is_name=True compiles to a bare "WHERE is_name", which the index
+        # cannot seek on; IN (...) is an equality it can.
+        entries = ContactDirectoryEntry.objects.filter(user_type=role, is_name__in=[is_name], **_prefix_range(prefix))
+        if after:
+            entries = entries.filter(term__gte=after[0]).filter(Q(term__gt=after[0]) | Q(user_id__gt=after[1]))
+        rows = list(
+            entries.order_by('term', 'user_id')
+            .values_list('term', 'user_id', *(f'user__{field}' for field in NAME_FIELDS))[:batch]
+        )
+        for term, user_id, *names in rows:
+            yield term, user_id, role, names
+        if len(rows) < batch:
+            return
+        after = rows[-1][:2]
+        batch = min(batch * 2, MAX_BATCH)
+
+
+def search(user, query='', cursor=None, limit=PAGE_SIZE):
+    """
+    A ContactPage of the users `user` may chat with whose name, username or
+    email starts with query, continuing from cursor. Raises ValueError on a
+    malformed cursor.
+    """
+    access = authorization.for_user(user)
+    roles = access.contact_roles
+    if roles is None:
+        roles = [role for role, _ in CustomUser.USER_TYPE_CHOICES]
+    if not roles:
+        return ContactPage([], None)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    prefix = normalize(query)
+    after = None
+    if cursor:
+        term, user_id, recent_shown = decode_cursor(cursor)
+        after = (term, user_id)
+
+    recent = _recent_contacts(access.user_id, roles, prefix)
+    if after is None:
+        recent_shown = min(len(recent), limit)
+    contacts = [] if after else recent[:recent_shown]
+    skip = {access.user_id}.union(contact.id for contact in recent[:recent_shown])
+
+    # Each user has up to four terms, so a batch of twice the page
+    # usually fills it in one query per role.
+    batch = limit * 2 + 1
+    kinds = (True, False) if prefix else (True,)
+    merged = heapq.merge(
+        *(_entries_after(role, is_name, prefix, after, batch) for role in roles for is_name in kinds),
+        key=lambda row: row[:2],
+    )
+    for term, user_id, role, names in merged:
+        if user_id in skip or term != _listed_term(prefix, names):
+            continue
+        if len(contacts) == limit:
+            # A first page of recent contacts only continues from the start.
+            return ContactPage(contacts, encode_cursor(*(after or ('', 0)), recent_shown))
+        contacts.append(_contact(user_id, names, role))
+        after = (term, user_id)
+    return ContactPage(contacts, None)
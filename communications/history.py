@@ -0,0 +1,66 @@
+import base64
+import binascii
+from collections import namedtuple
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+
+# Messages rendered with a chat page and returned per "load older" fetch.
+PAGE_SIZE = 50
+# Largest BigAutoField id.
+MAX_ID = 2 ** 63 - 1
+
+MessageWindow = namedtuple('MessageWindow', ['messages', 'older_cursor'])
+
+
+def encode_cursor(message):
+    """
+    Opaque keyset cursor for message: its (created_at, id) position.
+    """
+    raw = f"{message.created_at.isoformat()}|{message.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Inverse of encode_cursor. Raises ValueError on a malformed cursor.
+    """
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        created_at, pk = datetime.fromisoformat(created_at), int(pk)
+    except (TypeError, UnicodeDecodeError, binascii.Error) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+    # encode_cursor() writes aware datetimes and saved ids.
+    if timezone.is_naive(created_at) or not 0 < pk <= MAX_ID:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return created_at, pk
+
+
+def message_window(queryset, before=None, limit=PAGE_SIZE):
+    """
+    The newest `limit` messages of queryset that sort before the `before`
+    cursor, oldest first, plus the cursor for the next older window (None
+    when there is nothing older). Each call is one indexed range scan of at
+    most limit + 1 rows, however long the thread is.
+    """
+    queryset = queryset.select_related('sender').order_by('-created_at', '-id')
+    if before:
+        created_at, pk = decode_cursor(before)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    rows = list(queryset[:limit + 1])
+    has_older = len(rows) > limit
+    rows = rows[:limit]
+    rows.reverse()
+    return MessageWindow(rows, encode_cursor(rows[0]) if has_older else None)
+
+
+def serialize_message(message, user):
+    return {
+        'id': message.pk,
+        'sender_id': message.sender_id,
+        'sender_name': message.sender.get_full_name() or message.sender.username,
+        'content': message.content,
+        'created_at': message.created_at.isoformat(),
+        'is_own': message.sender_id == user.id,
+    }
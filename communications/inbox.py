@@ -0,0 +1,62 @@
+from django.db.models import Case, F, OuterRef, Q, Subquery, When
+
+from .models import ChatMessage, ChatRoomMember, Conversation, Message
+
+
+def direct_threads(user):
+    """
+    1-to-1 conversations for user, annotated with the last message and the
+    user's unread counter, newest activity first. Runs as a single query.
+    """
+    last_message = Message.objects.filter(conversation=OuterRef('pk')).order_by('-created_at', '-id')
+    return (
+        Conversation.objects
+        .filter(Q(participant1=user) | Q(participant2=user))
+        .select_related('participant1', 'participant2')
+        .annotate(
+            last_message_content=Subquery(last_message.values('content')[:1]),
+            last_message_created=Subquery(last_message.values('created_at')[:1]),
+            unread_count=Case(
+                When(participant1=user, then=F('participant1_unread')),
+                default=F('participant2_unread'),
+            ),
+        )
+        .order_by(F('last_message_created').desc(nulls_last=True), '-created_at')
+    )
+
+
+def group_memberships(user):
+    """
+    Active chat room memberships for user, annotated with the room's last
+    message. The unread count is the membership's own counter. Runs as a
+    single query.
+    """
+    last_message = ChatMessage.objects.filter(room=OuterRef('room_id')).order_by('-created_at', '-id')
+    return (
+        ChatRoomMember.objects
+        .filter(user=user, is_active=True)
+        .select_related('room')
+        .annotate(
+            last_message_content=Subquery(last_message.values('content')[:1]),
+            last_message_created=Subquery(last_message.values('created_at')[:1]),
+        )
+        .order_by(F('last_message_created').desc(nulls_last=True), '-joined_at')
+    )
+
+
+def build_inbox(user):
+    """
+    Everything the inbox page renders, in a constant number of queries
+    regardless of how many threads the user belongs to.
+    """
+    group_chats = []
+    for membership in group_memberships(user):
+        room = membership.room
+        room.last_message_content = membership.last_message_content
+        room.last_message_created = membership.last_message_created
+        room.unread_count = membership.unread_count
+        group_chats.append(room)
+    return {
+        'conversations': list(direct_threads(user)),
+        'group_chats': group_chats,
+    }
@@ -0,0 +1,118 @@
+"""
+Durable outbound email queue.
+
+Views call enqueue_mail(), which only inserts an OutboundEmail row. The
+send_queued_mail management command (run from cron or with --loop as a
+worker) drains due rows over a single SMTP connection per batch, retries
+failures with exponential backoff and records the outcome on each row.
+Which transport is used is plain EMAIL_BACKEND, so the console and locmem
+backends work unchanged in development and tests.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'MAIL_QUEUE_BATCH_SIZE', 100)
+MAX_ATTEMPTS = getattr(settings, 'MAIL_QUEUE_MAX_ATTEMPTS', 5)
+RETRY_BASE_SECONDS = getattr(settings, 'MAIL_QUEUE_RETRY_BASE_SECONDS', 60)
+RETRY_MAX_SECONDS = getattr(settings, 'MAIL_QUEUE_RETRY_MAX_SECONDS', 6 * 60 * 60)
+# A row stuck in 'sending' longer than this belonged to a worker that died.
+CLAIM_TIMEOUT = timedelta(seconds=getattr(settings, 'MAIL_QUEUE_CLAIM_TIMEOUT_SECONDS', 600))
+
+
+def enqueue_mail(subject, message, recipient_list, from_email=None):
+    """
+    Queue an email for delivery; a drop-in for send_mail() inside requests.
+    """
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or '',
+        recipients=list(recipient_list),
+    )
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff after the given number of failed attempts.
+    """
+    return timedelta(seconds=min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1)))
+
+
+def _claim_batch(batch_size, now):
+    """
+    Atomically flip up to batch_size due rows to 'sending' and return them.
+    A row only counts as claimed if our UPDATE moved it, so two workers
+    never send the same email.
+    """
+    due = Q(status='pending', next_attempt_at__lte=now) | Q(status='sending', claimed_at__lt=now - CLAIM_TIMEOUT)
+    with transaction.atomic():
+        ids = list(OutboundEmail.objects.filter(due).order_by('next_attempt_at').values_list('id', flat=True)[:batch_size])
+        OutboundEmail.objects.filter(due, id__in=ids).update(status='sending', claimed_at=now)
+    return list(OutboundEmail.objects.filter(id__in=ids, status='sending', claimed_at=now).order_by('next_attempt_at'))
+
+
+def _record_failure(email, error, now):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = 'failed'
+    else:
+        email.status = 'pending'
+        email.next_attempt_at = now + retry_delay(email.attempts)
+
+
+def send_queued_mail(batch_size=BATCH_SIZE):
+    """
+    Deliver one batch of due emails over a single connection. Returns a
+    (sent, retried_or_failed) tuple.
+    """
+    now = timezone.now()
+    batch = _claim_batch(batch_size, now)
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.warning("Could not open mail connection", exc_info=True)
+        for email in batch:
+            _record_failure(email, exc, now)
+        failed = len(batch)
+    else:
+        try:
+            for email in batch:
+                message = EmailMessage(
+                    subject=email.subject,
+                    body=email.body,
+                    from_email=email.from_email or None,
+                    to=email.recipients,
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as exc:
+                    logger.warning("Sending outbound email %s failed", email.pk, exc_info=True)
+                    _record_failure(email, exc, now)
+                    failed += 1
+                else:
+                    email.status = 'sent'
+                    email.attempts += 1
+                    email.sent_at = timezone.now()
+                    sent += 1
+        finally:
+            connection.close()
+
+    OutboundEmail.objects.bulk_update(batch, ['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at'])
+    return sent, failed
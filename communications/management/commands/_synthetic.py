@@ -0,0 +1,66 @@
+"""
+Synthetic chat data for the communications benchmarks. Everything here is
+meant to run inside a transaction that the caller rolls back.
+"""
+import uuid
+
+from users.models import CustomUser
+from communications.models import ChatMessage, ChatRoom, ChatRoomMember, Conversation, Message
+
+
+def make_users(count, user_type='user', prefix='bench'):
+    tag = uuid.uuid4().hex[:8]
+    users = [
+        CustomUser(
+            username=f'{prefix}-{tag}-{i}',
+            email=f'{prefix}-{tag}-{i}@example.com',
+            first_name='Bench',
+            last_name=str(i),
+            user_type=user_type,
+        )
+        for i in range(count)
+    ]
+    CustomUser.objects.bulk_create(users, batch_size=500)
+    return list(CustomUser.objects.filter(username__startswith=f'{prefix}-{tag}-').order_by('id'))
+
+
+def make_conversations(owner, partners, messages_per_thread=0):
+    conversations = Conversation.objects.bulk_create([
+        Conversation(
+            conversation_id=f'CONV{uuid.uuid4().hex[:8].upper()}',
+            conversation_type='user_manager',
+            participant1=owner,
+            participant2=partner,
+        )
+        for partner in partners
+    ], batch_size=500)
+    conversations = list(Conversation.objects.filter(participant1=owner).order_by('id'))
+    Message.objects.bulk_create([
+        Message(
+            message_id=f'MSG{uuid.uuid4().hex[:12].upper()}',
+            conversation=conversation,
+            sender=owner if i % 2 else conversation.participant2,
+            content=f'Message {i}',
+        )
+        for conversation in conversations
+        for i in range(messages_per_thread)
+    ], batch_size=1000)
+    return conversations
+
+
+def make_rooms(owner, count, messages_per_room=0, sender=None):
+    tag = uuid.uuid4().hex[:6]
+    ChatRoom.objects.bulk_create([
+        ChatRoom(room_id=f'ROOM{tag.upper()}{i}', name=f'Bench room {i}', chat_type='general')
+        for i in range(count)
+    ], batch_size=500)
+    rooms = list(ChatRoom.objects.filter(room_id__startswith=f'ROOM{tag.upper()}').order_by('id'))
+    ChatRoomMember.objects.bulk_create([ChatRoomMember(room=room, user=owner) for room in rooms], batch_size=500)
+    if sender is not None:
+        ChatRoomMember.objects.bulk_create([ChatRoomMember(room=room, user=sender) for room in rooms], batch_size=500)
+    ChatMessage.objects.bulk_create([
+        ChatMessage(room=room, sender=sender or owner, content=f'Group message {i}')
+        for room in rooms
+        for i in range(messages_per_room)
+    ], batch_size=1000)
+    return rooms
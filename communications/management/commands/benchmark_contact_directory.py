@@ -0,0 +1,139 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+from itertools import chain
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from communications import directory
+from communications.models import ContactDirectoryEntry, Conversation
+from users.models import CustomUser
+
+FIRST_NAMES = [
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'William', 'Elizabeth',
+    'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen',
+    'Aarav', 'Priya', 'Wei', 'Mei', 'Hiroshi', 'Yuki', 'Olga', 'Ivan', 'Fatima', 'Omar',
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+    'Patel', 'Shah', 'Wang', 'Li', 'Tanaka', 'Sato', 'Ivanova', 'Petrov', 'Khan', 'Haddad',
+]
+ROLES = [('user', 0.8), ('manager', 0.15), ('admin', 0.05)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the users table and contact directory with N synthetic users '
+        'and time contact directory typeahead: each keystroke of a name or '
+        'email, browsing without a query and following cursors, for a '
+        'regular user, a manager and an admin with recent conversations. '
+        'Everything runs in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000000)
+        parser.add_argument('--searches', type=int, default=200, help='Typed names per searcher')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            start = time.perf_counter()
+            prefix = f'dir-bench-{uuid.uuid4().hex[:6]}'
+            self._seed(prefix, options['users'], rng)
+            if connection.vendor == 'sqlite':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+            self.stdout.write(f"{options['users']} users indexed in {time.perf_counter() - start:.1f} s")
+
+            searchers = {
+                role: CustomUser.objects.filter(username__startswith=f'{prefix}-', user_type=role).order_by('pk').first()
+                for role, _ in ROLES
+            }
+            samples = list(
+                CustomUser.objects.filter(username__startswith=f'{prefix}-').order_by('?')
+                .values_list('first_name', 'last_name', 'email')[:options['searches']]
+            )
+            for role, searcher in searchers.items():
+                self._give_conversations(searcher, rng)
+                self._check(searcher)
+                self._measure(role, searcher, samples)
+            transaction.set_rollback(True)
+
+    def _seed(self, prefix, count, rng):
+        roles, weights = zip(*ROLES)
+        batch = 5000
+        for offset in range(0, count, batch):
+            users = []
+            for i in range(offset, min(offset + batch, count)):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                users.append(CustomUser(
+                    username=f'{prefix}-{i}', email=f'{first}.{last}{i}@example.com'.lower(),
+                    first_name=first, last_name=last, user_type=rng.choices(roles, weights)[0],
+                ))
+            CustomUser.objects.bulk_create(users)
+            ContactDirectoryEntry.objects.bulk_create(chain.from_iterable(
+                directory._entries(user.pk, user.user_type, [getattr(user, field) for field in directory.NAME_FIELDS])
+                for user in users
+            ))
+
+    def _give_conversations(self, searcher, rng):
+        roles = directory.authorization.for_user(searcher).contact_roles
+        partners = CustomUser.objects.exclude(pk=searcher.pk).order_by('?')
+        if roles is not None:
+            partners = partners.filter(user_type__in=roles)
+        now = timezone.now()
+        Conversation.objects.bulk_create([
+            Conversation(
+                conversation_id=f'CONV{uuid.uuid4().hex[:8].upper()}', conversation_type='user_manager',
+                participant1=searcher, participant2=partner, last_message_at=now - timedelta(minutes=rng.randint(1, 10000)),
+            )
+            for partner in partners[:30]
+        ])
+
+    def _check(self, searcher):
+        """
+        Page through an email prefix and compare with a plain query.
+        """
+        prefix = 'james.smith1'
+        seen, cursor = [], None
+        while True:
+            page = directory.search(searcher, prefix, cursor=cursor, limit=20)
+            seen.extend(contact.id for contact in page.contacts)
+            cursor = page.next_cursor
+            if not cursor:
+                break
+        if len(seen) != len(set(seen)):
+            raise CommandError('A contact was listed twice.')
+        expected = CustomUser.objects.filter(email__istartswith=prefix).exclude(pk=searcher.pk)
+        roles = directory.authorization.for_user(searcher).contact_roles
+        if roles is not None:
+            expected = expected.filter(user_type__in=roles)
+        if set(seen) != set(expected.values_list('pk', flat=True)):
+            raise CommandError(f'The pages for {prefix!r} differ from the matching allowed contacts.')
+
+    def _measure(self, role, searcher, samples):
+        typed, browsing = [], []
+        for first, last, email in samples:
+            for text in (f'{first} {last}', email):
+                for end in range(1, min(len(text), 8) + 1):
+                    start = time.perf_counter()
+                    directory.search(searcher, text[:end])
+                    typed.append(time.perf_counter() - start)
+        cursor = None
+        for _ in range(50):
+            start = time.perf_counter()
+            page = directory.search(searcher, cursor=cursor)
+            browsing.append(time.perf_counter() - start)
+            cursor = page.next_cursor
+        self.stdout.write(f'{role:<8} typeahead {self._percentiles(typed)}   browse 50 pages {self._percentiles(browsing)}')
+
+    def _percentiles(self, timings):
+        timings = sorted(timings)
+        p50 = timings[len(timings) // 2] * 1000
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000
+        return f'p50 {p50:.1f} ms / p99 {p99:.1f} ms ({len(timings)} calls)'
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from communications.inbox import build_inbox
+from communications.unread import rebuild_counters
+
+from ._synthetic import make_conversations, make_rooms, make_users
+
+
+class Command(BaseCommand):
+    help = (
+        'Query-count regression benchmark for the inbox. Builds synthetic '
+        'threads inside a rolled-back transaction and fails if the number of '
+        'queries grows with the number of threads.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, nargs='+', default=[10, 100, 500],
+                            help='Thread counts to measure (each used for direct and group threads).')
+        parser.add_argument('--messages', type=int, default=5, help='Messages per thread.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            results = [self._measure(threads, options['messages']) for threads in options['threads']]
+            transaction.set_rollback(True)
+
+        for threads, queries, elapsed in results:
+            self.stdout.write(f'{threads:>6} direct + {threads} group threads: {queries} queries, {elapsed * 1000:.1f} ms')
+
+        counts = {queries for _, queries, _ in results}
+        if len(counts) > 1:
+            raise CommandError(f'Inbox query count depends on thread count: {sorted(counts)}')
+        self.stdout.write(self.style.SUCCESS(f'Inbox runs in a constant {counts.pop()} queries.'))
+
+    def _measure(self, threads, messages_per_thread):
+        owner = make_users(1, prefix='inbox-owner')[0]
+        partners = make_users(threads, user_type='manager', prefix='inbox-partner')
+        make_conversations(owner, partners, messages_per_thread)
+        make_rooms(owner, threads, messages_per_thread, sender=partners[0])
+        # bulk_create skips the post_save counters.
+        rebuild_counters()
+
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as ctx:
+            inbox = build_inbox(owner)
+            # Touch everything the template renders.
+            for conv in inbox['conversations']:
+                str(conv.participant1), str(conv.participant2), conv.last_message_content, conv.unread_count
+            for room in inbox['group_chats']:
+                room.name, room.last_message_content, room.unread_count
+        elapsed = time.perf_counter() - start
+        return threads, len(ctx.captured_queries), elapsed
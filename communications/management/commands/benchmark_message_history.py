@@ -0,0 +1,53 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from communications.history import message_window
+
+from ._synthetic import make_conversations, make_users
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the newest-window and "load older" fetches of a conversation as '
+        'its history grows. Runs inside a rolled-back transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                            help='Thread lengths to measure.')
+        parser.add_argument('--pages', type=int, default=5, help='"Load older" fetches to time per thread.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            for size in options['sizes']:
+                self._measure(size, options['pages'])
+            transaction.set_rollback(True)
+
+    def _measure(self, size, pages):
+        owner = make_users(1, prefix='history-owner')[0]
+        partner = make_users(1, user_type='manager', prefix='history-partner')[0]
+        conversation = make_conversations(owner, [partner], size)[0]
+        queryset = conversation.messages.all()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as ctx:
+            window = message_window(queryset)
+            first = time.perf_counter() - start
+            for _ in range(pages):
+                if not window.older_cursor:
+                    break
+                window = message_window(queryset, before=window.older_cursor)
+        total = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.stdout.write(
+            f'{size:>7} messages: newest window {first * 1000:.1f} ms, '
+            f'{pages} older windows {(total - first) * 1000:.1f} ms, '
+            f'{len(ctx.captured_queries)} queries, peak {peak / 1024:.0f} KiB'
+        )
@@ -0,0 +1,92 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template import Context, Template
+from django.utils import translation
+
+from communications import rendering
+from communications.models import NotificationTemplate
+
+TITLE = 'Update for {{ recipient.first_name }}: {{ event_title }}'
+MESSAGE = (
+    'Hi {{ recipient.first_name|default:recipient.username }},\n\n'
+    '{{ event_title }} now starts at {{ starts }}{% if venue %} at {{ venue }}{% endif %}. '
+    'We will send your ticket to {{ recipient.email|lower }}.\n\n'
+    '{% for line in notes %}- {{ line }}\n{% endfor %}'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Render a personalized notification for many recipients: parsing the '
+        'template for each one, rendering the compiled template one by one, '
+        'render_many() in one thread and across threads. Everything is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=100000)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--chunk', type=int, default=2000, help='Recipients per render_many() call')
+
+    def handle(self, *args, **options):
+        count = options['recipients']
+        recipients = [
+            {'username': f'guest{i}', 'email': f'Guest{i}@Example.com', 'first_name': f'Guest {i}', 'last_name': ''}
+            for i in range(count)
+        ]
+        context = {'event_title': 'Summer Gala', 'starts': '19:30', 'venue': 'Bench Hall', 'notes': ['Dress code: smart', 'Doors open at 19:00']}
+        with transaction.atomic():
+            template = NotificationTemplate.objects.create(
+                name='render-bench', notification_type='event', title_template=TITLE, message_template=MESSAGE,
+            )
+            self.stdout.write(f"{'strategy':<36} {'seconds':>8} {'renders/s':>10}")
+
+            def parse_each():
+                results = []
+                with translation.override('en-us'):
+                    for recipient in recipients:
+                        ctx = Context({**context, 'recipient': recipient})
+                        results.append((Template(TITLE).render(ctx).strip(), Template(MESSAGE).render(ctx).strip()))
+                return results
+
+            def compiled_each():
+                return [rendering.render(template, context, 'en-us', recipient) for recipient in recipients]
+
+            def batched():
+                return rendering.render_many(template, recipients, context, 'en-us')
+
+            def threaded():
+                chunks = [recipients[i:i + options['chunk']] for i in range(0, count, options['chunk'])]
+                with ThreadPoolExecutor(options['threads']) as pool:
+                    parts = pool.map(lambda chunk: rendering.render_many(template, chunk, context, 'en-us'), chunks)
+                return [result for part in parts for result in part]
+
+            expected = None
+            for label, run in [
+                ('Template() parsed per recipient', parse_each),
+                ('compiled, render() per recipient', compiled_each),
+                ('compiled, render_many()', batched),
+                (f"render_many() on {options['threads']} threads", threaded),
+            ]:
+                start = time.perf_counter()
+                results = run()
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"{label:<36} {elapsed:8.2f} {count / elapsed:10.0f}")
+                expected = expected or results
+                if results != expected:
+                    self.stdout.write(self.style.ERROR(f'{label}: renderings differ'))
+
+            template.message_template = MESSAGE.replace('{{ recipient.first_name|default:recipient.username }}', 'there').replace(
+                '{{ recipient.email|lower }}', 'your address'
+            )
+            template.title_template = 'Update: {{ event_title }}'
+            template.save()
+            start = time.perf_counter()
+            shared = rendering.render_many(template, recipients, context, 'en-us')
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{'edited, not personal: render_many()':<36} {elapsed:8.2f} {count / elapsed:10.0f}")
+            if shared[0][0] != 'Update: Summer Gala':
+                self.stdout.write(self.style.ERROR('the edited template was not recompiled'))
+            transaction.set_rollback(True)
@@ -0,0 +1,101 @@
+import asyncio
+import time
+import tracemalloc
+import uuid
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from users.models import CustomUser
+from communications import streams
+from communications.models import Notification
+
+from ._synthetic import make_users
+
+
+def _send(users):
+    Notification.objects.bulk_create([
+        Notification(
+            user=user, notification_id=f'NOTIF{uuid.uuid4().hex[:12].upper()}',
+            notification_type='system', title='Stream benchmark', message='Hello',
+        )
+        for user in users
+    ], batch_size=2000)
+
+
+class Command(BaseCommand):
+    help = (
+        'Load benchmark for the Server-Sent Events notification streams: holds '
+        'N idle streams in this process, counts the database polls they cost '
+        'while idle, then bulk-creates a notification for every streaming user '
+        'as the fan-out worker would and measures how long each takes to '
+        'arrive. Runs against the real database and deletes its rows afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--streams', type=int, nargs='+', default=[1000, 5000],
+                            help='Concurrent stream counts to measure.')
+        parser.add_argument('--idle', type=float, default=5.0, help='Seconds to hold the streams idle.')
+
+    def handle(self, *args, **options):
+        for count in options['streams']:
+            prefix = f'sse-bench-{uuid.uuid4().hex[:6]}'
+            users = make_users(count, prefix=prefix)
+            try:
+                result = async_to_sync(self._run)(users, options['idle'])
+            finally:
+                Notification.objects.filter(user__in=users).delete()
+                # Bulk-created, so never counted on the dashboards: delete them
+                # without the signals that would uncount them.
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'DELETE FROM {connection.ops.quote_name(CustomUser._meta.db_table)} WHERE username LIKE %s',
+                        [f'{prefix}-%'],
+                    )
+            self._report(count, options['idle'], *result)
+
+    async def _run(self, users, idle):
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        arrived = {}
+
+        async def consume(user_id):
+            async for chunk in streams.event_stream(user_id):
+                if chunk.startswith('id:'):
+                    arrived[user_id] = time.perf_counter()
+                    return
+
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(consume(user.pk)) for user in users]
+        while streams.hub.streams < len(users):
+            await asyncio.sleep(0.01)
+        open_time = time.perf_counter() - start
+        per_stream, _ = tracemalloc.get_traced_memory()
+        per_stream = (per_stream - baseline) / len(users)
+        tracemalloc.stop()
+
+        polls = streams.hub.polls
+        await asyncio.sleep(idle)
+        idle_polls = streams.hub.polls - polls
+
+        sent = time.perf_counter()
+        await sync_to_async(_send)(users)
+        created = time.perf_counter() - sent
+        done, pending = await asyncio.wait(tasks, timeout=60)
+        for task in pending:
+            task.cancel()
+        if pending:
+            raise CommandError(f'{len(pending)} streams never received their notification.')
+        latencies = sorted(arrived[user.pk] - sent for user in users)
+        return open_time, per_stream, idle_polls, created, latencies
+
+    def _report(self, count, idle, open_time, per_stream, idle_polls, created, latencies):
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+        self.stdout.write(
+            f'{count:>6} streams: open {open_time * 1000:.0f} ms, {per_stream / 1024:.1f} KiB/stream, '
+            f'{idle_polls} polls in {idle:g} s idle (vs {count * idle / streams.POLL_SECONDS:,.0f} polling per stream), '
+            f'{count} notifications created in {created * 1000:.0f} ms, '
+            f'arrival p50 {p50:.0f} ms / p99 {p99:.0f} ms'
+        )
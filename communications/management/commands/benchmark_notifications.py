@@ -0,0 +1,139 @@
+import random
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from communications import notifications
+from communications.models import Notification, NotificationBatch, NotificationDelivery, NotificationTemplate
+from communications.management.commands._synthetic import make_users
+from events.management.commands._synthetic import make_event
+from events.models import EventGuest
+from users.models import CustomUser
+
+LANGUAGES = ['en-us', 'fr', 'de', 'es']
+
+
+class BouncingTransport(notifications.LocalTransport):
+    """
+    The stub transport, except that every delivery to a user in `bouncing`
+    fails, and other deliveries fail at `failure_rate`.
+    """
+    bouncing = set()
+    failure_rate = 0.0
+
+    def send(self, deliveries):
+        errors = []
+        for delivery in deliveries:
+            if delivery.notification.user_id in self.bouncing:
+                errors.append('mailbox unavailable')
+            elif random.random() < self.failure_rate:
+                errors.append('temporary failure')
+            else:
+                self.outbox.append((self.channel, delivery.notification.user_id, None, None))
+                errors.append(None)
+        return errors
+
+
+class Command(BaseCommand):
+    help = (
+        'Send an event update to a large guest list through the notification '
+        'fan-out: time the web-side notify call, the expansion and the '
+        'per-channel delivery with the stub transports, some deliveries '
+        'failing temporarily and some for good. Runs against the real '
+        'database and deletes its rows afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--guests', type=int, default=50000)
+        parser.add_argument('--sms-share', type=float, default=0.1, help='Guests who also want SMS')
+        parser.add_argument('--failure-rate', type=float, default=0.01, help='Temporary failures per delivery')
+        parser.add_argument('--bouncing', type=int, default=20, help='Guests whose deliveries always fail')
+        parser.add_argument('--unlimited', action='store_true', help='Ignore the channel rate limits')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        prefix = f'notify-bench-{uuid.uuid4().hex[:6]}'
+        start = time.perf_counter()
+        users = make_users(options['guests'], prefix=prefix)
+        for user in users:
+            user.language = rng.choice(LANGUAGES)
+            if rng.random() < options['sms_share']:
+                user.phone_number, user.notification_sms = '+15550000000', True
+        CustomUser.objects.bulk_update(users, ['language', 'phone_number', 'notification_sms'], batch_size=2000)
+        event = make_event()
+        EventGuest.objects.bulk_create([
+            EventGuest(event=event, name=user.username, email=user.email) for user in users
+        ], batch_size=5000)
+        template = NotificationTemplate.objects.create(
+            name=prefix, notification_type='event', title_template='Update: {{ event.title }}',
+            message_template='{{ event.title }} now starts at {{ starts }} on {{ event.start_date|date:"DATE_FORMAT" }}.',
+            send_email=True, send_sms=True, send_push=True,
+        )
+        self.stdout.write(f"{options['guests']} guests created in {time.perf_counter() - start:.1f} s")
+
+        saved = (dict(notifications.TRANSPORTS), dict(notifications.RATES), notifications.RETRY_BASE_SECONDS)
+        BouncingTransport.bouncing = {user.pk for user in rng.sample(users, options['bouncing'])}
+        BouncingTransport.failure_rate = options['failure_rate']
+        path = f'{__name__}.BouncingTransport'
+        notifications.TRANSPORTS.update({channel: path for channel in notifications.CHANNELS})
+        notifications.RETRY_BASE_SECONDS = 0
+        if options['unlimited']:
+            notifications.RATES.update({channel: 0 for channel in notifications.CHANNELS})
+        try:
+            start = time.perf_counter()
+            batch = notifications.notify_event_guests(template, event, {'starts': '19:30'})
+            self.stdout.write(f"notify_event_guests() in the web request: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+            start = time.perf_counter()
+            created = notifications.expand_batches()
+            expanded = time.perf_counter() - start
+            deliveries = NotificationDelivery.objects.filter(notification__related_event=event)
+            self.stdout.write(
+                f"Expanded into {created} notifications and {deliveries.count()} deliveries in {expanded:.1f} s"
+            )
+            # Deliveries retried without backoff, so run until nothing is due.
+            start = time.perf_counter()
+            totals = {channel: [0, 0] for channel in notifications.CHANNELS}
+            while deliveries.filter(status__in=['pending', 'sending']).exists():
+                for channel, (sent, failed) in notifications.run_workers().items():
+                    totals[channel][0] += sent
+                    totals[channel][1] += failed
+            elapsed = time.perf_counter() - start
+            limits = 'unlimited' if options['unlimited'] else ', '.join(
+                f'{channel} {rate:g}/s' for channel, rate in notifications.RATES.items()
+            )
+            self.stdout.write(f"\nDelivered in {elapsed:.1f} s ({limits}):")
+            for channel, (sent, failed) in totals.items():
+                dead = deliveries.filter(channel=channel, status='dead').count()
+                self.stdout.write(f"  {channel:<6} {sent:>7} sent {failed:>6} failed attempts {dead:>4} dead letters")
+            expected = deliveries.filter(status='sent').count()
+            flagged = sum(
+                Notification.objects.filter(related_event=event, **{f'{channel}_sent': True}).count()
+                for channel in notifications.CHANNELS
+            )
+            if flagged != expected:
+                self.stdout.write(self.style.ERROR(f'{flagged} channel flags set for {expected} sent deliveries'))
+            languages = Notification.objects.filter(related_event=event).values('message').distinct().count()
+            self.stdout.write(f"{languages} distinct renderings for {created} notifications")
+        finally:
+            notifications.TRANSPORTS.clear()
+            notifications.TRANSPORTS.update(saved[0])
+            notifications.RATES.update(saved[1])
+            notifications.RETRY_BASE_SECONDS = saved[2]
+            Notification.objects.filter(related_event=event).delete()
+            NotificationBatch.objects.filter(template=template).delete()
+            template.delete()
+            organizer = event.organizer
+            event.delete()
+            event.venue.delete()
+            organizer.delete()
+            # Bulk-created, so never counted on the dashboards: delete them
+            # without the signals that would uncount them.
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {connection.ops.quote_name(CustomUser._meta.db_table)} WHERE username LIKE %s',
+                    [f'{prefix}-%'],
+                )
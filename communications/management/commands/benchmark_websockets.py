@@ -0,0 +1,89 @@
+import asyncio
+import time
+import tracemalloc
+
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from users.models import CustomUser
+from communications.models import ChatRoom
+from communications.routing import websocket_urlpatterns
+
+from ._synthetic import make_rooms, make_users
+
+IN_MEMORY_LAYER = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+class Command(BaseCommand):
+    help = (
+        'Load benchmark for the chat WebSocket consumers: opens N concurrent '
+        'sockets on one group room in this process, on the in-memory channel '
+        'layer, and measures connect time, fan-out latency and memory per '
+        'socket. Benchmark rows are deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sockets', type=int, nargs='+', default=[100, 500, 1000],
+                            help='Concurrent socket counts to measure.')
+        parser.add_argument('--messages', type=int, default=20, help='Messages fanned out per run.')
+
+    def handle(self, *args, **options):
+        with override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER):
+            for sockets in options['sockets']:
+                users = make_users(sockets, prefix='ws-bench')
+                room = make_rooms(users[0], 1)[0]
+                try:
+                    room.members.all().delete()
+                    room.members.model.objects.bulk_create([room.members.model(room=room, user=u) for u in users])
+                    result = async_to_sync(self._run)(room, users, options['messages'])
+                finally:
+                    ChatRoom.objects.filter(pk=room.pk).delete()
+                    CustomUser.objects.filter(pk__in=[u.pk for u in users]).delete()
+                self._report(sockets, options['messages'], *result)
+
+    async def _run(self, room, users, message_count):
+        application = URLRouter(websocket_urlpatterns)
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+
+        communicators = []
+        for user in users:
+            communicator = WebsocketCommunicator(application, f'/ws/group/{room.pk}/')
+            communicator.scope['user'] = user
+            communicators.append(communicator)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(c.connect(timeout=60) for c in communicators))
+        connect_time = time.perf_counter() - start
+        if not all(connected for connected, _ in results):
+            raise CommandError('Some sockets were refused.')
+        per_socket, _ = tracemalloc.get_traced_memory()
+        per_socket = (per_socket - baseline) / len(communicators)
+        tracemalloc.stop()
+
+        sender = communicators[0]
+        latencies = []
+        start = time.perf_counter()
+        for i in range(message_count):
+            sent = time.perf_counter()
+            await sender.send_json_to({'type': 'message', 'content': f'Load test {i}'})
+            await asyncio.gather(*(c.receive_json_from(timeout=30) for c in communicators))
+            latencies.append(time.perf_counter() - sent)
+        fan_out_time = time.perf_counter() - start
+
+        await asyncio.gather(*(c.disconnect() for c in communicators))
+        return connect_time, per_socket, latencies, fan_out_time
+
+    def _report(self, sockets, message_count, connect_time, per_socket, latencies, fan_out_time):
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+        deliveries = sockets * message_count / fan_out_time
+        self.stdout.write(
+            f'{sockets:>6} sockets: connect {connect_time * 1000:.0f} ms, '
+            f'{per_socket / 1024:.1f} KiB/socket, fan-out p50 {p50:.1f} ms / p99 {p99:.1f} ms, '
+            f'{deliveries:,.0f} deliveries/s'
+        )
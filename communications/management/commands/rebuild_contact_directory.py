@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from communications.directory import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recreate the chat contact directory search terms of every user from scratch.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            users = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {users} users in the contact directory.'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from communications.unread import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-participant unread counters of conversations and chat rooms from scratch.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            conversations, memberships = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt unread counters for {conversations} conversations and {memberships} chat room memberships.'
+        ))
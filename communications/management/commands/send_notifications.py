@@ -0,0 +1,35 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from communications.notifications import CHANNELS, requeue_dead, run_workers
+
+
+class Command(BaseCommand):
+    help = (
+        'Expand queued notification batches and deliver them, with a pool of '
+        'rate-limited worker threads per channel.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--channel', action='append', choices=CHANNELS, help='Only deliver on this channel (repeatable).')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting once nothing is due.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep between polls with --loop.')
+        parser.add_argument('--requeue-dead', action='store_true', help='Retry dead letters from scratch first.')
+
+    def handle(self, *args, **options):
+        channels = options['channel'] or CHANNELS
+        if options['requeue_dead']:
+            for channel in channels:
+                self.stdout.write(f'Requeued {requeue_dead(channel)} dead {channel} deliveries.')
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        try:
+            totals = run_workers(channels, loop=options['loop'], interval=options['interval'], stop=stop)
+        except KeyboardInterrupt:
+            stop.set()
+            raise
+        for channel, (sent, failed) in totals.items():
+            self.stdout.write(f'{channel}: {sent} sent, {failed} retried or dead-lettered.')
+        self.stdout.write(self.style.SUCCESS('Notification queue drained.'))
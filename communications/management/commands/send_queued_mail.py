@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from communications.mail_queue import BATCH_SIZE, send_queued_mail
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbound emails in batches over one mail connection per batch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Emails sent per connection.')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the queue instead of exiting when it is empty.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep between polls with --loop.')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_queued_mail(batch_size=options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, deferred or failed {failed}.')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Queue drained: {total_sent} sent, {total_failed} deferred or failed.'))
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:55
+
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, group_field):
+    counted = (
+        queryset.order_by()
+        .values(group_field)
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def backfill_unread_counters(apps, schema_editor):
+    Conversation = apps.get_model("communications", "Conversation")
+    Message = apps.get_model("communications", "Message")
+    ChatRoomMember = apps.get_model("communications", "ChatRoomMember")
+    ChatMessage = apps.get_model("communications", "ChatMessage")
+
+    unread = Message.objects.filter(conversation=OuterRef("pk"), is_read=False)
+    Conversation.objects.update(
+        participant1_unread=_count(
+            unread.exclude(sender=OuterRef("participant1")), "conversation"
+        ),
+        participant2_unread=_count(
+            unread.exclude(sender=OuterRef("participant2")), "conversation"
+        ),
+    )
+    never_read = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    unread_chat = ChatMessage.objects.filter(
+        room=OuterRef("room_id"),
+        created_at__gt=Coalesce(OuterRef("last_read_at"), Value(never_read)),
+        is_edited=False,
+        is_deleted=False,
+    ).exclude(sender=OuterRef("user_id"))
+    ChatRoomMember.objects.update(unread_count=_count(unread_chat, "room"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("communications", "0005_chatroommember_last_read_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatroommember",
+            name="unread_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="participant1_unread",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="participant2_unread",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_unread_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from communications.directory import name_term, search_terms
+
+
+def fill_contact_directory(apps, schema_editor):
+    CustomUser = apps.get_model("users", "CustomUser")
+    ContactDirectoryEntry = apps.get_model("communications", "ContactDirectoryEntry")
+    last_id = 0
+    while True:
+        rows = list(
+            CustomUser.objects.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list(
+                "pk", "user_type", "first_name", "last_name", "username", "email"
+            )[:5000]
+        )
+        if not rows:
+            return
+        ContactDirectoryEntry.objects.bulk_create(
+            [
+                ContactDirectoryEntry(
+                    user_id=pk,
+                    user_type=user_type,
+                    term=term,
+                    is_name=term == name_term(*names),
+                )
+                for pk, user_type, *names in rows
+                for term in search_terms(*names)
+            ]
+        )
+        last_id = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("communications", "0010_notification_fanout"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContactDirectoryEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("user_type", models.CharField(max_length=10)),
+                ("term", models.CharField(max_length=254)),
+                ("is_name", models.BooleanField(default=False)),
+            ],
+            options={
+                "db_table": "contact_directory",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="conversation",
+            index=models.Index(
+                fields=["participant1", "last_message_at"], name="conv_p1_recent_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="conversation",
+            index=models.Index(
+                fields=["participant2", "last_message_at"], name="conv_p2_recent_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="contactdirectoryentry",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="directory_entries",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contactdirectoryentry",
+            index=models.Index(
+                fields=["user_type", "is_name", "term", "user"],
+                name="contact_dir_prefix_idx",
+            ),
+        ),
+        migrations.RunPython(fill_contact_directory, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 import uuid
 
@@ -33,6 +34,10 @@ class Conversation(models.Model):
     is_active = models.BooleanField(default=True)
     is_archived = models.BooleanField(default=False)
     
+    # Unread counters, maintained by communications.unread
+    participant1_unread = models.PositiveIntegerField(default=0)
+    participant2_unread = models.PositiveIntegerField(default=0)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -42,6 +47,11 @@ class Conversation(models.Model):
         db_table = 'conversations'
         ordering = ['-last_message_at', '-created_at']
         unique_together = ['participant1', 'participant2', 'event']
+        indexes = [
+            # A user's most recently active threads, for the contact directory
+            models.Index(fields=['participant1', 'last_message_at'], name='conv_p1_recent_idx'),
+            models.Index(fields=['participant2', 'last_message_at'], name='conv_p2_recent_idx'),
+        ]
     
     def __str__(self):
         return f"Conversation {self.conversation_id} - {self.participant1.get_full_name()} & {self.participant2.get_full_name()}"
@@ -55,9 +65,33 @@ class Conversation(models.Model):
     def participants(self):
         return [self.participant1, self.participant2]
     
-    @property
     def unread_count_for_user(self, user):
-        return self.messages.filter(is_read=False).exclude(sender=user).count()
+        if user.id == self.participant1_id:
+            return self.participant1_unread
+        if user.id == self.participant2_id:
+            return self.participant2_unread
+        return 0
+
+
+class ContactDirectoryEntry(models.Model):
+    """
+    One lowercased search term (full name, last name, username or email)
+    of a user, for prefix search in communications.directory. The term a
+    user is listed under when browsing has is_name set.
+    """
+    user = models.ForeignKey('users.CustomUser', on_delete=models.CASCADE, related_name='directory_entries')
+    user_type = models.CharField(max_length=10)
+    term = models.CharField(max_length=254)
+    is_name = models.BooleanField(default=False)
+    
+    class Meta:
+        db_table = 'contact_directory'
+        indexes = [
+            models.Index(fields=['user_type', 'is_name', 'term', 'user'], name='contact_dir_prefix_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.term} ({self.user_type})"
 
 
 class Message(models.Model):
@@ -100,6 +134,12 @@ class Message(models.Model):
     class Meta:
         db_table = 'messages'
         ordering = ['created_at']
+        indexes = [
+            # Keyset pagination of a conversation's history (communications.history)
+            models.Index(fields=['conversation', 'created_at', 'id'], name='messages_conv_created_idx'),
+            # Unread messages of a conversation from the other participant
+            models.Index(fields=['conversation', 'is_read', 'sender'], name='messages_conv_unread_idx'),
+        ]
     
     def __str__(self):
         return f"Message from {self.sender.get_full_name()} - {self.content[:50]}"
@@ -287,6 +327,10 @@ class Notification(models.Model):
     class Meta:
         db_table = 'notifications'
         ordering = ['-created_at']
+        indexes = [
+            # A user's (unread) notifications, newest first
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notifications_user_unread_idx'),
+        ]
     
     def __str__(self):
         return f"Notification for {self.user.get_full_name()} - {self.title}"
@@ -331,6 +375,124 @@ class NotificationTemplate(models.Model):
         return self.name
 
 
+class NotificationBatch(models.Model):
+    """
+    A template sent to many users, expanded into Notification rows by the
+    send_notifications worker (see communications.notifications)
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('expanding', 'Expanding'),
+        ('done', 'Done'),
+    ]
+    
+    template = models.ForeignKey(NotificationTemplate, on_delete=models.CASCADE, related_name='batches')
+    context = models.JSONField(default=dict, blank=True)
+    recipients = models.JSONField(default=list)  # user ids
+    related_event = models.ForeignKey('events.Event', on_delete=models.CASCADE, related_name='notification_batches', null=True, blank=True)
+    action_url = models.URLField(blank=True)
+    action_text = models.CharField(max_length=100, blank=True)
+    
+    # Expansion state: recipients[:expanded] have their notifications
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    expanded = models.PositiveIntegerField(default=0)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    expanded_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'notification_batches'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='notif_batch_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.template} to {len(self.recipients)} users ({self.status})"
+
+
+class NotificationDelivery(models.Model):
+    """
+    One notification on one channel, waiting for or past delivery
+    """
+    CHANNEL_CHOICES = [
+        ('email', 'Email'),
+        ('sms', 'SMS'),
+        ('push', 'Push'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead letter'),
+    ]
+    
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='deliveries')
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    
+    # Delivery state
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    
+    # Timestamps
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'notification_deliveries'
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['channel', 'status', 'next_attempt_at'], name='notif_delivery_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.channel} for {self.notification_id} ({self.status})"
+
+
+class OutboundEmail(models.Model):
+    """
+    Outgoing email waiting in the delivery queue (see communications.mail_queue)
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    # Message
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, blank=True)
+    recipients = models.JSONField(default=list)
+    
+    # Delivery state
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'outbound_emails'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbound_email_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+
+
 class ChatRoom(models.Model):
     """
     Real-time chat rooms for group discussions
@@ -388,6 +550,7 @@ class ChatRoomMember(models.Model):
     # Member details
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='member')
     is_active = models.BooleanField(default=True)
+    unread_count = models.PositiveIntegerField(default=0)
     
     # Timestamps
     joined_at = models.DateTimeField(auto_now_add=True)
@@ -435,6 +598,10 @@ class ChatMessage(models.Model):
     class Meta:
         db_table = 'chat_messages'
         ordering = ['created_at']
+        indexes = [
+            # Keyset pagination of a room's history (communications.history)
+            models.Index(fields=['room', 'created_at', 'id'], name='chat_msgs_room_created_idx'),
+        ]
     
     def __str__(self):
         return f"Chat message from {self.sender.get_full_name()} in {self.room.name}"
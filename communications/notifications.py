@@ -0,0 +1,421 @@
+"""
+Notification fan-out.
+
+notify() and notify_event_guests() only store a NotificationBatch (the
+template, a JSON context and the recipients' ids), so a request sending
+an event update to 50,000 guests costs one INSERT. The send_notifications
+worker does the rest:
+
+- expand_batches() renders the template for the recipients with
+  communications.rendering (once per language unless it mentions
+  {{ recipient }}) and bulk_creates their Notification rows, plus one
+  NotificationDelivery per channel the template sends on and the user
+  accepts (notification_email/_sms/_push; SMS also needs a phone number).
+  Progress is committed per chunk, so a worker that dies mid-batch
+  resumes where it stopped.
+- run_workers() starts a pool of threads per channel (NOTIFICATION_*_WORKERS)
+  that claim due deliveries, pace them to the channel's rate limit
+  (NOTIFICATION_*_RATE per second and worker process) and hand them to its
+  transport. Failures are retried with exponential backoff; after
+  NOTIFICATION_MAX_ATTEMPTS a delivery becomes a dead letter, kept for
+  inspection until requeue_dead().
+
+Transports are set per channel in NOTIFICATION_TRANSPORTS. EmailTransport
+goes through EMAIL_BACKEND; LocalTransport is the stub for development and
+tests, which keeps what it sends in LocalTransport.outbox.
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+from django.db.models import DateTimeField, F, Q, QuerySet, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from events.models import EventGuest, Registration
+from users.models import CustomUser
+
+from . import rendering
+from .models import Notification, NotificationBatch, NotificationDelivery, NotificationTemplate
+
+logger = logging.getLogger(__name__)
+
+CHANNELS = ('email', 'sms', 'push')
+BATCH_SIZE = getattr(settings, 'NOTIFICATION_BATCH_SIZE', 100)
+EXPAND_CHUNK = getattr(settings, 'NOTIFICATION_EXPAND_CHUNK', 2000)
+MAX_ATTEMPTS = getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 5)
+RETRY_BASE_SECONDS = getattr(settings, 'NOTIFICATION_RETRY_BASE_SECONDS', 30)
+RETRY_MAX_SECONDS = getattr(settings, 'NOTIFICATION_RETRY_MAX_SECONDS', 60 * 60)
+# A batch or delivery claimed longer ago than this belonged to a worker that died.
+CLAIM_TIMEOUT = timedelta(seconds=getattr(settings, 'NOTIFICATION_CLAIM_TIMEOUT_SECONDS', 600))
+
+WORKERS = {
+    'email': getattr(settings, 'NOTIFICATION_EMAIL_WORKERS', 4),
+    'sms': getattr(settings, 'NOTIFICATION_SMS_WORKERS', 2),
+    'push': getattr(settings, 'NOTIFICATION_PUSH_WORKERS', 4),
+}
+RATES = {
+    'email': getattr(settings, 'NOTIFICATION_EMAIL_RATE', 200),
+    'sms': getattr(settings, 'NOTIFICATION_SMS_RATE', 20),
+    'push': getattr(settings, 'NOTIFICATION_PUSH_RATE', 500),
+}
+TRANSPORTS = {
+    'email': 'communications.notifications.EmailTransport',
+    'sms': 'communications.notifications.LocalTransport',
+    'push': 'communications.notifications.LocalTransport',
+    **getattr(settings, 'NOTIFICATION_TRANSPORTS', {}),
+}
+
+
+# Dispatch
+
+def notify(template, users, context=None, event=None, action_url='', action_text=''):
+    """
+    Queue a template for a set of users (a queryset, users or ids). The
+    context must be JSON serializable; templates also see the event as
+    {{ event }} and each user's name and email as {{ recipient }}.
+    """
+    if isinstance(template, str):
+        template = NotificationTemplate.objects.get(name=template, is_active=True)
+    if isinstance(users, QuerySet):
+        recipients = list(users.values_list('pk', flat=True))
+    else:
+        recipients = [getattr(user, 'pk', user) for user in users]
+    return NotificationBatch.objects.create(
+        template=template,
+        context=context or {},
+        recipients=recipients,
+        related_event=event,
+        action_url=action_url,
+        action_text=action_text,
+    )
+
+
+def event_recipients(event):
+    """
+    The active users registered for or on the guest list of an event,
+    matched by email.
+    """
+    return CustomUser.objects.filter(is_active=True).filter(
+        Q(email__in=Registration.objects.filter(event=event).values('email'))
+        | Q(email__in=EventGuest.objects.filter(event=event).exclude(email='').values('email'))
+    )
+
+
+def notify_event_guests(template, event, context=None, **kwargs):
+    return notify(template, event_recipients(event), context, event=event, **kwargs)
+
+
+# Expansion
+
+def _claim_batch(now):
+    due = Q(status='pending') | Q(status='expanding', claimed_at__lt=now - CLAIM_TIMEOUT)
+    pk = NotificationBatch.objects.filter(due).order_by('created_at').values_list('pk', flat=True).first()
+    if pk is None or not NotificationBatch.objects.filter(due, pk=pk).update(status='expanding', claimed_at=now):
+        return None
+    return NotificationBatch.objects.select_related('template', 'related_event').get(pk=pk)
+
+
+def expand_batch(batch):
+    """
+    Create the notifications and deliveries of a claimed batch, from where
+    an earlier attempt stopped. Returns the number of notifications.
+    """
+    template = batch.template
+    context = dict(batch.context)
+    if batch.related_event is not None:
+        context.setdefault('event', batch.related_event)
+    channels = [channel for channel in CHANNELS if getattr(template, f'send_{channel}')]
+    created = 0
+    while batch.expanded < len(batch.recipients):
+        chunk = batch.recipients[batch.expanded:batch.expanded + EXPAND_CHUNK]
+        by_language = {}
+        for row in CustomUser.objects.filter(pk__in=chunk, is_active=True).values(
+            'pk', 'username', 'email', 'first_name', 'last_name', 'language', 'phone_number',
+            'notification_email', 'notification_sms', 'notification_push',
+        ):
+            by_language.setdefault(row['language'] or settings.LANGUAGE_CODE, []).append(row)
+        notifications, wanted = [], []
+        for language, users in by_language.items():
+            recipients = [
+                {field: user[field] for field in ('username', 'email', 'first_name', 'last_name')}
+                for user in users
+            ]
+            for user, (title, message) in zip(users, rendering.render_many(template, recipients, context, language)):
+                notifications.append(Notification(
+                    notification_id=f'NOTIF{uuid.uuid4().hex[:12].upper()}',
+                    user_id=user['pk'],
+                    notification_type=template.notification_type,
+                    title=title,
+                    message=message,
+                    priority=template.priority,
+                    related_event=batch.related_event,
+                    action_url=batch.action_url,
+                    action_text=batch.action_text,
+                ))
+                wanted.append([
+                    channel for channel in channels
+                    if user[f'notification_{channel}'] and (channel != 'sms' or user['phone_number'])
+                ])
+        with transaction.atomic():
+            Notification.objects.bulk_create(notifications)
+            if notifications and notifications[0].pk is None:
+                # Backends without INSERT ... RETURNING
+                pks = dict(Notification.objects.filter(
+                    notification_id__in=[notification.notification_id for notification in notifications]
+                ).values_list('notification_id', 'pk'))
+                for notification in notifications:
+                    notification.pk = pks[notification.notification_id]
+            NotificationDelivery.objects.bulk_create([
+                NotificationDelivery(notification_id=notification.pk, channel=channel)
+                for notification, user_channels in zip(notifications, wanted)
+                for channel in user_channels
+            ], batch_size=5000)
+            batch.expanded += len(chunk)
+            NotificationBatch.objects.filter(pk=batch.pk).update(expanded=batch.expanded, claimed_at=timezone.now())
+        created += len(notifications)
+    NotificationBatch.objects.filter(pk=batch.pk).update(status='done', expanded_at=timezone.now())
+    return created
+
+
+def expand_batches():
+    """
+    Expand every pending batch. Returns the number of notifications created.
+    """
+    created = 0
+    while True:
+        batch = _claim_batch(timezone.now())
+        if batch is None:
+            return created
+        created += expand_batch(batch)
+
+
+# Transports
+
+class LocalTransport:
+    """
+    Development stub: records what it sends in outbox, newest last, like
+    Django's locmem email backend.
+    """
+    outbox = deque(maxlen=10000)
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def send(self, deliveries):
+        errors = []
+        for delivery in deliveries:
+            notification = delivery.notification
+            self.outbox.append((self.channel, notification.user_id, notification.title, notification.message))
+            errors.append(None)
+        return errors
+
+
+class EmailTransport:
+    """
+    Email through EMAIL_BACKEND, one connection per batch.
+    """
+    def __init__(self, channel):
+        self.channel = channel
+
+    def send(self, deliveries):
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as exc:
+            logger.warning("Could not open mail connection", exc_info=True)
+            return [str(exc) for _ in deliveries]
+        errors = []
+        try:
+            for delivery in deliveries:
+                notification = delivery.notification
+                body = notification.message
+                if notification.action_url:
+                    body += f"\n\n{notification.action_text or notification.action_url}: {notification.action_url}"
+                try:
+                    EmailMessage(
+                        subject=notification.title, body=body, to=[notification.user.email], connection=connection,
+                    ).send()
+                except Exception as exc:
+                    logger.warning("Sending notification %s by email failed", notification.pk, exc_info=True)
+                    errors.append(str(exc))
+                else:
+                    errors.append(None)
+        finally:
+            connection.close()
+        return errors
+
+
+class RateLimiter:
+    """
+    Spaces calls to acquire() at least 1/rate seconds apart across threads;
+    a rate of 0 means no limit.
+    """
+    def __init__(self, rate):
+        self.rate = rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + 1 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# Delivery
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1)))
+
+
+def _claim_deliveries(channel, batch_size, now):
+    # As in mail_queue: a row is ours only if our UPDATE moved it.
+    due = Q(status='pending', next_attempt_at__lte=now) | Q(status='sending', claimed_at__lt=now - CLAIM_TIMEOUT)
+    pending = NotificationDelivery.objects.filter(due, channel=channel)
+    with transaction.atomic():
+        ids = list(pending.order_by('next_attempt_at').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return []
+        pending.filter(id__in=ids).update(status='sending', claimed_at=now)
+    return list(
+        NotificationDelivery.objects.filter(id__in=ids, status='sending', claimed_at=now)
+        .select_related('notification__user').order_by('next_attempt_at')
+    )
+
+
+def _paced(deliveries, limiter):
+    for delivery in deliveries:
+        limiter.acquire()
+        yield delivery
+
+
+def deliver(channel, transport, limiter, batch_size=BATCH_SIZE):
+    """
+    Claim and send one batch of due deliveries on a channel. Returns a
+    (sent, retried_or_dead) tuple.
+    """
+    now = timezone.now()
+    batch = _claim_deliveries(channel, batch_size, now)
+    if not batch:
+        return 0, 0
+    try:
+        errors = transport.send(_paced(batch, limiter))
+    except Exception as exc:
+        logger.exception("The %s transport failed", channel)
+        errors = [str(exc)] * len(batch)
+    sent = [delivery for delivery, error in zip(batch, errors) if error is None]
+    failed = []
+    for delivery, error in zip(batch, errors):
+        if error is None:
+            continue
+        delivery.attempts += 1
+        delivery.last_error = error
+        if delivery.attempts >= MAX_ATTEMPTS:
+            delivery.status = 'dead'
+            logger.warning("Notification delivery %s is a dead letter: %s", delivery.pk, error)
+        else:
+            delivery.status = 'pending'
+            delivery.next_attempt_at = now + retry_delay(delivery.attempts)
+        failed.append(delivery)
+    sent_at = timezone.now()
+    with transaction.atomic():
+        if sent:
+            NotificationDelivery.objects.filter(pk__in=[delivery.pk for delivery in sent]).update(
+                status='sent', attempts=F('attempts') + 1, sent_at=sent_at,
+            )
+            Notification.objects.filter(pk__in=[delivery.notification_id for delivery in sent]).update(
+                is_sent=True, sent_at=Coalesce('sent_at', Value(sent_at, output_field=DateTimeField())),
+                **{f'{channel}_sent': True},
+            )
+        if failed:
+            NotificationDelivery.objects.bulk_update(failed, ['status', 'attempts', 'last_error', 'next_attempt_at'])
+    return len(sent), len(failed)
+
+
+def requeue_dead(channel=None):
+    """
+    Give dead letters a fresh set of attempts. Returns how many.
+    """
+    dead = NotificationDelivery.objects.filter(status='dead')
+    if channel:
+        dead = dead.filter(channel=channel)
+    return dead.update(status='pending', attempts=0, next_attempt_at=timezone.now())
+
+
+def run_workers(channels=CHANNELS, loop=False, interval=5.0, stop=None):
+    """
+    Expand pending batches and deliver on the given channels, WORKERS[channel]
+    threads each, until nothing is due (or, with loop, until stop is set).
+    Returns {channel: (sent, retried_or_dead)}.
+    """
+    stop = stop or threading.Event()
+    expanding = threading.Event()
+    expanding.set()
+    totals = {channel: [0, 0] for channel in channels}
+    lock = threading.Lock()
+
+    def expander():
+        try:
+            while not stop.is_set():
+                try:
+                    expand_batches()
+                except Exception:
+                    logger.exception("Expanding notification batches failed")
+                if not loop:
+                    break
+                expanding.clear()
+                stop.wait(interval)
+        finally:
+            expanding.clear()
+            connections.close_all()
+
+    def worker(channel, transport, limiter):
+        try:
+            while not stop.is_set():
+                try:
+                    sent, failed = deliver(channel, transport, limiter)
+                except Exception:
+                    logger.exception("Delivering %s notifications failed", channel)
+                    if not loop:
+                        break
+                    stop.wait(interval)
+                    continue
+                with lock:
+                    totals[channel][0] += sent
+                    totals[channel][1] += failed
+                if sent or failed:
+                    continue
+                if expanding.is_set():
+                    stop.wait(0.2)
+                elif loop:
+                    stop.wait(interval)
+                else:
+                    break
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=expander, name='notifications expander')]
+    for channel in channels:
+        transport = import_string(TRANSPORTS[channel])(channel)
+        limiter = RateLimiter(RATES[channel])
+        threads += [
+            threading.Thread(target=worker, args=(channel, transport, limiter), name=f'notifications {channel} {number}')
+            for number in range(WORKERS[channel])
+        ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {channel: tuple(counts) for channel, counts in totals.items()}
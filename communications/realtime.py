@@ -0,0 +1,46 @@
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from .history import serialize_message
+
+logger = logging.getLogger(__name__)
+
+
+def conversation_group(conversation_id):
+    return f"conversation_{conversation_id}"
+
+
+def room_group(room_id):
+    return f"chat_room_{room_id}"
+
+
+def _group_send(group, event):
+    """
+    Publish event to every socket in group. A channel layer outage must not
+    break the HTTP request that wrote the message, so failures are logged
+    and dropped; clients still see the message on their next load.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(group, event)
+    except Exception:
+        logger.warning("Could not publish %s to %s", event.get('type'), group, exc_info=True)
+
+
+def _message_event(message):
+    payload = serialize_message(message, message.sender)
+    # is_own depends on the receiving socket; consumers fill it in.
+    payload.pop('is_own')
+    return {'type': 'chat.message', 'message': payload}
+
+
+def broadcast_message(message):
+    _group_send(conversation_group(message.conversation_id), _message_event(message))
+
+
+def broadcast_chat_message(chat_message):
+    _group_send(room_group(chat_message.room_id), _message_event(chat_message))
@@ -0,0 +1,87 @@
+"""
+Compiled NotificationTemplate rendering.
+
+A template's title and message are parsed once per process and kept,
+keyed by the template's id and updated_at, so editing a template simply
+stops its old compilation from being asked for. The cache holds the
+CACHE_SIZE most recently used templates.
+
+render_many() renders a template for many recipients in one call: one
+Context, one translation.override() and a push of {{ recipient }} per
+recipient. A template that never mentions recipient reads the same for
+everyone, so it is rendered once and the result reused. Compiled Django
+templates keep no per-render state, so threads may share them.
+
+Autoescaping is off: the results are stored and sent as plain text (email
+subjects, SMS, push), and pages escape them when they display them.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.template import Context, Template
+from django.utils import translation
+
+CACHE_SIZE = getattr(settings, 'NOTIFICATION_TEMPLATE_CACHE_SIZE', 256)
+TITLE_LENGTH = 200
+
+Compiled = namedtuple('Compiled', 'title message personal')
+
+_compiled = OrderedDict()
+_lock = threading.Lock()
+
+
+def compile_template(template):
+    """
+    The compiled title and message of a NotificationTemplate, and whether
+    they depend on the recipient.
+    """
+    key = (template.pk, template.updated_at)
+    with _lock:
+        compiled = _compiled.get(key)
+        if compiled is not None:
+            _compiled.move_to_end(key)
+            return compiled
+    # Parsed outside the lock; two threads may both parse a new template,
+    # and either result is fine to keep.
+    compiled = Compiled(
+        Template(template.title_template),
+        Template(template.message_template),
+        'recipient' in template.title_template or 'recipient' in template.message_template,
+    )
+    if template.pk is not None:
+        with _lock:
+            _compiled[key] = compiled
+            while len(_compiled) > CACHE_SIZE:
+                _compiled.popitem(last=False)
+    return compiled
+
+
+def render_many(template, recipients, context=None, language=None):
+    """
+    [(title, message)] of a template for each recipient, a dict the
+    template sees as {{ recipient }}, in the given language.
+    """
+    compiled = compile_template(template)
+    recipients = list(recipients)
+    if not recipients:
+        return []
+    results = []
+    with translation.override(language or settings.LANGUAGE_CODE):
+        shared = Context(context or {}, autoescape=False)
+        for recipient in recipients if compiled.personal else recipients[:1]:
+            with shared.push(recipient=recipient):
+                results.append((
+                    compiled.title.render(shared).strip()[:TITLE_LENGTH],
+                    compiled.message.render(shared).strip(),
+                ))
+    if not compiled.personal:
+        results *= len(recipients)
+    return results
+
+
+def render(template, context=None, language=None, recipient=None):
+    """
+    The (title, message) of a template for one recipient.
+    """
+    return render_many(template, [recipient or {}], context, language)[0]
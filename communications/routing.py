@@ -0,0 +1,8 @@
+from django.urls import path
+
+from . import consumers
+
+websocket_urlpatterns = [
+    path('ws/chat/<int:conversation_id>/', consumers.ConversationConsumer.as_asgi(), name='chat_socket'),
+    path('ws/group/<int:room_id>/', consumers.ChatRoomConsumer.as_asgi(), name='group_chat_socket'),
+]
@@ -0,0 +1,50 @@
+from django.db import transaction
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+
+from users.models import CustomUser
+
+from .models import ChatMessage, Message, Notification
+from . import directory, realtime, streams, unread
+
+DIRECTORY_FIELDS = ('user_type',) + directory.NAME_FIELDS
+
+
+@receiver(post_save, sender=Message)
+def count_new_message(sender, instance, created, **kwargs):
+    if created:
+        unread.record_message(instance)
+        transaction.on_commit(lambda: realtime.broadcast_message(instance))
+
+
+@receiver(post_save, sender=ChatMessage)
+def count_new_chat_message(sender, instance, created, **kwargs):
+    if created:
+        unread.record_chat_message(instance)
+        transaction.on_commit(lambda: realtime.broadcast_chat_message(instance))
+
+
+@receiver(post_save, sender=Notification)
+def stream_new_notification(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(streams.hub.wake)
+
+
+@receiver(post_init, sender=CustomUser)
+def remember_directory_fields(sender, instance, **kwargs):
+    # None (reindex on save) for new users and users loaded with .only().
+    fields = instance.__dict__
+    instance._loaded_directory = (
+        tuple(fields[name] for name in DIRECTORY_FIELDS)
+        if instance.pk is not None and all(name in fields for name in DIRECTORY_FIELDS) else None
+    )
+
+
+@receiver(post_save, sender=CustomUser)
+def reindex_contact(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    current = tuple(getattr(instance, name) for name in DIRECTORY_FIELDS)
+    if current != instance._loaded_directory:
+        directory.update_user(instance)
+    instance._loaded_directory = current
@@ -0,0 +1,168 @@
+"""
+Server-Sent Events stream of a user's new notifications.
+
+Every stream of a process subscribes to one NotificationHub instead of
+querying for itself. The hub runs a single asyncio task, while anyone is
+subscribed, that reads the notifications past its high-water id every
+POLL_SECONDS (or sooner when woken by a local post_save) and hands each
+row to the queues of its user's streams. That one query also catches the
+rows the send_notifications worker bulk_creates in another process.
+
+A stream's event ids are notification ids. On reconnect EventSource sends
+the last one as Last-Event-ID (or pass ?last_id=), and the stream first
+replays up to BACKLOG_LIMIT notifications after it. A stream whose queue
+overflows catches up the same way. Comment lines every HEARTBEAT_SECONDS
+keep proxies from closing idle streams. Streams end after
+MAX_STREAM_SECONDS, because Django 4.2 does not tell a streaming response
+that its client went away; EventSource reconnects and resumes.
+
+Served from the ASGI application, a stream holds no thread or database
+connection while idle, so one worker process can hold thousands.
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Max
+
+from .models import Notification
+
+POLL_SECONDS = getattr(settings, 'NOTIFICATION_STREAM_POLL_SECONDS', 1.0)
+POLL_LIMIT = 5000
+HEARTBEAT_SECONDS = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT_SECONDS', 15)
+MAX_STREAM_SECONDS = getattr(settings, 'NOTIFICATION_STREAM_MAX_SECONDS', 600)
+BACKLOG_LIMIT = 100
+QUEUE_SIZE = 100
+RETRY_MS = 3000
+
+FIELDS = (
+    'id', 'user_id', 'notification_id', 'notification_type', 'title', 'message', 'priority',
+    'action_url', 'action_text', 'is_read', 'created_at',
+)
+
+# Put on a stream's queue when it overflowed: reread from the database.
+RESYNC = object()
+
+
+def _fetch_new(high_water):
+    return list(Notification.objects.filter(pk__gt=high_water).order_by('pk').values(*FIELDS)[:POLL_LIMIT])
+
+
+def _fetch_backlog(user_id, last_id):
+    return list(
+        Notification.objects.filter(user_id=user_id, pk__gt=last_id).order_by('pk').values(*FIELDS)[:BACKLOG_LIMIT]
+    )
+
+
+def _latest_id():
+    return Notification.objects.aggregate(latest=Max('pk'))['latest'] or 0
+
+
+class NotificationHub:
+    """
+    The per-process fan-out from one poller to the subscribed streams.
+    """
+    def __init__(self):
+        self._subscribers = {}
+        self._loop = None
+        self._task = None
+        self._wake = None
+        self.high_water = None
+        self.polls = 0
+
+    @property
+    def streams(self):
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    async def subscribe(self, user_id):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._task, self._wake = loop, None, asyncio.Event()
+        if self.high_water is None:
+            self.high_water = await sync_to_async(_latest_id)()
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._poll())
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    def wake(self):
+        """
+        Poll now rather than at the next interval; callable from any thread.
+        """
+        loop, wake = self._loop, self._wake
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    async def _poll(self):
+        while self._subscribers:
+            self._wake.clear()
+            rows = await sync_to_async(_fetch_new)(self.high_water)
+            self.polls += 1
+            for row in rows:
+                self.high_water = row['id']
+                for queue in self._subscribers.get(row['user_id'], ()):
+                    try:
+                        queue.put_nowait(row)
+                    except asyncio.QueueFull:
+                        # A slow client: make it reread from the database.
+                        while not queue.empty():
+                            queue.get_nowait()
+                        queue.put_nowait(RESYNC)
+            if len(rows) < POLL_LIMIT:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+        # Start from the latest row again once someone subscribes.
+        self.high_water = None
+
+
+hub = NotificationHub()
+
+
+def format_event(row):
+    payload = dict(row, created_at=row['created_at'].isoformat())
+    payload.pop('user_id')
+    return f"id: {row['id']}\nevent: notification\ndata: {json.dumps(payload)}\n\n"
+
+
+async def event_stream(user_id, last_id=None):
+    """
+    The text/event-stream body for a user, resuming after last_id if given.
+    """
+    queue = await hub.subscribe(user_id)
+    deadline = time.monotonic() + MAX_STREAM_SECONDS
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        if last_id is None:
+            last_id = hub.high_water
+            pending = []
+        else:
+            pending = await sync_to_async(_fetch_backlog)(user_id, last_id)
+        while True:
+            for row in pending:
+                if row['id'] > last_id:
+                    yield format_event(row)
+                    last_id = row['id']
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                item = await asyncio.wait_for(queue.get(), min(HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                pending = []
+                continue
+            pending = await sync_to_async(_fetch_backlog)(user_id, last_id) if item is RESYNC else [item]
+    finally:
+        hub.unsubscribe(user_id, queue)
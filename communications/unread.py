@@ -0,0 +1,88 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ChatMessage, ChatRoomMember, Conversation, Message
+
+# Stand-in for a NULL last_read_at: every message is newer than this.
+NEVER_READ = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def count_subquery(queryset, group_field):
+    """
+    Wrap a filtered queryset as a scalar COUNT subquery grouped on group_field.
+    """
+    counted = queryset.order_by().values(group_field).annotate(total=Count('id')).values('total')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def record_message(message):
+    """
+    Bump the recipient's counter on the message's conversation. A single
+    UPDATE, so concurrent senders never lose an increment.
+    """
+    Conversation.objects.filter(pk=message.conversation_id).update(
+        participant1_unread=Case(
+            When(participant1_id=message.sender_id, then=F('participant1_unread')),
+            default=F('participant1_unread') + 1,
+        ),
+        participant2_unread=Case(
+            When(participant2_id=message.sender_id, then=F('participant2_unread')),
+            default=F('participant2_unread') + 1,
+        ),
+        last_message_at=message.created_at,
+    )
+
+
+def record_chat_message(chat_message):
+    """
+    Bump the counter of every active room member except the sender.
+    """
+    ChatRoomMember.objects.filter(room_id=chat_message.room_id, is_active=True).exclude(
+        user_id=chat_message.sender_id
+    ).update(unread_count=F('unread_count') + 1)
+
+
+def mark_conversation_read(conversation, user):
+    """
+    Mark everything user received in conversation as read and zero their counter.
+    """
+    now = timezone.now()
+    conversation.messages.filter(is_read=False).exclude(sender=user).update(is_read=True, read_at=now)
+    if conversation.participant1_id == user.id:
+        Conversation.objects.filter(pk=conversation.pk).update(participant1_unread=0)
+        conversation.participant1_unread = 0
+    if conversation.participant2_id == user.id:
+        Conversation.objects.filter(pk=conversation.pk).update(participant2_unread=0)
+        conversation.participant2_unread = 0
+
+
+def mark_room_read(member):
+    """
+    Move member.last_read_at to now and zero their counter.
+    """
+    member.last_read_at = timezone.now()
+    member.unread_count = 0
+    member.save(update_fields=['last_read_at', 'unread_count'])
+
+
+def rebuild_counters():
+    """
+    Recompute every counter from the message tables. Returns the number of
+    conversations and memberships updated.
+    """
+    unread_messages = Message.objects.filter(conversation=OuterRef('pk'), is_read=False)
+    conversations = Conversation.objects.update(
+        participant1_unread=count_subquery(unread_messages.exclude(sender=OuterRef('participant1')), 'conversation'),
+        participant2_unread=count_subquery(unread_messages.exclude(sender=OuterRef('participant2')), 'conversation'),
+    )
+    unread_chat_messages = ChatMessage.objects.filter(
+        room=OuterRef('room_id'),
+        created_at__gt=Coalesce(OuterRef('last_read_at'), Value(NEVER_READ)),
+        is_edited=False,
+        is_deleted=False,
+    ).exclude(sender=OuterRef('user_id'))
+    memberships = ChatRoomMember.objects.update(unread_count=count_subquery(unread_chat_messages, 'room'))
+    return conversations, memberships
@@ -3,13 +3,15 @@ from django.http import HttpResponse
 from users.models import CustomUser
 from communications.models import Conversation, Message
 from django.contrib.auth.decorators import login_required
-from django.db import models
 from django.contrib import messages
 from django.urls import reverse
 from .forms import GroupChatCreateForm
+from .history import message_window
+from .inbox import build_inbox
 from .models import ChatRoom, ChatRoomMember, ChatMessage, GroupJoinRequest
+from .unread import mark_conversation_read, mark_room_read
 from django.utils import timezone
-from users import role_required
+from users import authorization, role_required
 
 # Create your views here.
 
@@ -20,20 +22,25 @@ def conversation_list(request):
 @role_required(['user'])
 def chat_room(request, conversation_id):
     conversation = get_object_or_404(Conversation, id=conversation_id)
-    messages = conversation.messages.order_by('created_at')
+    mark_conversation_read(conversation, request.user)
     if request.method == 'POST':
         content = request.POST.get('content')
         if content:
             Message.objects.create(conversation=conversation, sender=request.user, content=content)
             return redirect('communications:chat_room', conversation_id=conversation.id)
+    window = message_window(conversation.messages.all())
     return render(request, 'communications/chat_room.html', {
         'conversation': conversation,
-        'messages': messages,
+        'messages': window.messages,
+        'older_cursor': window.older_cursor,
     })
 
 @role_required(['user'])
 def start_chat(request, user_id):
     target_user = get_object_or_404(CustomUser, id=user_id)
+    if not authorization.for_user(request.user).can_contact(target_user.id):
+        messages.error(request, 'You cannot start a chat with this user.')
+        return redirect('communications:inbox')
     # Ensure consistent ordering for unique_together
     user1, user2 = (request.user, target_user) if request.user.id < target_user.id else (target_user, request.user)
     # Determine conversation_type
@@ -52,26 +59,10 @@ def start_chat(request, user_id):
 
 @role_required(['user'])
 def conversation_inbox(request):
-    # 1-to-1 conversations
-    conversations = Conversation.objects.filter(
-        models.Q(participant1=request.user) | models.Q(participant2=request.user)
-    ).order_by('-last_message_at', '-created_at')
-    for conv in conversations:
-        conv.unread_count = conv.messages.filter(is_read=False).exclude(sender=request.user).count()
-    # Group chats
-    group_memberships = ChatRoomMember.objects.filter(user=request.user, is_active=True).select_related('room')
-    group_chats = []
-    for membership in group_memberships:
-        room = membership.room
-        room.last_message = room.messages.order_by('-created_at').first()
-        if membership.last_read_at:
-            room.unread_count = room.messages.filter(created_at__gt=membership.last_read_at, is_edited=False, is_deleted=False).exclude(sender=request.user).count()
-        else:
-            room.unread_count = room.messages.filter(is_edited=False, is_deleted=False).exclude(sender=request.user).count()
-        group_chats.append(room)
+    inbox = build_inbox(request.user)
     return render(request, 'communications/inbox.html', {
-        'conversations': conversations,
-        'group_chats': group_chats,
+        'conversations': inbox['conversations'],
+        'group_chats': inbox['group_chats'],
         'user': request.user,
     })
 
@@ -106,17 +97,17 @@ def group_chat_room(request, room_id):
         messages.error(request, 'You are not a member of this group.')
         return redirect('communications:inbox')
     # Update last_read_at to now
-    member.last_read_at = timezone.now()
-    member.save(update_fields=["last_read_at"])
-    messages_qs = room.messages.order_by('created_at')
+    mark_room_read(member)
     if request.method == 'POST':
         content = request.POST.get('content')
         if content:
             ChatMessage.objects.create(room=room, sender=request.user, content=content)
             return redirect('communications:group_chat_room', room_id=room.id)
+    window = message_window(room.messages.all())
     return render(request, 'communications/group_chat_room.html', {
         'room': room,
-        'messages': messages_qs,
+        'messages': window.messages,
+        'older_cursor': window.older_cursor,
         'member_role': member.role,
     })
 
@@ -0,0 +1,468 @@
+"""
+Two-level cache: a per-process LRU in front of a shared tier.
+
+Each worker process keeps its most used entries in memory (TwoLevelCache)
+and reads everything else from a shared cache every worker sees: Redis
+when REDIS_URL is set, otherwise SQLiteCache, a single SQLite file that
+needs no server. Writes go to both tiers.
+
+A local copy is trusted for at most LOCAL_TIMEOUT seconds, so a value
+rewritten by another worker can be read stale for that long. Values that
+must change everywhere at once sit under a version key instead: the
+cached entry's key embeds a version number, and invalidating bumps the
+number with bump_version(). Counters (int values, which is what version
+keys and incr() hold) and keys under SHARED_ONLY_PREFIXES are never kept
+locally, so every worker sees a bump on its next read and the stale
+entries simply stop being asked for.
+
+get_or_compute() adds stampede protection on top: one caller recomputes
+an expired value while the others wait for it, or keep serving the
+previous value for a grace period. Both tiers count hits and misses;
+stats() returns the counts of this process.
+"""
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache as default_cache, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .routers import primary
+
+_MISSING = object()
+
+
+class CacheStats:
+    """
+    Thread-safe event counters of one cache in one process.
+    """
+    FIELDS = ('local_hits', 'shared_hits', 'misses', 'sets', 'deletes', 'computes', 'stale_served', 'lock_waits')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, field, count=1):
+        with self._lock:
+            self._counts[field] += count
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts['local_hits'] + counts['shared_hits'] + counts['misses']
+        counts['hit_ratio'] = round((counts['local_hits'] + counts['shared_hits']) / lookups, 4) if lookups else None
+        return counts
+
+
+# Shared tier without a server
+
+class SQLiteCache(BaseCache):
+    """
+    Cache in one SQLite file (LOCATION) that every process on the host
+    shares. WAL mode lets readers run alongside a writer; incr() is atomic
+    across processes.
+    """
+    CULL_CHECK_EVERY = 200
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = str(location)
+        self._local = threading.local()
+        self._sets = 0
+
+    def _connection(self):
+        # One connection per thread and per process (never reused after fork).
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entries '
+                '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL) WITHOUT ROWID'
+            )
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def _live(self, row):
+        return row is not None and (row[1] is None or row[1] > time.time())
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version)
+        row = self._connection().execute('SELECT value, expires FROM cache_entries WHERE key = ?', (key,)).fetchone()
+        return pickle.loads(row[0]) if self._live(row) else default
+
+    def get_many(self, keys, version=None):
+        names = {self.make_and_validate_key(key, version): key for key in keys}
+        if not names:
+            return {}
+        rows = self._connection().execute(
+            f"SELECT key, value, expires FROM cache_entries WHERE key IN ({', '.join('?' * len(names))})",
+            list(names),
+        ).fetchall()
+        now = time.time()
+        return {
+            names[name]: pickle.loads(value)
+            for name, value, expires in rows
+            if expires is None or expires > now
+        }
+
+    def _write(self, sql, key, value, timeout):
+        expires = self.get_backend_timeout(timeout)
+        cursor = self._connection().execute(sql, (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires))
+        self._sets += 1
+        if self._sets % self.CULL_CHECK_EVERY == 0:
+            self._cull()
+        return cursor
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version)
+        self._write('INSERT OR REPLACE INTO cache_entries (key, value, expires) VALUES (?, ?, ?)', key, value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for key, value in data.items():
+                self.set(key, value, timeout, version)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            # An expired entry does not block add().
+            connection.execute('DELETE FROM cache_entries WHERE key = ? AND expires <= ?', (key, time.time()))
+            cursor = self._write(
+                'INSERT OR IGNORE INTO cache_entries (key, value, expires) VALUES (?, ?, ?)', key, value, timeout
+            )
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return cursor.rowcount == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version)
+        cursor = self._connection().execute(
+            'UPDATE cache_entries SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT value, expires FROM cache_entries WHERE key = ?', (key,)).fetchone()
+            if not self._live(row):
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache_entries SET value = ? WHERE key = ?', (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key)
+            )
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return value
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version)
+        return self._connection().execute('DELETE FROM cache_entries WHERE key = ?', (key,)).rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.delete(key, version)
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version)
+        row = self._connection().execute('SELECT value, expires FROM cache_entries WHERE key = ?', (key,)).fetchone()
+        return self._live(row)
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache_entries')
+
+    def _cull(self):
+        connection = self._connection()
+        connection.execute('DELETE FROM cache_entries WHERE expires <= ?', (time.time(),))
+        count = connection.execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+        if count > self._max_entries:
+            # Drop 1/CULL_FREQUENCY of the entries, soonest to expire first.
+            connection.execute(
+                'DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_entries '
+                'ORDER BY expires IS NULL, expires LIMIT ?)',
+                (max(1, count // self._cull_frequency) if self._cull_frequency else count,),
+            )
+
+    def close(self, **kwargs):
+        pass  # connections live as long as their thread
+
+
+# Two tiers
+
+class TwoLevelCache(BaseCache):
+    """
+    Cache backend keeping a per-process LRU in front of the shared cache
+    named by LOCATION (another CACHES alias). OPTIONS:
+
+    LOCAL_MAX_ENTRIES     entries kept in the process (default 1000)
+    LOCAL_TIMEOUT         seconds a local copy is trusted (default 5)
+    SHARED_ONLY_PREFIXES  keys starting with these are never kept locally
+    """
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = location
+        self.local_max_entries = options.get('LOCAL_MAX_ENTRIES', 1000)
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.shared_only_prefixes = tuple(options.get('SHARED_ONLY_PREFIXES', ()))
+        self._entries = OrderedDict()  # local key -> (value, expires on the monotonic clock)
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _local_key(self, key, version):
+        return self.make_and_validate_key(key, version)
+
+    def _keep_locally(self, key, value):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return False  # counters: version keys, rate limits
+        return not (self.shared_only_prefixes and str(key).startswith(self.shared_only_prefixes))
+
+    def _remember(self, key, value, version, timeout=DEFAULT_TIMEOUT):
+        local_key = self._local_key(key, version)
+        if not self._keep_locally(key, value):
+            self._forget(local_key)
+            return
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        ttl = self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+        if ttl <= 0:
+            self._forget(local_key)
+            return
+        with self._lock:
+            self._entries[local_key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(local_key)
+            while len(self._entries) > self.local_max_entries:
+                self._entries.popitem(last=False)
+
+    def _recall(self, local_key):
+        with self._lock:
+            entry = self._entries.get(local_key)
+            if entry is None:
+                return _MISSING
+            if entry[1] <= time.monotonic():
+                del self._entries[local_key]
+                return _MISSING
+            self._entries.move_to_end(local_key)
+            return entry[0]
+
+    def _forget(self, local_key):
+        with self._lock:
+            self._entries.pop(local_key, None)
+
+    def clear_local(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, key, default=None, version=None):
+        value = self._recall(self._local_key(key, version))
+        if value is not _MISSING:
+            self.stats.add('local_hits')
+            return value
+        value = self.shared.get(key, _MISSING, version)
+        if value is _MISSING:
+            self.stats.add('misses')
+            return default
+        self.stats.add('shared_hits')
+        self._remember(key, value, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, remaining = {}, []
+        for key in keys:
+            value = self._recall(self._local_key(key, version))
+            if value is _MISSING:
+                remaining.append(key)
+            else:
+                found[key] = value
+        self.stats.add('local_hits', len(found))
+        if remaining:
+            shared = self.shared.get_many(remaining, version)
+            self.stats.add('shared_hits', len(shared))
+            self.stats.add('misses', len(remaining) - len(shared))
+            for key, value in shared.items():
+                self._remember(key, value, version)
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version)
+        self.stats.add('sets')
+        self._remember(key, value, version, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version)
+        self.stats.add('sets', len(data))
+        for key, value in data.items():
+            if key not in failed:
+                self._remember(key, value, version, timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version)
+        if added:
+            self.stats.add('sets')
+            self._remember(key, value, version, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        self._forget(self._local_key(key, version))
+        return self.shared.incr(key, delta, version)
+
+    def decr(self, key, delta=1, version=None):
+        self._forget(self._local_key(key, version))
+        return self.shared.decr(key, delta, version)
+
+    def delete(self, key, version=None):
+        self._forget(self._local_key(key, version))
+        self.stats.add('deletes')
+        return self.shared.delete(key, version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        for key in keys:
+            self._forget(self._local_key(key, version))
+        self.stats.add('deletes', len(keys))
+        self.shared.delete_many(keys, version)
+
+    def has_key(self, key, version=None):
+        return self._recall(self._local_key(key, version)) is not _MISSING or self.shared.has_key(key, version)
+
+    def clear(self):
+        self.clear_local()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+
+# Helpers
+
+def bump_version(key, cache=None):
+    """
+    Advance the version number stored at key, invalidating every entry
+    whose key embeds the old number, in every process.
+    """
+    cache = cache or default_cache
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+        return 1
+
+
+# A fixed pool of locks shared out by key hash: a lock per key would grow
+# without bound, as keys embed versions and filter digests. Keys sharing a
+# stripe may nest (a compute() calling get_or_compute()), so the locks are
+# reentrant and waited on for lock_timeout at most, like the shared lock.
+COMPUTE_LOCK_STRIPES = 64
+_compute_locks = [threading.RLock() for _ in range(COMPUTE_LOCK_STRIPES)]
+
+
+def _process_lock(key):
+    return _compute_locks[hash(key) % COMPUTE_LOCK_STRIPES]
+
+
+def _stats_of(cache):
+    return getattr(cache, 'stats', None) or CacheStats()
+
+
+def get_or_compute(key, compute, timeout=300, grace=60, lock_timeout=10, cache=None):
+    """
+    The cached value at key, or compute() stored there for timeout seconds,
+    with at most one recomputation in flight across all processes:
+
+    * within grace seconds after expiry, the first caller recomputes while
+      the rest keep getting the previous value;
+    * with nothing cached, the first caller computes while the rest wait
+      for its result, up to lock_timeout seconds.
+
+    compute() reads from the primary database, never a lagging replica.
+    """
+    cache = cache or default_cache
+    stats = _stats_of(cache)
+    lock_key = f'{key}:computing'
+    entry = cache.get(key)
+    now = time.time()
+    if entry is not None:
+        value, fresh_until = entry
+        if now < fresh_until:
+            return value
+        if not cache.add(lock_key, 1, lock_timeout):
+            stats.add('stale_served')
+            return value
+        return _store(cache, key, lock_key, compute, timeout, grace, stats)
+
+    # Threads of this process queue on a local lock, processes on the shared one.
+    process_lock = _process_lock(key)
+    locked = process_lock.acquire(timeout=lock_timeout)
+    try:
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        deadline = time.monotonic() + lock_timeout
+        while not cache.add(lock_key, 1, lock_timeout):
+            stats.add('lock_waits')
+            if time.monotonic() >= deadline:
+                break  # the computing process died or is too slow: compute here
+            time.sleep(0.02 + random.random() * 0.03)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+        return _store(cache, key, lock_key, compute, timeout, grace, stats)
+    finally:
+        if locked:
+            process_lock.release()
+
+
+def _store(cache, key, lock_key, compute, timeout, grace, stats):
+    try:
+        with primary():
+            value = compute()
+        stats.add('computes')
+        cache.set(key, (value, time.time() + timeout), timeout + grace)
+        return value
+    finally:
+        cache.delete(lock_key)
+
+
+def stats(alias='default'):
+    """
+    Hit/miss counts of a TwoLevelCache in this process.
+    """
+    return _stats_of(caches[alias]).snapshot()
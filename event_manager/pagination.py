@@ -0,0 +1,457 @@
+"""
+Keyset ("cursor") pagination shared by the HTML views and the API.
+
+Page numbers make the database count every matching row and then skip
+OFFSET rows to reach a page, so deep pages get slower the deeper they
+are. A keyset page instead starts right after the last row of the
+previous one: the cursor holds that row's values for the ordering
+columns, and the next page is one range read of page_size + 1 rows
+from there, which an index on those columns answers in the same time
+for page 10,000 as for page 1.
+
+Any plain-field ordering works, including the models' default
+Meta.ordering (e.g. -created_at on Event, -is_featured, -average_rating,
+-created_at on Venue and Vendor); the primary key is appended as a tie
+breaker so every row has a unique position. Counting is optional:
+'exact' runs COUNT(*), 'approximate' counts at most
+APPROXIMATE_COUNT_LIMIT rows and reports whether it stopped short.
+
+paginate() serves the HTML views; KeysetPagination is the REST framework
+pagination class (DEFAULT_PAGINATION_CLASS).
+"""
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from datetime import date, datetime, time
+from decimal import Decimal, InvalidOperation
+from uuid import UUID
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import BooleanField, F, Func, Q, QuerySet, Value
+from django.db.models.query import ValuesIterable
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+APPROXIMATE_COUNT_LIMIT = 10000
+COUNT_MODES = (None, 'exact', 'approximate')
+
+NEXT, PREVIOUS = 'n', 'p'
+BIGINT_RANGE = (-2 ** 63, 2 ** 63 - 1)
+
+
+# Cursors
+
+_TAGGED_TYPES = [
+    ('dt', datetime, datetime.fromisoformat),
+    ('d', date, date.fromisoformat),
+    ('t', time, time.fromisoformat),
+    ('dec', Decimal, Decimal),
+    ('uuid', UUID, UUID),
+]
+
+
+def _dump(value):
+    # datetime is checked before its date base class.
+    for tag, kind, _ in _TAGGED_TYPES:
+        if isinstance(value, kind):
+            return [tag, value.isoformat() if hasattr(value, 'isoformat') else str(value)]
+    return value
+
+
+def _load(value):
+    if isinstance(value, list):
+        tag, raw = value
+        for known, _, parse in _TAGGED_TYPES:
+            if tag == known:
+                value = parse(raw)
+                if isinstance(value, Decimal) and not value.is_finite():
+                    raise ValueError(f"Non-finite cursor value {raw!r}")
+                return value
+        raise ValueError(f"Unknown cursor value type {tag!r}")
+    return value
+
+
+def encode_cursor(direction, values=None, offset=None):
+    """
+    Opaque cursor for the page after (or before) the row with these
+    ordering values, or at offset into a plain sequence.
+    """
+    payload = {'d': direction}
+    if offset is not None:
+        payload['o'] = offset
+    else:
+        payload['v'] = [_dump(value) for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    (direction, values, offset) of a cursor; values or offset is None.
+    Raises ValueError on a malformed cursor.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        direction = payload['d']
+        if direction not in (NEXT, PREVIOUS):
+            raise ValueError(direction)
+        if 'o' in payload:
+            return direction, None, max(0, int(payload['o']))
+        return direction, [_load(value) for value in payload['v']], None
+    except (TypeError, KeyError, ValueError, InvalidOperation, UnicodeDecodeError, binascii.Error) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+
+
+# Ordering
+
+def keyset_ordering(queryset):
+    """
+    [(name, descending, nullable), ...] the queryset is ordered by (its
+    order_by() or the model's Meta.ordering) plus the primary key.
+    """
+    opts = queryset.model._meta
+    names = list(queryset.query.order_by) or list(opts.ordering)
+    ordering = []
+    for name in names:
+        if not isinstance(name, str) or name == '?':
+            raise ValueError(f"Keyset pagination needs plain field orderings, not {name!r}.")
+        descending = name.startswith('-')
+        name = name.lstrip('-+')
+        if name == 'pk':
+            name = opts.pk.name
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            if '__' not in name:
+                raise ValueError(f"Cannot order {opts.label} by {name!r}.")
+            nullable = True  # across a relation: assume the worst
+        else:
+            if field.is_relation:
+                name = field.attname
+            nullable = field.null
+        ordering.append((name, descending, nullable))
+    if not any(name in (opts.pk.name, opts.pk.attname) for name, _, _ in ordering):
+        ordering.append((opts.pk.attname, ordering[-1][1] if ordering else False, False))
+    return ordering
+
+
+def _ordering_field(model, name):
+    # The concrete field behind an ordering name, following relations;
+    # None for anything else (e.g. an annotation).
+    try:
+        *path, last = name.split('__')
+        for part in path:
+            model = model._meta.get_field(part).related_model
+        field = model._meta.get_field(last)
+    except (AttributeError, FieldDoesNotExist):
+        return None
+    return field.target_field if field.is_relation else field
+
+
+def _cursor_values(queryset, ordering, values):
+    """
+    A cursor's values converted to the types of the ordering fields.
+    Raises ValueError on a value the field cannot hold.
+    """
+    connection = connections[queryset.db]
+    cleaned = []
+    for (name, _, _), value in zip(ordering, values):
+        field = _ordering_field(queryset.model, name)
+        if field is not None and value is not None:
+            try:
+                value = field.to_python(value)
+            except (ValidationError, TypeError) as exc:
+                raise ValueError(f"Invalid cursor value for {name}: {value!r}") from exc
+            internal_type = field.get_internal_type()
+            if internal_type in connection.ops.integer_field_ranges:
+                low, high = connection.ops.integer_field_range(internal_type)
+                # SQLite reports no limits but binds at most 64-bit integers.
+                low = BIGINT_RANGE[0] if low is None else low
+                high = BIGINT_RANGE[1] if high is None else high
+                if not low <= value <= high:
+                    raise ValueError(f"Cursor value for {name} out of range: {value!r}")
+        cleaned.append(value)
+    return cleaned
+
+
+def _row_values(row, ordering):
+    values = []
+    for name, _, _ in ordering:
+        if isinstance(row, dict):
+            values.append(row[name])
+            continue
+        value = row
+        for part in name.split('__'):
+            value = getattr(value, part) if value is not None else None
+        values.append(value)
+    return values
+
+
+def _later(name, descending, nullable, value, nulls_largest):
+    """
+    Q alternatives for "name comes after value" in this ordering.
+    """
+    larger = not descending
+    alternatives = []
+    if value is None:
+        # Only non-NULL values can sit past a NULL, and only on the side
+        # where NULLs sort smallest.
+        if larger != nulls_largest:
+            alternatives.append(Q(**{f'{name}__isnull': False}))
+        return alternatives
+    alternatives.append(Q(**{f'{name}__{"gt" if larger else "lt"}': value}))
+    if nullable and larger == nulls_largest:
+        alternatives.append(Q(**{f'{name}__isnull': True}))
+    return alternatives
+
+
+def _after_q(ordering, values, nulls_largest):
+    # One OR term per position: equal on the leading columns, past the
+    # value on the next. A plain range on the first column in front lets
+    # the database seek straight to the cursor in an index on the ordering.
+    terms = []
+    equal = []
+    for (name, descending, nullable), value in zip(ordering, values):
+        for alternative in _later(name, descending, nullable, value, nulls_largest):
+            terms.append(Q(*equal, alternative))
+        equal.append(Q(**{f'{name}__isnull': True}) if value is None else Q(**{name: value}))
+    if not terms:
+        return Q(pk__in=[])
+    after = Q(*terms, _connector=Q.OR)
+    (name, descending, nullable), value = ordering[0], values[0]
+    if value is not None and not (nullable and descending != nulls_largest):
+        after = Q(**{f'{name}__{"lte" if descending else "gte"}': value}) & after
+    return after
+
+
+def cursor_after(row, queryset):
+    """
+    Cursor of the page that follows row in queryset's ordering.
+    """
+    return encode_cursor(NEXT, _row_values(row, keyset_ordering(queryset)))
+
+
+class _RowAfter(Func):
+    """
+    (a, b, ...) > (x, y, ...) (or <): a row-value comparison the database
+    answers with one seek in an index on (a, b, ...).
+    """
+    output_field = BooleanField()
+
+    def __init__(self, columns, values, descending):
+        super().__init__(*columns, *values)
+        self.width = len(columns)
+        self.operator = '<' if descending else '>'
+
+    def as_sql(self, compiler, connection, **extra_context):
+        parts, params = [], []
+        for expression in self.get_source_expressions():
+            sql, expression_params = compiler.compile(expression)
+            parts.append(sql)
+            params.extend(expression_params)
+        columns, values = parts[:self.width], parts[self.width:]
+        return f"({', '.join(columns)}) {self.operator} ({', '.join(values)})", params
+
+
+def _row_after(queryset, ordering, values):
+    # Usable when every column runs the same way and none holds NULLs,
+    # which SQLite, MySQL and PostgreSQL compare as rows.
+    directions = {descending for _, descending, _ in ordering}
+    if (
+        len(directions) != 1 or any(nullable for _, _, nullable in ordering)
+        or connections[queryset.db].vendor not in ('sqlite', 'mysql', 'postgresql')
+    ):
+        return None
+    opts = queryset.model._meta
+    columns, params = [], []
+    for (name, _, _), value in zip(ordering, values):
+        columns.append(F(name))
+        field = opts.get_field(name) if '__' not in name else None
+        params.append(Value(value, output_field=field) if field else Value(value))
+    return _RowAfter(columns, params, directions.pop())
+
+
+# Pages
+
+class KeysetPage:
+    """
+    One page of rows with the cursors of its neighbours. Iterates like a
+    list; count is None unless a count mode was asked for.
+    """
+    def __init__(self, object_list, page_size, next_cursor=None, previous_cursor=None,
+                 count=None, count_is_exact=True):
+        self.object_list = object_list
+        self.page_size = page_size
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+        self.count_is_exact = count_is_exact
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def _count(object_list, mode):
+    if mode is None:
+        return None, True
+    if mode not in COUNT_MODES:
+        raise ValueError(f"Unknown count mode {mode!r}.")
+    if mode == 'exact' or not isinstance(object_list, QuerySet):
+        return (object_list.count() if isinstance(object_list, QuerySet) else len(object_list)), True
+    counted = object_list.order_by()[:APPROXIMATE_COUNT_LIMIT + 1].count()
+    return min(counted, APPROXIMATE_COUNT_LIMIT), counted <= APPROXIMATE_COUNT_LIMIT
+
+
+def _offset_page(sequence, direction, offset, page_size):
+    # Sequences already in memory (e.g. ranked search results) page by offset.
+    if direction == PREVIOUS:
+        offset = max(0, offset - page_size)
+    rows = list(sequence[offset:offset + page_size + 1])
+    has_next = len(rows) > page_size
+    return (
+        rows[:page_size],
+        encode_cursor(NEXT, offset=offset + page_size) if has_next else None,
+        encode_cursor(PREVIOUS, offset=offset) if offset else None,
+    )
+
+
+def _keyset_page(queryset, direction, values, page_size):
+    ordering = keyset_ordering(queryset)
+    if queryset._iterable_class is ValuesIterable and queryset.query.values_select:
+        selected = list(queryset.query.values_select) + list(queryset.query.annotation_select)
+        missing = [name for name, _, _ in ordering if name not in selected]
+        if missing:
+            queryset = queryset.values(*selected, *missing)
+    elif queryset._fields is not None and queryset._iterable_class is not ValuesIterable:
+        raise ValueError("Keyset pagination needs model instances or values() rows.")
+
+    backwards = direction == PREVIOUS
+    order_by = [
+        f"{'-' if descending != backwards else ''}{name}" for name, descending, _ in ordering
+    ]
+    queryset = queryset.order_by(*order_by)
+    if values is not None:
+        if len(values) != len(ordering):
+            raise ValueError("Cursor does not match this ordering.")
+        values = _cursor_values(queryset, ordering, values)
+        nulls_largest = connections[queryset.db].features.nulls_order_largest
+        reversed_ordering = [(name, descending != backwards, nullable) for name, descending, nullable in ordering]
+        after = _row_after(queryset, reversed_ordering, values)
+        queryset = queryset.filter(after if after is not None else _after_q(reversed_ordering, values, nulls_largest))
+
+    rows = list(queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+    if not rows:
+        return rows, None, None
+    first, last = _row_values(rows[0], ordering), _row_values(rows[-1], ordering)
+    if backwards:
+        return rows, encode_cursor(NEXT, last), encode_cursor(PREVIOUS, first) if has_more else None
+    return (
+        rows,
+        encode_cursor(NEXT, last) if has_more else None,
+        encode_cursor(PREVIOUS, first) if values is not None else None,
+    )
+
+
+def paginate(object_list, cursor=None, page_size=DEFAULT_PAGE_SIZE, count=None):
+    """
+    The KeysetPage of object_list (a queryset, or a sequence such as
+    events.search.RankedResults) at cursor, or its first page. Raises
+    ValueError on a malformed cursor or an ordering keysets cannot follow.
+    """
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    direction, values, offset = decode_cursor(cursor) if cursor else (NEXT, None, None)
+    if isinstance(object_list, QuerySet):
+        if offset is not None:
+            raise ValueError("Cursor does not match this listing.")
+        rows, next_cursor, previous_cursor = _keyset_page(object_list, direction, values, page_size)
+    else:
+        if values is not None:
+            raise ValueError("Cursor does not match this listing.")
+        rows, next_cursor, previous_cursor = _offset_page(object_list, direction, offset or 0, page_size)
+    total, exact = _count(object_list, count)
+    return KeysetPage(rows, page_size, next_cursor, previous_cursor, total, exact)
+
+
+class KeysetPagination(BasePagination):
+    """
+    REST framework pagination over paginate(): ?cursor= and ?page_size=
+    parameters, and next/previous links in the response. Views opt into a
+    count with a pagination_count attribute ('exact' or 'approximate').
+    """
+    page_size = api_settings.PAGE_SIZE or DEFAULT_PAGE_SIZE
+    max_page_size = MAX_PAGE_SIZE
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.count_mode = getattr(view, 'pagination_count', None)
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            page_size = self.page_size
+        try:
+            self.page = paginate(
+                queryset,
+                cursor=request.query_params.get(self.cursor_query_param),
+                page_size=min(page_size, self.max_page_size),
+                count=self.count_mode,
+            )
+        except ValueError as exc:
+            raise NotFound(str(exc))
+        return list(self.page)
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self._link(self.page.next_cursor)
+
+    def get_previous_link(self):
+        return self._link(self.page.previous_cursor)
+
+    def get_paginated_response(self, data):
+        body = OrderedDict([('next', self.get_next_link()), ('previous', self.get_previous_link())])
+        if self.count_mode:
+            body['count'] = self.page.count
+            body['count_is_exact'] = self.page.count_is_exact
+        body['results'] = data
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        properties = {
+            'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+            'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+            'results': schema,
+        }
+        if self.count_mode:
+            properties['count'] = {'type': 'integer'}
+            properties['count_is_exact'] = {'type': 'boolean'}
+        return {'type': 'object', 'properties': properties}
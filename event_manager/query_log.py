@@ -0,0 +1,207 @@
+"""
+Query capture and EXPLAIN-based index checks.
+
+With QUERY_LOG_PATH set, QueryLogMiddleware appends every statement a
+request runs to that file as one JSON object per line:
+
+    {"sql": "SELECT ... WHERE email = %s", "params": ["a@b.c"], "ms": 0.4, "path": "/events/booking/"}
+
+capture_queries() writes the same format from a shell or a benchmark.
+The explain_query_log command replays such a log (lines copied from
+connection.queries, with the parameters inlined, work too) and reports
+the statements whose plans scan a table instead of searching an index.
+"""
+import json
+import re
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import NotSupportedError, connections
+
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE')
+
+_write_lock = threading.Lock()
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (datetime, date, dt_time, Decimal)):
+        return str(value)
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return str(value)
+
+
+class _Recorder:
+    """
+    connection.execute_wrapper hook collecting (sql, params, ms) entries.
+    """
+    def __init__(self, path=''):
+        self.path = path
+        self.entries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not many:
+                self.entries.append({
+                    'sql': sql,
+                    'params': _jsonable(list(params or ())),
+                    'ms': round((time.perf_counter() - start) * 1000, 3),
+                    'path': self.path,
+                })
+
+
+def write_entries(path, entries):
+    if not entries:
+        return
+    lines = ''.join(json.dumps(entry) + '\n' for entry in entries)
+    with _write_lock, open(path, 'a', encoding='utf-8') as log:
+        log.write(lines)
+
+
+@contextmanager
+def capture_queries(path, using='default', label=''):
+    """
+    Append every statement run on the connection inside the block to path.
+    """
+    recorder = _Recorder(label)
+    with connections[using].execute_wrapper(recorder):
+        yield recorder
+    write_entries(path, recorder.entries)
+
+
+class QueryLogMiddleware:
+    """
+    Log each request's SQL to settings.QUERY_LOG_PATH, one write per request.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.path = settings.QUERY_LOG_PATH
+
+    def __call__(self, request):
+        recorder = _Recorder(request.path)
+        with connections['default'].execute_wrapper(recorder):
+            response = self.get_response(request)
+        write_entries(self.path, recorder.entries)
+        return response
+
+
+# Replay
+
+def read_query_log(path):
+    """
+    Yield (sql, params, ms) for every JSON line of a query log. Lines
+    without params are taken to have their parameters inlined.
+    """
+    with open(path, encoding='utf-8') as log:
+        for line in log:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if 'sql' not in entry:
+                continue
+            ms = entry.get('ms')
+            if ms is None and entry.get('time') is not None:
+                ms = float(entry['time']) * 1000
+            yield entry['sql'], entry.get('params'), ms
+
+
+def statement_kind(sql):
+    return sql.lstrip(' (').split(None, 1)[0].upper() if sql.strip() else ''
+
+
+def _execute(cursor, sql, params):
+    if params is None:
+        # Inlined parameters: keep literal % signs literal.
+        cursor.execute(sql)
+    else:
+        cursor.execute(sql, params)
+
+
+_SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(.*)$')
+
+
+def _postgresql_nodes(node, depth=0):
+    yield node, depth
+    for child in node.get('Plans', ()):
+        yield from _postgresql_nodes(child, depth + 1)
+
+
+def explain(sql, params, using='default'):
+    """
+    (plan_lines, scans, sorts) for one statement: scans are the tables
+    read from end to end, directly or through a whole index, rather than
+    searched; sorts the temporary sorts the plan needs. Works on SQLite,
+    MySQL and PostgreSQL; raises NotSupportedError elsewhere.
+    """
+    connection = connections[using]
+    plan, scans, sorts = [], [], []
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            _execute(cursor, 'EXPLAIN QUERY PLAN ' + sql, params)
+            for row in cursor.fetchall():
+                detail = row[-1]
+                plan.append(detail)
+                match = _SQLITE_SCAN.match(detail)
+                if match and 'VIRTUAL TABLE' not in match.group(2):
+                    scans.append(match.group(1))
+                if 'TEMP B-TREE' in detail:
+                    sorts.append(detail)
+        elif connection.vendor == 'mysql':
+            _execute(cursor, 'EXPLAIN ' + sql, params)
+            columns = [column[0].lower() for column in cursor.description]
+            for values in cursor.fetchall():
+                row = dict(zip(columns, values))
+                extra = row.get('extra') or ''
+                plan.append(
+                    f"{row.get('table')}: type={row.get('type')} key={row.get('key')} rows={row.get('rows')} {extra}".strip()
+                )
+                if row.get('type') in ('ALL', 'index') and row.get('table'):
+                    scans.append(row['table'])
+                if 'filesort' in extra or 'temporary' in extra:
+                    sorts.append(f"{row.get('table')}: {extra}")
+        elif connection.vendor == 'postgresql':
+            _execute(cursor, 'EXPLAIN (FORMAT JSON) ' + sql, params)
+            document = cursor.fetchone()[0]
+            if isinstance(document, str):
+                document = json.loads(document)
+            for node, depth in _postgresql_nodes(document[0]['Plan']):
+                kind, table = node['Node Type'], node.get('Relation Name')
+                line = '  ' * depth + kind
+                if table:
+                    line += f" on {table}"
+                if node.get('Index Name'):
+                    line += f" using {node['Index Name']}"
+                plan.append(f"{line} rows={node.get('Plan Rows')}")
+                # An index scan without an Index Cond walks the whole index.
+                if kind == 'Seq Scan' or (kind in ('Index Scan', 'Index Only Scan') and 'Index Cond' not in node):
+                    scans.append(table)
+                if kind in ('Sort', 'Incremental Sort'):
+                    sorts.append(f"{kind}: {', '.join(node.get('Sort Key', ()))}")
+        else:
+            raise NotSupportedError(f"EXPLAIN is not supported on {connection.vendor}.")
+    return plan, scans, sorts
+
+
+def time_statement(sql, params, runs, using='default'):
+    """
+    Median wall time in ms of running a SELECT runs times.
+    """
+    timings = []
+    with connections[using].cursor() as cursor:
+        for _ in range(runs):
+            start = time.perf_counter()
+            _execute(cursor, sql, params)
+            cursor.fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
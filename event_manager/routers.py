@@ -0,0 +1,147 @@
+"""
+Database routing: read replicas and the read-only SQLite connection.
+
+DB_REPLICAS adds one alias per replica (replica1, replica2, ...). Reads go
+to a replica only where asked for: inside views decorated with
+@use_replicas (lists, search, dashboards), which pick one replica for the
+whole request, and for long_reads(). Everything else, and every write,
+uses 'default'.
+
+A replica lags the primary, so a user who just wrote must not read from
+one: after a write PrimaryStickinessMiddleware keeps the session on the
+primary for DB_REPLICA_STICKY_SECONDS, and the rest of the writing request
+reads from the primary too. Writes outside the middleware (the session
+save itself, write-behind log rows) do not pin.
+
+For the same reason whatever is cached under a version key is computed
+inside primary(): a replica still behind a write that bumped the version
+would otherwise store its stale result under the new version.
+
+With the tuned SQLite profile (see event_manager.sqlite) settings also
+define READ_ONLY, the same file opened read-only, which long_reads()
+uses when there is no replica.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+READ_ONLY = 'readonly'
+REPLICA_PREFIX = 'replica'
+STICKY_SECONDS = getattr(settings, 'DB_REPLICA_STICKY_SECONDS', 10)
+SESSION_KEY = '_db_primary_until'
+
+
+class _RequestState:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+# The state of the request being served (None outside requests) and the
+# replica a @use_replicas view reads from.
+_request = ContextVar('db_request_state', default=None)
+_replica = ContextVar('db_replica', default=None)
+
+
+def replicas():
+    return [alias for alias in settings.DATABASES if alias.startswith(REPLICA_PREFIX)]
+
+
+def _primary_only():
+    state = _request.get()
+    return (state is not None and state.pinned) or connections['default'].in_atomic_block
+
+
+def long_reads():
+    """
+    The alias for long read-only queries: a replica, else READ_ONLY when
+    configured. 'default' while this request is pinned to the primary or
+    this thread is inside a transaction on 'default', whose uncommitted
+    writes only that connection can see.
+    """
+    if _primary_only():
+        return 'default'
+    choices = replicas()
+    if choices:
+        return random.choice(choices)
+    return READ_ONLY if READ_ONLY in settings.DATABASES else 'default'
+
+
+def use_replicas(view_func):
+    """
+    Let a read-only view read from a replica, unless the session is pinned
+    to the primary.
+    """
+    @wraps(view_func)
+    def _wrapped_view(*args, **kwargs):
+        choices = replicas()
+        token = _replica.set(random.choice(choices) if choices else None)
+        try:
+            return view_func(*args, **kwargs)
+        finally:
+            _replica.reset(token)
+    return _wrapped_view
+
+
+@contextmanager
+def primary():
+    """
+    Read from 'default' inside the block, even in a @use_replicas view.
+    """
+    token = _replica.set(None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class PrimaryStickinessMiddleware:
+    """
+    Pin a session to the primary for STICKY_SECONDS after it writes.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        session = getattr(request, 'session', None)
+        state = _RequestState(bool(session is not None and session.get(SESSION_KEY, 0) > time.time()))
+        token = _request.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request.reset(token)
+        if state.wrote and session is not None:
+            session[SESSION_KEY] = time.time() + STICKY_SECONDS
+        return response
+
+
+class DatabaseRouter:
+    """
+    Replica reads for @use_replicas views; every write on 'default',
+    including saves of rows read from a replica or READ_ONLY; migrations
+    only on 'default'.
+    """
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias is None or _primary_only():
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        state = _request.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == READ_ONLY or db.startswith(REPLICA_PREFIX):
+            return False
+        return None
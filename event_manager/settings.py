@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -57,6 +57,7 @@ INSTALLED_APPS = [
     'imagekit',
     'django_otp',
     'django_otp.plugins.otp_totp',
+    'channels',
     # 'two_factor',
     
     # Local apps
@@ -82,6 +83,10 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    # Writes buffered log rows after each request when WRITE_BEHIND_MODE=request
+    'event_manager.write_behind.WriteBehindMiddleware',
+    # Last, so only the views' own writes pin a session to the primary
+    'event_manager.routers.PrimaryStickinessMiddleware',
 ]
 
 ROOT_URLCONF = 'event_manager.urls'
@@ -125,6 +130,39 @@ if USE_MYSQL:
             },
         }
     }
+elif config('SQLITE_TUNED', default=False, cast=bool):
+    # SQLite tuned for concurrent requests (event_manager.sqlite): WAL,
+    # BEGIN IMMEDIATE, a busy timeout instead of "database is locked",
+    # persistent connections, and a read-only connection for long reads
+    # (event_manager.routers.long_reads). Opt in with SQLITE_TUNED=True on
+    # a server's own database: WAL rewrites the file header, which would
+    # dirty the db.sqlite3 committed for development.
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': config('SQLITE_SYNCHRONOUS', default='NORMAL'),
+        'busy_timeout': config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int),
+        'mmap_size': config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+        'cache_size': config('SQLITE_CACHE_SIZE', default=-64000, cast=int),
+        'temp_store': 'MEMORY',
+    }
+    SQLITE_CONN_MAX_AGE = config('SQLITE_CONN_MAX_AGE', default=600, cast=int)
+    DATABASES = {
+        'default': {
+            'ENGINE': 'event_manager.sqlite',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {'pragmas': SQLITE_PRAGMAS},
+            'CONN_MAX_AGE': SQLITE_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        },
+        'readonly': {
+            'ENGINE': 'event_manager.sqlite',
+            'NAME': f"file:{BASE_DIR / 'db.sqlite3'}?mode=ro",
+            'OPTIONS': {'pragmas': SQLITE_PRAGMAS},
+            'CONN_MAX_AGE': SQLITE_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'TEST': {'MIRROR': 'default'},
+        },
+    }
 else:
     DATABASES = {
         'default': {
@@ -133,6 +171,34 @@ else:
         }
     }
 
+# Read replicas (event_manager.routers): MySQL hosts (host or host:port) or
+# SQLite files, comma separated. Views decorated with @use_replicas read
+# from them; a session that writes reads from the primary for
+# DB_REPLICA_STICKY_SECONDS.
+DB_REPLICAS = config('DB_REPLICAS', default='', cast=Csv())
+DB_REPLICA_STICKY_SECONDS = config('DB_REPLICA_STICKY_SECONDS', default=10, cast=int)
+
+for number, replica in enumerate(DB_REPLICAS, start=1):
+    if USE_MYSQL:
+        host, _, port = replica.partition(':')
+        location = {'HOST': host, 'PORT': port or DATABASES['default']['PORT']}
+    else:
+        location = {'NAME': replica}
+    DATABASES[f'replica{number}'] = {**DATABASES['default'], **location, 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['event_manager.routers.DatabaseRouter']
+
+# Full-text event search (events.search): 'auto' uses FTS5 on SQLite and
+# FULLTEXT on MySQL, or 'sqlite', 'mysql', 'python' to force a backend.
+EVENT_SEARCH_BACKEND = config('EVENT_SEARCH_BACKEND', default='auto')
+
+# SQL capture for the explain_query_log command (event_manager.query_log).
+# Set to a file path to log every request's queries as JSON lines.
+QUERY_LOG_PATH = config('QUERY_LOG_PATH', default='')
+
+if QUERY_LOG_PATH:
+    MIDDLEWARE.insert(0, 'event_manager.query_log.QueryLogMiddleware')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -200,13 +266,50 @@ ACCOUNT_EMAIL_VERIFICATION = 'mandatory'
 ACCOUNT_UNIQUE_EMAIL = True
 
 # Email Configuration
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Set EMAIL_BACKEND to the console or locmem backend for development and tests.
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
 EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
 EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 
+# Outbound mail queue (communications.mail_queue, drained by send_queued_mail)
+MAIL_QUEUE_BATCH_SIZE = config('MAIL_QUEUE_BATCH_SIZE', default=100, cast=int)
+MAIL_QUEUE_MAX_ATTEMPTS = config('MAIL_QUEUE_MAX_ATTEMPTS', default=5, cast=int)
+MAIL_QUEUE_RETRY_BASE_SECONDS = config('MAIL_QUEUE_RETRY_BASE_SECONDS', default=60, cast=int)
+
+# Notification fan-out (communications.notifications, sent by the
+# send_notifications worker). Rates are messages per second per worker
+# process; 0 means unlimited.
+NOTIFICATION_MAX_ATTEMPTS = config('NOTIFICATION_MAX_ATTEMPTS', default=5, cast=int)
+NOTIFICATION_RETRY_BASE_SECONDS = config('NOTIFICATION_RETRY_BASE_SECONDS', default=30, cast=int)
+NOTIFICATION_EMAIL_WORKERS = config('NOTIFICATION_EMAIL_WORKERS', default=4, cast=int)
+NOTIFICATION_EMAIL_RATE = config('NOTIFICATION_EMAIL_RATE', default=200, cast=float)
+NOTIFICATION_SMS_WORKERS = config('NOTIFICATION_SMS_WORKERS', default=2, cast=int)
+NOTIFICATION_SMS_RATE = config('NOTIFICATION_SMS_RATE', default=20, cast=float)
+NOTIFICATION_PUSH_WORKERS = config('NOTIFICATION_PUSH_WORKERS', default=4, cast=int)
+NOTIFICATION_PUSH_RATE = config('NOTIFICATION_PUSH_RATE', default=500, cast=float)
+
+# Server-Sent Events notification streams (communications.streams, served
+# from the ASGI application)
+NOTIFICATION_STREAM_POLL_SECONDS = config('NOTIFICATION_STREAM_POLL_SECONDS', default=1.0, cast=float)
+NOTIFICATION_STREAM_HEARTBEAT_SECONDS = config('NOTIFICATION_STREAM_HEARTBEAT_SECONDS', default=15, cast=int)
+NOTIFICATION_STREAM_MAX_SECONDS = config('NOTIFICATION_STREAM_MAX_SECONDS', default=600, cast=int)
+
+# Write-behind buffers for UserActivity and PaymentLog rows
+# (event_manager.write_behind; background, request or sync)
+WRITE_BEHIND_MODE = config('WRITE_BEHIND_MODE', default='background')
+WRITE_BEHIND_MAX_ROWS = config('WRITE_BEHIND_MAX_ROWS', default=500, cast=int)
+WRITE_BEHIND_MAX_DELAY = config('WRITE_BEHIND_MAX_DELAY', default=1.0, cast=float)
+WRITE_BEHIND_SPILL_DIR = config('WRITE_BEHIND_SPILL_DIR', default=str(BASE_DIR / 'write_behind'))
+
+# User activity rollups (users.activity, rolled up and compacted by the
+# rollup_activity command)
+ACTIVITY_RAW_RETENTION_DAYS = config('ACTIVITY_RAW_RETENTION_DAYS', default=30, cast=int)
+ACTIVITY_HOURLY_RETENTION_DAYS = config('ACTIVITY_HOURLY_RETENTION_DAYS', default=14, cast=int)
+ACTIVITY_DAILY_RETENTION_DAYS = config('ACTIVITY_DAILY_RETENTION_DAYS', default=400, cast=int)
+
 # Login URLs
 LOGIN_URL = '/users/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
@@ -225,7 +328,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Cursor pages over the model ordering (event_manager.pagination)
+    'DEFAULT_PAGINATION_CLASS': 'event_manager.pagination.KeysetPagination',
     'PAGE_SIZE': 20,
 }
 
@@ -257,11 +361,33 @@ INTERNAL_IPS = [
 ]
 
 # Cache Configuration
+# Two-level cache (event_manager.cache): a per-process LRU in front of a
+# shared tier all workers see, Redis when REDIS_URL is set, otherwise a
+# SQLite file on this host.
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'event_manager.cache.SQLiteCache',
+        'LOCATION': config('CACHE_SQLITE_PATH', default=str(BASE_DIR / 'cache.sqlite3')),
+        'OPTIONS': {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=100000, cast=int)},
+    }
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-    }
+        'BACKEND': 'event_manager.cache.TwoLevelCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'LOCAL_MAX_ENTRIES': config('CACHE_LOCAL_MAX_ENTRIES', default=1000, cast=int),
+            'LOCAL_TIMEOUT': config('CACHE_LOCAL_TIMEOUT', default=5, cast=int),
+        },
+    },
+    'shared': SHARED_CACHE,
 }
 
 # Logging
@@ -305,11 +431,22 @@ CELERY_TIMEZONE = TIME_ZONE
 
 # Channels Configuration
 ASGI_APPLICATION = 'event_manager.asgi.application'
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels_redis.core.RedisChannelLayer',
-        'CONFIG': {
-            "hosts": [('127.0.0.1', 6379)],
+# The in-memory layer only fans out within one process; use it for local
+# development and tests, and Redis whenever more than one worker runs.
+USE_REDIS_CHANNEL_LAYER = config('USE_REDIS_CHANNEL_LAYER', default=True, cast=bool)
+
+if USE_REDIS_CHANNEL_LAYER:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                "hosts": [(config('REDIS_HOST', default='127.0.0.1'), config('REDIS_PORT', default=6379, cast=int))],
+            },
         },
-    },
-}
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
@@ -0,0 +1,44 @@
+"""
+SQLite backend tuned for a web server sharing one database file.
+
+Use it as ENGINE 'event_manager.sqlite'. On top of Django's backend it:
+
+- runs OPTIONS['pragmas'] on every new connection, e.g. journal_mode=WAL
+  so readers never wait for the writer, synchronous=NORMAL (safe with
+  WAL, one fsync per checkpoint instead of per commit), mmap_size and
+  busy_timeout
+- starts transactions with BEGIN IMMEDIATE, so a transaction that writes
+  takes the write lock up front and waits busy_timeout for it. A plain
+  BEGIN takes it at the first write, and if another connection committed
+  in between SQLite fails with "database is locked" at once instead of
+  waiting.
+
+A NAME like 'file:/path/db.sqlite3?mode=ro' opens the file read-only; such
+connections skip pragmas that write and keep plain BEGIN.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        return params
+
+    @property
+    def read_only(self):
+        return 'mode=ro' in str(self.settings_dict['NAME'])
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for pragma, value in self.settings_dict['OPTIONS'].get('pragmas', {}).items():
+            if self.read_only and pragma == 'journal_mode':
+                continue
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.read_only:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute('BEGIN IMMEDIATE')
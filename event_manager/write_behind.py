@@ -0,0 +1,295 @@
+"""
+Write-behind buffers for append-only log rows (UserActivity, PaymentLog).
+
+buffer_for(Model).add(obj) queues an unsaved row instead of INSERTing it
+inside the request. Queued rows are written with one bulk_create when
+WRITE_BEHIND_MAX_ROWS are waiting or the oldest has waited
+WRITE_BEHIND_MAX_DELAY seconds. WRITE_BEHIND_MODE picks who writes them:
+
+- 'background' (the default): a daemon thread per process, so requests
+  never wait on the database write lock for their log rows
+- 'request': WriteBehindMiddleware at the end of each request, for
+  servers where extra threads are unwelcome
+- 'sync': add() saves the row at once, for tests and shells
+
+Until it is written, a row also sits in a spill file under
+WRITE_BEHIND_SPILL_DIR (one JSON line per row; one file per buffer and
+process, locked while the process lives). Files left by a process that
+died are replayed by the next buffer of the same model to start, or by
+the replay_write_behind command. Delivery is at least once: a crash
+between the INSERT and removing the file writes those rows twice.
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, close_old_connections, transaction
+
+try:
+    import fcntl
+except ImportError:  # Windows: an open file cannot be renamed, see _claim()
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAX_ROWS = getattr(settings, 'WRITE_BEHIND_MAX_ROWS', 500)
+MAX_DELAY = getattr(settings, 'WRITE_BEHIND_MAX_DELAY', 1.0)
+SPILL_DIR = str(getattr(settings, 'WRITE_BEHIND_SPILL_DIR', os.path.join(settings.BASE_DIR, 'write_behind')))
+
+
+def mode():
+    return getattr(settings, 'WRITE_BEHIND_MODE', 'background')
+
+
+def _write(model, rows):
+    """
+    bulk_create the rows. If that breaks a constraint (e.g. the user was
+    deleted meanwhile), save them one by one and drop the offending ones,
+    so one bad row cannot hold back the others forever. Each attempt runs
+    in a savepoint, as a request-mode flush may be inside a transaction
+    that a failed statement would otherwise break.
+    """
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(rows, batch_size=MAX_ROWS)
+        return len(rows)
+    except IntegrityError:
+        pass
+    written = 0
+    for obj in rows:
+        obj.pk = None
+        obj._state.adding = True
+        try:
+            with transaction.atomic():
+                obj.save(force_insert=True)
+            written += 1
+        except IntegrityError:
+            logger.warning("Dropping a buffered %s row that violates a constraint", model._meta.label_lower)
+    return written
+
+
+class _Segment:
+    """
+    One spill file, locked for as long as its rows may be unwritten.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.handle = open(path, 'a', encoding='utf-8')
+        if fcntl is not None:
+            fcntl.flock(self.handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def append(self, obj):
+        # The line serializers.serialize('json', [obj]) would write, at a
+        # fifth of its cost; replay() reads it back with the deserializer.
+        fields = {
+            field.name: field.value_from_object(obj)
+            for field in obj._meta.concrete_fields if not field.primary_key
+        }
+        row = {'model': obj._meta.label_lower, 'pk': None, 'fields': fields}
+        self.handle.write(json.dumps([row], cls=DjangoJSONEncoder) + '\n')
+        self.handle.flush()
+
+    def discard(self):
+        self.handle.close()
+        os.remove(self.path)
+
+
+class WriteBehindBuffer:
+    def __init__(self, model):
+        self.model = model
+        self.label = model._meta.label_lower
+        self._reset()
+
+    def _reset(self):
+        # Also in a forked child: the parent's rows, files and thread stay its own.
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._flushing = threading.Lock()
+        self._pid = os.getpid()
+        self._pending = []
+        self._segments = []
+        self._current = None
+        self._sequence = 0
+        self._oldest = None
+        self._thread = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, obj):
+        """
+        Queue an unsaved instance; it is written on the next flush.
+        """
+        current_mode = mode()
+        if current_mode == 'sync':
+            obj.save()
+            return
+        with self._lock:
+            if self._current is None:
+                os.makedirs(SPILL_DIR, exist_ok=True)
+                self._sequence += 1
+                self._current = _Segment(os.path.join(SPILL_DIR, f'{self.label}.{self._pid}.{self._sequence}.jsonl'))
+            self._current.append(obj)
+            self._pending.append(obj)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._pending) >= MAX_ROWS
+            if current_mode == 'background':
+                self._start_thread()
+                if full:
+                    self._wake.notify()
+        if full and current_mode == 'request':
+            self.flush()
+
+    def flush(self):
+        """
+        Write every queued row with bulk_create. Returns how many were
+        written; on a database error they stay queued for the next flush.
+        """
+        with self._flushing:
+            with self._lock:
+                rows, self._pending = self._pending, []
+                segments = self._segments + ([self._current] if self._current else [])
+                self._segments, self._current, self._oldest = [], None, None
+            if not segments:
+                return 0
+            try:
+                written = _write(self.model, rows)
+            except Exception:
+                logger.exception("Could not write %d buffered %s rows", len(rows), self.label)
+                for obj in rows:
+                    obj.pk = None
+                    obj._state.adding = True
+                with self._lock:
+                    self._pending[:0] = rows
+                    self._segments[:0] = segments
+                    self._oldest = time.monotonic()
+                return 0
+            for segment in segments:
+                segment.discard()
+            return written
+
+    def _due(self):
+        if not self._pending:
+            return False
+        return len(self._pending) >= MAX_ROWS or time.monotonic() - self._oldest >= MAX_DELAY
+
+    def _start_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f'write-behind {self.label}', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._due():
+                    wait = MAX_DELAY if self._oldest is None else self._oldest + MAX_DELAY - time.monotonic()
+                    self._wake.wait(max(wait, 0.01))
+            self.flush()
+            close_old_connections()
+
+
+_buffers = {}
+_buffers_lock = threading.Lock()
+
+
+def buffer_for(model):
+    """
+    The process-wide buffer of a model. The first one created for a model
+    replays the spill files that dead processes left for it.
+    """
+    with _buffers_lock:
+        buffer = _buffers.get(model)
+        if buffer is None:
+            buffer = _buffers[model] = WriteBehindBuffer(model)
+            if mode() != 'sync':
+                try:
+                    replay(buffer.label)
+                except Exception:
+                    logger.exception("Could not replay spilled %s rows", buffer.label)
+    return buffer
+
+
+def flush_all():
+    """
+    Flush every buffer of this process. Returns the number of rows written.
+    """
+    return sum(buffer.flush() for buffer in list(_buffers.values()))
+
+
+atexit.register(flush_all)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=lambda: [buffer._reset() for buffer in _buffers.values()])
+
+
+def _claim(path):
+    """
+    Open a spill file whose process is gone, renamed to *.replaying, or
+    return None if a live buffer or another replay holds it.
+    """
+    base = path.split('.replaying')[0]
+    try:
+        if fcntl is None:
+            claimed = f'{base}.replaying{os.getpid()}'
+            os.rename(path, claimed)
+            return open(claimed, encoding='utf-8')
+        handle = open(path, encoding='utf-8')
+    except OSError:
+        return None
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        if path == base:
+            os.rename(path, f'{base}.replaying')
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def replay(label='*'):
+    """
+    Write the rows of spill files left by dead processes, including files
+    a replay itself died on. Returns the number of rows written.
+    """
+    written = 0
+    pattern = os.path.join(SPILL_DIR, f'{label}.*.jsonl')
+    for path in glob.glob(pattern) + glob.glob(f'{pattern}.replaying*'):
+        spill = _claim(path)
+        if spill is None:
+            continue
+        with spill:
+            rows = {}
+            for line in spill:
+                if not line.strip():
+                    continue
+                try:
+                    for item in serializers.deserialize('json', line):
+                        rows.setdefault(type(item.object), []).append(item.object)
+                except Exception:
+                    # A line cut short by the crash itself.
+                    logger.warning("Skipping an unreadable line in %s", spill.name)
+            for model, objects in rows.items():
+                written += _write(model, objects)
+            os.remove(spill.name if fcntl is None else path.split('.replaying')[0] + '.replaying')
+    return written
+
+
+class WriteBehindMiddleware:
+    """
+    In 'request' mode, write the rows a request queued once it is done.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if mode() == 'request':
+            flush_all()
+        return response
@@ -0,0 +1,110 @@
+"""
+Filtering and cached filter facets for the event category pages.
+
+A category page lists the events of one EventType, narrowed by the
+sub-category, date, location, skill and search filters, and offers the
+sub-categories, skill levels and venues of the matching events as
+choices. Those facets only change when an event of that type (or a
+venue name) changes, so they are cached per event type and filter set
+under version numbers that events.signals bumps on Event and Venue
+save/delete.
+"""
+import hashlib
+from collections import namedtuple
+from datetime import datetime
+
+from django.core.cache import cache
+
+from event_manager.cache import bump_version, get_or_compute
+from venues.models import Venue
+
+from . import search
+from .models import Event
+
+FACETS_TIMEOUT = 60 * 60
+VENUES_VERSION_KEY = 'event_facets:venues'
+
+EventFilters = namedtuple('EventFilters', ['subcategory', 'date', 'location', 'skill', 'search'])
+
+
+def parse_filters(params):
+    return EventFilters(*((params.get(name) or '').strip() for name in EventFilters._fields))
+
+
+def filter_events(event_type, filters, ranked_ids=None):
+    """
+    The events of event_type matching filters. A search narrows them to
+    the ranked_ids of events.search (looked up when not given).
+    """
+    events = Event.objects.filter(event_type=event_type)
+    if filters.subcategory:
+        events = events.filter(sub_category__iexact=filters.subcategory)
+    if filters.date:
+        try:
+            events = events.filter(start_date=datetime.strptime(filters.date, '%Y-%m-%d').date())
+        except ValueError:
+            pass
+    if filters.location:
+        events = events.filter(venue__name__icontains=filters.location)
+    if filters.skill:
+        events = events.filter(skill_level__iexact=filters.skill)
+    if filters.search:
+        if ranked_ids is None:
+            ranked_ids = search.ranked_ids(filters.search, event_type)
+        events = events.filter(pk__in=ranked_ids)
+    return events
+
+
+# Versioning
+
+def _type_version_key(event_type_id):
+    return f'event_facets:type:{event_type_id}'
+
+
+def invalidate(event_type_id):
+    """
+    Drop the cached facets of every page listing this event type.
+    """
+    bump_version(_type_version_key(event_type_id))
+
+
+def invalidate_venues():
+    """
+    Drop every cached venue facet (a venue was renamed or removed).
+    """
+    bump_version(VENUES_VERSION_KEY)
+
+
+# Facets
+
+def _compute(event_type, filters):
+    # order_by() on the column replaces the default -created_at, which
+    # DISTINCT would otherwise select too and repeat values for.
+    events = filter_events(event_type, filters)
+    return {
+        'subcategories': list(
+            events.exclude(sub_category='').order_by('sub_category').values_list('sub_category', flat=True).distinct()
+        ),
+        'skills': list(
+            events.exclude(skill_level='').order_by('skill_level').values_list('skill_level', flat=True).distinct()
+        ),
+        'venues': list(
+            Venue.objects.filter(events__event_type=event_type).order_by('name').values('id', 'name', 'city').distinct()
+        ),
+    }
+
+
+def get_facets(event_type, filters):
+    """
+    {'subcategories': [...], 'skills': [...], 'venues': [{'id', 'name', 'city'}, ...]}
+    for the events of event_type matching filters, from the cache when
+    nothing they depend on has changed.
+    """
+    type_key = _type_version_key(event_type.pk)
+    versions = cache.get_many([type_key, VENUES_VERSION_KEY])
+    digest = hashlib.md5(repr(tuple(filters)).encode()).hexdigest()
+    key = (
+        f'event_facets:{event_type.pk}:{versions.get(type_key, 0)}:'
+        f'{versions.get(VENUES_VERSION_KEY, 0)}:{digest}'
+    )
+    return get_or_compute(key, lambda: _compute(event_type, filters), FACETS_TIMEOUT)
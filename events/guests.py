@@ -0,0 +1,321 @@
+"""
+Bulk guest-list import and export for EventGuest.
+
+Imports stream rows from CSV or XLSX, validate them, de-duplicate on
+email/phone (against the event's existing guests and earlier rows of the
+same file) and write in chunks with bulk_create/bulk_update. Exports stream
+rows out of the database with a server-side iterator. Neither side ever
+holds the whole file in memory.
+"""
+import csv
+import io
+import zipfile
+from collections import namedtuple
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from event_manager.routers import long_reads
+
+from .models import EventGuest
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+# Largest value of a PositiveIntegerField on every supported database.
+MAX_INTEGER = 2147483647
+
+# Column order of exports, and the columns an import understands.
+GUEST_COLUMNS = [
+    'name', 'email', 'phone', 'status', 'is_primary_guest', 'plus_ones',
+    'dietary_restrictions', 'special_requirements', 'table_number', 'seat_number',
+    'rsvp_date', 'attended',
+]
+
+_STATUS_LOOKUP = {}
+for _value, _label in EventGuest.GUEST_STATUS_CHOICES:
+    _STATUS_LOOKUP[_value] = _value
+    _STATUS_LOOKUP[_label.lower()] = _value
+
+_TRUE_VALUES = {'1', 'true', 'yes', 'y', 'x'}
+
+ImportResult = namedtuple('ImportResult', ['created', 'updated', 'duplicates', 'errors'])
+
+
+# Reading
+
+def iter_csv_rows(fileobj):
+    """
+    Yield one dict per data row of a CSV file opened in binary or text mode.
+    Raises ValueError if the file is not UTF-8 CSV.
+    """
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(fileobj)
+    try:
+        for row in reader:
+            yield {(key or '').strip().lower(): value for key, value in row.items()}
+    except UnicodeDecodeError as exc:
+        raise ValueError("The guest list is not a UTF-8 encoded CSV file.") from exc
+    except csv.Error as exc:
+        raise ValueError(f"The guest list is not a valid CSV file: {exc}") from exc
+
+
+def iter_xlsx_rows(fileobj):
+    """
+    Yield one dict per data row of the first worksheet, using openpyxl's
+    read-only mode so rows are parsed lazily. Raises ValueError if the
+    file is not a readable workbook.
+    """
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError) as exc:
+        raise ValueError("The guest list is not a valid .xlsx workbook.") from exc
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(cell or '').strip().lower() for cell in next(rows, ())]
+        for values in rows:
+            if not any(value not in (None, '') for value in values):
+                continue
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, file_format):
+    if file_format == 'csv':
+        return iter_csv_rows(fileobj)
+    if file_format == 'xlsx':
+        return iter_xlsx_rows(fileobj)
+    raise ValueError(f"Unsupported guest list format: {file_format}")
+
+
+# Validation
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _integer(value, field):
+    value = _text(value)
+    if not value:
+        return None
+    try:
+        number = int(float(value))
+    except (ValueError, OverflowError):
+        raise ValidationError(f"{field} must be a whole number.")
+    if number < 0:
+        raise ValidationError(f"{field} cannot be negative.")
+    if number > MAX_INTEGER:
+        raise ValidationError(f"{field} cannot be more than {MAX_INTEGER}.")
+    return number
+
+
+def _datetime(value, field):
+    if isinstance(value, date) and not isinstance(value, datetime):
+        # XLSX date cells without a time of day
+        value = datetime.combine(value, datetime.min.time())
+    if not isinstance(value, datetime):
+        if not _text(value):
+            return None
+        try:
+            parsed = parse_datetime(_text(value))
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError(f"Invalid {field} {value!r}.")
+        value = parsed
+    return value if timezone.is_aware(value) else timezone.make_aware(value)
+
+
+def clean_row(raw):
+    """
+    Validate one raw row and return {field: value} for the columns it
+    carries. Raises ValidationError describing the first problem found.
+    """
+    cleaned = {}
+    for field in GUEST_COLUMNS:
+        if field not in raw:
+            continue
+        value = raw[field]
+        if field in ('name', 'phone', 'dietary_restrictions', 'special_requirements'):
+            cleaned[field] = _text(value)
+        elif field == 'email':
+            email = _text(value).lower()
+            if email:
+                validate_email(email)
+            cleaned[field] = email
+        elif field == 'status':
+            status = _STATUS_LOOKUP.get(_text(value).lower())
+            if status is None:
+                if _text(value):
+                    raise ValidationError(f"Unknown RSVP status {value!r}.")
+                status = 'invited'
+            cleaned[field] = status
+        elif field in ('is_primary_guest', 'attended'):
+            cleaned[field] = value is True or _text(value).lower() in _TRUE_VALUES
+        elif field == 'plus_ones':
+            cleaned[field] = _integer(value, 'plus_ones') or 0
+        elif field in ('table_number', 'seat_number'):
+            cleaned[field] = _integer(value, field)
+        elif field == 'rsvp_date':
+            cleaned[field] = _datetime(value, field)
+    if not cleaned.get('name'):
+        raise ValidationError("name is required.")
+    return cleaned
+
+
+def _dedupe_keys(email, phone):
+    keys = []
+    if email:
+        keys.append(('email', email.lower()))
+    if phone:
+        keys.append(('phone', ''.join(ch for ch in phone if ch.isdigit() or ch == '+')))
+    return keys
+
+
+# Import
+
+def update_guests(guests, field_names):
+    """
+    Write field_names of already-saved guests with one parameterised UPDATE
+    run through executemany. Same effect as bulk_update(), without building
+    a CASE expression per field and row, which dominates large imports.
+    """
+    quote = connection.ops.quote_name
+    fields = [EventGuest._meta.get_field(name) for name in field_names]
+    sql = 'UPDATE {} SET {} WHERE {} = %s'.format(
+        quote(EventGuest._meta.db_table),
+        ', '.join(f'{quote(field.column)} = %s' for field in fields),
+        quote(EventGuest._meta.pk.column),
+    )
+    params = [
+        [field.get_db_prep_save(getattr(guest, field.attname), connection) for field in fields] + [guest.pk]
+        for guest in guests
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def import_guests(event, rows, update_existing=True, chunk_size=CHUNK_SIZE):
+    """
+    Write an iterable of raw guest rows into event's guest list.
+
+    Rows matching an existing guest by email or phone update that guest
+    (only the columns present in the file) when update_existing is set;
+    rows repeating an earlier row of the same import are counted as
+    duplicates and skipped. Invalid rows are skipped and reported as
+    (row_number, message) pairs; a file that cannot be read raises
+    ValueError and writes nothing.
+    """
+    existing = {}
+    for pk, email, phone in EventGuest.objects.filter(event=event).values_list('id', 'email', 'phone').iterator(chunk_size=5000):
+        for key in _dedupe_keys(email, phone):
+            existing.setdefault(key, pk)
+
+    seen = set()
+    to_create, to_update = [], {}
+    update_fields = set()
+    created = updated = duplicates = 0
+    errors = []
+
+    def flush():
+        nonlocal created, updated
+        if to_create:
+            EventGuest.objects.bulk_create(to_create, batch_size=chunk_size)
+            created += len(to_create)
+            to_create.clear()
+        if to_update:
+            now = timezone.now()
+            for guest in to_update.values():
+                guest.updated_at = now
+            update_guests(list(to_update.values()), sorted(update_fields | {'updated_at'}))
+            updated += len(to_update)
+            to_update.clear()
+
+    with transaction.atomic():
+        for row_number, raw in enumerate(rows, start=2):
+            try:
+                cleaned = clean_row(raw)
+            except ValidationError as exc:
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append((row_number, '; '.join(exc.messages)))
+                continue
+
+            keys = _dedupe_keys(cleaned.get('email'), cleaned.get('phone'))
+            if any(key in seen for key in keys):
+                duplicates += 1
+                continue
+            seen.update(keys)
+
+            match = next((existing[key] for key in keys if key in existing), None)
+            if match is None:
+                to_create.append(EventGuest(event=event, **cleaned))
+            elif update_existing:
+                update_fields.update(cleaned)
+                to_update[match] = EventGuest(pk=match, event=event, **cleaned)
+            else:
+                duplicates += 1
+
+            if len(to_create) + len(to_update) >= chunk_size:
+                flush()
+        flush()
+
+    return ImportResult(created, updated, duplicates, errors)
+
+
+# Export
+
+def iter_guest_rows(event, chunk_size=2000):
+    """
+    Yield the event's guests as lists in GUEST_COLUMNS order, seating order first.
+    """
+    queryset = EventGuest.objects.using(long_reads()).filter(event=event).order_by('table_number', 'seat_number', 'name', 'id')
+    for values in queryset.values_list(*GUEST_COLUMNS).iterator(chunk_size=chunk_size):
+        yield list(values)
+
+
+class _Echo:
+    """
+    File-like object whose write() hands the line straight back, so
+    csv.writer can feed a StreamingHttpResponse.
+    """
+    def write(self, value):
+        return value
+
+
+def iter_guest_csv(event):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(GUEST_COLUMNS)
+    for row in iter_guest_rows(event):
+        yield writer.writerow(['' if value is None else value for value in row])
+
+
+def write_guest_xlsx(event, fileobj):
+    """
+    Write the guest list as an XLSX workbook to fileobj. xlsxwriter's
+    constant_memory mode flushes each row to disk as it is written.
+    """
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(fileobj, {'constant_memory': True, 'remove_timezone': True})
+    worksheet = workbook.add_worksheet('Guests')
+    bold = workbook.add_format({'bold': True})
+    date_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm'})
+    worksheet.write_row(0, 0, GUEST_COLUMNS, bold)
+    rsvp_column = GUEST_COLUMNS.index('rsvp_date')
+    for row_index, row in enumerate(iter_guest_rows(event), start=1):
+        for column, value in enumerate(row):
+            if value is None:
+                continue
+            if column == rsvp_column:
+                worksheet.write_datetime(row_index, column, value, date_format)
+            else:
+                worksheet.write(row_index, column, value)
+    workbook.close()
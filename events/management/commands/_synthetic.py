@@ -0,0 +1,48 @@
+"""
+Synthetic events and guest lists for the events benchmarks. Everything here
+is meant to run inside a transaction that the caller rolls back.
+"""
+import random
+import uuid
+from datetime import date, time
+
+from users.models import CustomUser
+from venues.models import Venue, VenueCategory
+from events.models import Event, EventGuest, EventType
+
+DIETARY_OPTIONS = ['', '', '', '', 'Vegetarian', 'Vegan', 'Gluten-free', 'Halal', 'Kosher']
+
+
+def make_event(expected_guests=100, organizer=None):
+    tag = uuid.uuid4().hex[:8]
+    organizer = organizer or CustomUser.objects.create_user(
+        username=f'events-bench-{tag}', email=f'events-bench-{tag}@example.com', user_type='manager'
+    )
+    category, _ = VenueCategory.objects.get_or_create(name='Benchmark')
+    event_type, _ = EventType.objects.get_or_create(name='Benchmark')
+    venue = Venue.objects.create(
+        name=f'Bench Hall {tag}', category=category, address='1 Bench St', city='Bench City',
+        state='BC', country='US', capacity_max=max(expected_guests, 1), base_price=1000, description='Benchmark venue',
+    )
+    return Event.objects.create(
+        title=f'Bench Event {tag}', description='Benchmark event', event_type=event_type,
+        start_date=date(2030, 1, 1), end_date=date(2030, 1, 1), start_time=time(18), end_time=time(23),
+        expected_guests=expected_guests, venue=venue, organizer=organizer, event_manager=organizer,
+        total_budget=10000, venue_cost=1000, total_cost=1000,
+    )
+
+
+def make_guests(event, count, seed=0):
+    rng = random.Random(seed)
+    EventGuest.objects.bulk_create([
+        EventGuest(
+            event=event,
+            name=f'Guest {i}',
+            email=f'guest{i}@example.com',
+            phone=f'+1555{i:07d}',
+            plus_ones=rng.choice([0, 0, 0, 1]),
+            dietary_restrictions=rng.choice(DIETARY_OPTIONS),
+        )
+        for i in range(count)
+    ], batch_size=1000)
+    return list(EventGuest.objects.filter(event=event).order_by('id'))
@@ -0,0 +1,157 @@
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from event_manager.cache import bump_version, get_or_compute, stats
+
+
+def _caches_setting(path):
+    return {
+        'per-process': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'shared': {'BACKEND': 'event_manager.cache.SQLiteCache', 'LOCATION': path},
+        'default': {
+            'BACKEND': 'event_manager.cache.TwoLevelCache',
+            'LOCATION': 'shared',
+            'OPTIONS': {'LOCAL_MAX_ENTRIES': 1000, 'LOCAL_TIMEOUT': 5},
+        },
+    }
+
+
+def _zipf_keys(rng, count, keys):
+    weights = [1 / (rank + 1) for rank in range(keys)]
+    return rng.choices(range(keys), weights, k=count)
+
+
+def _payload(key):
+    return {'id': key, 'rows': [{'name': f'row {i}', 'value': i} for i in range(20)]}
+
+
+def _mixed_worker(alias, seed, operations, keys, write_ratio, queue):
+    cache = caches[alias]
+    if alias == 'default':
+        cache.stats.reset()  # forked with the parent's counts
+    rng = random.Random(seed)
+    timings = []
+    for key in _zipf_keys(rng, operations, keys):
+        start = time.perf_counter()
+        if rng.random() < write_ratio:
+            cache.set(f'bench:{key}', _payload(key), 300)
+        elif cache.get(f'bench:{key}') is None:
+            cache.set(f'bench:{key}', _payload(key), 300)
+        timings.append(time.perf_counter() - start)
+    queue.put((timings, stats(alias) if alias == 'default' else None))
+
+
+def _stampede_worker(protected, barrier, queue):
+    cache = caches['default']
+    cache.stats.reset()
+
+    def compute():
+        time.sleep(0.2)  # an expensive query
+        return 'value'
+
+    barrier.wait()
+    if protected:
+        get_or_compute('bench:hot', compute, timeout=60)
+    elif cache.get('bench:hot-plain') is None:
+        cache.set('bench:hot-plain', compute(), 60)
+    queue.put(stats()['computes'] if protected else 1)
+
+
+def _reader_worker(barrier, queue):
+    cache = caches['default']
+    cache.get('bench:version')  # warm the local tier if it would keep counters
+    barrier.wait()
+    deadline = time.monotonic() + 10
+    while cache.get('bench:version') != 2 and time.monotonic() < deadline:
+        pass
+    queue.put(time.perf_counter())
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare a per-process cache, the shared SQLite cache and the two-level '
+        'cache under several worker processes, then check stampede protection '
+        'and cross-process version invalidation. Uses a temporary cache file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--operations', type=int, default=20000, help='Per worker')
+        parser.add_argument('--keys', type=int, default=5000)
+        parser.add_argument('--write-ratio', type=float, default=0.05)
+
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context('fork')
+        path = os.path.join(tempfile.mkdtemp(prefix='cache-bench-'), 'cache.sqlite3')
+        with override_settings(CACHES=_caches_setting(path)):
+            self.stdout.write(
+                f"{options['workers']} workers x {options['operations']} operations, "
+                f"{options['keys']} keys (Zipf), {options['write_ratio']:.0%} writes"
+            )
+            self.stdout.write(f"{'cache':<12} {'ops/s':>9} {'p50':>9} {'p99':>9} {'hit ratio':>10}")
+            for label, alias in [('per-process', 'per-process'), ('shared', 'shared'), ('two-level', 'default')]:
+                caches[alias].clear()
+                queue = context.Queue()
+                workers = [
+                    context.Process(target=_mixed_worker, args=(
+                        alias, seed, options['operations'], options['keys'], options['write_ratio'], queue,
+                    ))
+                    for seed in range(options['workers'])
+                ]
+                start = time.perf_counter()
+                for worker in workers:
+                    worker.start()
+                results = [queue.get() for _ in workers]
+                elapsed = time.perf_counter() - start
+                for worker in workers:
+                    worker.join()
+                timings = sorted(t for worker_timings, _ in results for t in worker_timings)
+                ratio = ''
+                if results[0][1]:
+                    hits = sum(s['local_hits'] + s['shared_hits'] for _, s in results)
+                    lookups = hits + sum(s['misses'] for _, s in results)
+                    local = sum(s['local_hits'] for _, s in results)
+                    ratio = f"{hits / lookups:.1%} ({local / lookups:.0%} local)"
+                self.stdout.write(
+                    f"{label:<12} {len(timings) / elapsed:9.0f} {statistics.median(timings) * 1e6:7.0f}us "
+                    f"{timings[int(len(timings) * 0.99)] * 1e6:7.0f}us {ratio:>10}"
+                )
+
+            for protected in (False, True):
+                caches['default'].clear()
+                queue, barrier = context.Queue(), context.Barrier(options['workers'] * 2)
+                workers = [
+                    context.Process(target=_stampede_worker, args=(protected, barrier, queue))
+                    for _ in range(options['workers'] * 2)
+                ]
+                for worker in workers:
+                    worker.start()
+                computes = sum(queue.get() for _ in workers)
+                for worker in workers:
+                    worker.join()
+                label = 'get_or_compute' if protected else 'get, then set'
+                self.stdout.write(
+                    f"\nstampede, {len(workers)} processes on one cold key ({label}): {computes} computation(s)"
+                )
+
+            caches['default'].clear()
+            bump_version('bench:version')
+            queue, barrier = context.Queue(), context.Barrier(2)
+            reader = context.Process(target=_reader_worker, args=(barrier, queue))
+            reader.start()
+            barrier.wait()
+            bumped = time.perf_counter()
+            bump_version('bench:version')
+            seen = queue.get()
+            reader.join()
+            self.stdout.write(
+                f"version bump seen by another process after {(seen - bumped) * 1000:.2f} ms"
+            )
@@ -0,0 +1,120 @@
+import itertools
+import random
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from events import search
+from events.models import Event
+
+from ._synthetic import make_event
+
+VOCABULARY = 20000
+THEMES = ['Rustic', 'Modern', 'Vintage', 'Tropical', 'Formal', 'Casual']
+
+
+class Command(BaseCommand):
+    help = (
+        'Grow the event table step by step with synthetic events and time '
+        'ranked full-text searches (the configured backend and the in-process '
+        'fallback) against the icontains filter they replace. Everything is '
+        'rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000,300000',
+                            help='Comma-separated event counts to measure at')
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--limit', type=int, default=search.MAX_RESULTS)
+        parser.add_argument('--skip-python', action='store_true', help='Do not time the in-process index')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(size) for size in options['sizes'].split(','))
+        except ValueError:
+            raise CommandError('--sizes must be comma-separated integers.')
+        rng = random.Random(options['seed'])
+        # Zipf-like word frequencies: a few very common words, a long tail.
+        words = [f'w{rank}x' for rank in range(VOCABULARY)]
+        weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(VOCABULARY)))
+        queries = {
+            'common word': words[0],
+            'mid word': words[200],
+            'rare word': words[15000],
+            'two words': f'{words[3]} {words[50]}',
+            'prefix': words[12][:-1],
+        }
+        backend = search.get_backend()
+        self.stdout.write(f"Configured backend: {backend.name}")
+
+        with transaction.atomic():
+            base = make_event()
+            tag = uuid.uuid4().hex[:6].upper()
+            created = Event.objects.count()
+            for size in sizes:
+                start = time.perf_counter()
+                while created < size:
+                    batch = []
+                    for _ in range(min(2000, size - created)):
+                        batch.append(Event(
+                            event_id=f'EVT{tag}{created}',
+                            title=' '.join(rng.choices(words, cum_weights=weights, k=4)),
+                            description=' '.join(rng.choices(words, cum_weights=weights, k=30)),
+                            tags=rng.choices(words, cum_weights=weights, k=2), theme=rng.choice(THEMES),
+                            event_type=base.event_type, start_date=base.start_date, end_date=base.end_date,
+                            start_time=base.start_time, end_time=base.end_time, expected_guests=50,
+                            venue=base.venue, organizer=base.organizer, total_budget=1000,
+                            venue_cost=100, total_cost=100,
+                        ))
+                        created += 1
+                    # bulk_create sends no signals; index the batch directly.
+                    Event.objects.bulk_create(batch)
+                    if backend.name != 'python':
+                        backend.index(
+                            Event.objects.filter(event_id__in=[e.event_id for e in batch]).select_related('venue')
+                        )
+                self.stdout.write(f"\n{size} events (built in {time.perf_counter() - start:.1f} s)")
+                if backend.name == 'python':
+                    # Its updates wait for a commit that never comes; reload instead.
+                    backend.clear()
+
+                fallback = None
+                if not options['skip_python'] and backend.name != 'python':
+                    start = time.perf_counter()
+                    fallback = search.PythonBackend('default')
+                    fallback._load()
+                    self.stdout.write(f"  in-process index loaded in {time.perf_counter() - start:.1f} s")
+
+                self.stdout.write(f"  {'query':<12} {'matches':>8} {backend.name:>10} {'python':>10} {'icontains':>10}")
+                for label, query in queries.items():
+                    terms = search.tokenize(query)
+                    matches = len(backend.search(terms, None, 10 ** 9))
+                    ranked = self._time(lambda: backend.search(terms, None, options['limit']), options['runs'])
+                    python = (
+                        self._time(lambda: fallback.search(terms, None, options['limit']), options['runs'])
+                        if fallback else None
+                    )
+                    scan = self._time(lambda: list(
+                        Event.objects.filter(Q(title__icontains=query) | Q(description__icontains=query))
+                        .values_list('pk', flat=True)[:options['limit']]
+                    ), max(1, options['runs'] // 4))
+                    python_ms = f"{python:8.2f}ms" if python is not None else f"{'-':>10}"
+                    self.stdout.write(
+                        f"  {label:<12} {matches:>8} {ranked:8.2f}ms {python_ms} {scan:8.2f}ms"
+                    )
+            transaction.set_rollback(True)
+        if backend.name == 'python':
+            backend.clear()
+
+    def _time(self, run, runs):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,66 @@
+import csv
+import os
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from events.guests import import_guests, iter_guest_csv, iter_rows, write_guest_xlsx
+
+from ._synthetic import make_event, make_guests
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the guest-list pipeline: writes a synthetic CSV, imports it '
+        'into an event that already has some of those guests, then exports CSV '
+        'and XLSX, reporting time and peak traced memory for each step. '
+        'Everything is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Rows in the synthetic import file.')
+        parser.add_argument('--existing', type=int, default=10000, help='Guests already on the list before importing.')
+
+    def handle(self, *args, **options):
+        rows, existing = options['rows'], options['existing']
+        with tempfile.TemporaryDirectory() as workdir:
+            source = os.path.join(workdir, 'guests.csv')
+            self._write_source(source, rows)
+            with transaction.atomic():
+                event = make_event(expected_guests=rows)
+                make_guests(event, existing)
+
+                with open(source, 'rb') as fileobj:
+                    result = self._measure('import csv', lambda: import_guests(event, iter_rows(fileobj, 'csv')))
+                self.stdout.write(
+                    f'    {result.created} added, {result.updated} updated, '
+                    f'{result.duplicates} duplicates, {len(result.errors)} invalid'
+                )
+                self._measure('export csv', lambda: sum(len(line) for line in iter_guest_csv(event)))
+                self._measure('export xlsx', lambda: write_guest_xlsx(event, os.path.join(workdir, 'guests.xlsx')))
+                with open(os.path.join(workdir, 'guests.xlsx'), 'rb') as fileobj:
+                    self._measure('re-import xlsx', lambda: import_guests(event, iter_rows(fileobj, 'xlsx')))
+                transaction.set_rollback(True)
+
+    def _write_source(self, path, rows):
+        with open(path, 'w', newline='') as fileobj:
+            writer = csv.writer(fileobj)
+            writer.writerow(['Name', 'Email', 'Phone', 'Status', 'Plus_Ones', 'Table_Number', 'Seat_Number'])
+            for i in range(rows):
+                # Every 50th row repeats an earlier guest, every 1000th is invalid.
+                n = i - 1 if i % 50 == 49 else i
+                email = 'not-an-email' if i % 1000 == 999 else f'guest{n}@example.com'
+                writer.writerow([f'Guest {n}', email, f'+1555{n:07d}', 'Confirmed', i % 3, n // 10 + 1, n % 10 + 1])
+
+    def _measure(self, label, func):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.stdout.write(f'{label:>15}: {elapsed:.2f} s, peak {peak / 1024 / 1024:.1f} MiB traced')
+        return result
@@ -0,0 +1,165 @@
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from communications.management.commands._synthetic import make_conversations, make_users
+from communications.models import Message, Notification
+from communications.unread import mark_conversation_read
+from event_manager.query_log import capture_queries, explain, read_query_log, statement_kind, time_statement
+from events.models import Event, EventType, Registration
+
+from ._synthetic import make_event
+
+# The indexes added for the hot queries.
+HOT_QUERY_INDEXES = [
+    'events_type_subcat_idx',
+    'events_manager_created_idx',
+    'registration_email_idx',
+    'messages_conv_unread_idx',
+    'notifications_user_unread_idx',
+]
+CATEGORIES = {
+    'Sports': ['Football', 'Cricket', 'Tennis', 'Running', 'Swimming'],
+    'Music': ['Rock', 'Jazz', 'Classical', 'Indie'],
+    'Cooking': ['Baking', 'Italian', 'Vegan'],
+    'Coding': ['Python', 'Java', 'Web'],
+}
+SKILLS = ['Beginner', 'Intermediate', 'Advanced']
+
+
+class Command(BaseCommand):
+    help = (
+        'Capture the hot queries of the event listings, booking page, manager '
+        'dashboard, unread marking and notifications on synthetic data, then '
+        'time and EXPLAIN them with and without their indexes. SQLite only; '
+        'everything is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=50000)
+        parser.add_argument('--registrations', type=int, default=100000)
+        parser.add_argument('--conversations', type=int, default=2000)
+        parser.add_argument('--messages-per-conversation', type=int, default=50)
+        parser.add_argument('--notifications', type=int, default=100000)
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('benchmark_indexes drops indexes inside a rolled-back transaction, which needs SQLite.')
+        rng = random.Random(options['seed'])
+        log_path = os.path.join(tempfile.mkdtemp(prefix='query-log-'), 'hot_queries.jsonl')
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            fixtures = self._make_data(rng, options)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            self.stdout.write(f"Synthetic data created in {time.perf_counter() - start:.1f} s")
+
+            self._capture(log_path, fixtures)
+            statements = {}
+            for sql, params, _ in read_query_log(log_path):
+                if statement_kind(sql) == 'SELECT':
+                    statements.setdefault(sql, params)
+            self.stdout.write(f"{len(statements)} distinct SELECTs captured to {log_path}")
+
+            after = self._measure(statements, options['runs'])
+            with connection.cursor() as cursor:
+                # SQLite drops indexes transactionally, so the rollback restores them.
+                for index_name in HOT_QUERY_INDEXES:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(index_name)}')
+            before = self._measure(statements, options['runs'])
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"\n{'without':>10} {'with':>10}  scans   statement")
+        for sql in sorted(statements, key=lambda sql: before[sql][0], reverse=True):
+            (before_ms, before_scans), (after_ms, after_scans) = before[sql], after[sql]
+            self.stdout.write(
+                f"{before_ms:8.2f}ms {after_ms:8.2f}ms  {len(before_scans)} -> {len(after_scans)}   {sql[:110]}"
+            )
+        self.stdout.write(
+            f"\ntotal: {sum(ms for ms, _ in before.values()):.1f} ms without the indexes, "
+            f"{sum(ms for ms, _ in after.values()):.1f} ms with them"
+        )
+
+    def _measure(self, statements, runs):
+        results = {}
+        for sql, params in statements.items():
+            _, scans, _ = explain(sql, params)
+            results[sql] = (time_statement(sql, params, runs), scans)
+        return results
+
+    def _make_data(self, rng, options):
+        base = make_event()
+        managers = make_users(50, user_type='manager', prefix='idx-manager')
+        types = {name: EventType.objects.get_or_create(name=name)[0] for name in CATEGORIES}
+        tag = uuid.uuid4().hex[:6].upper()
+        events = []
+        for i in range(options['events']):
+            type_name = rng.choice(list(CATEGORIES))
+            day = date(2030, 1, 1) + timedelta(days=rng.randrange(365))
+            events.append(Event(
+                event_id=f'EVT{tag}{i}', title=f'Bench {type_name} {i}', description='Benchmark event',
+                event_type=types[type_name], sub_category=rng.choice(CATEGORIES[type_name]),
+                skill_level=rng.choice(SKILLS), start_date=day, end_date=day,
+                start_time=base.start_time, end_time=base.end_time, expected_guests=50,
+                venue=base.venue, organizer=base.organizer, event_manager=rng.choice(managers),
+                total_budget=1000, venue_cost=100, total_cost=100,
+            ))
+        Event.objects.bulk_create(events, batch_size=1000)
+        event_ids = list(Event.objects.filter(event_id__startswith=f'EVT{tag}').values_list('id', flat=True))
+        Registration.objects.bulk_create([
+            Registration(event_id=rng.choice(event_ids), name=f'Guest {i}', email=f'guest{i % 20000}@example.com',
+                         phone='0000000000')
+            for i in range(options['registrations'])
+        ], batch_size=1000)
+
+        owner = make_users(1, prefix='idx-owner')[0]
+        partners = make_users(options['conversations'], prefix='idx-partner')
+        conversations = make_conversations(owner, partners, options['messages_per_conversation'])
+        Notification.objects.bulk_create([
+            Notification(
+                notification_id=f'NOTIF{tag}{i}', user=rng.choice(partners), notification_type='system',
+                title='Bench', message='Benchmark notification', is_read=rng.random() < 0.8,
+            )
+            for i in range(options['notifications'])
+        ], batch_size=1000)
+        return {
+            'email': 'guest42@example.com',
+            'manager': managers[0],
+            'owner': owner,
+            'conversation': conversations[0],
+            'reader': partners[0],
+        }
+
+    def _capture(self, log_path, fixtures):
+        sports = EventType.objects.get(name='Sports')
+        with capture_queries(log_path, label='booking_page'):
+            list(Registration.objects.filter(email=fixtures['email']))
+        with capture_queries(log_path, label='sports_events'):
+            events = Event.objects.filter(event_type=sports, sub_category__iexact='Football', skill_level__iexact='Beginner')
+            events.count()
+            list(events[:6])
+            sports_events = Event.objects.filter(event_type=sports)
+            list(sports_events.order_by('sub_category').values_list('sub_category', flat=True).distinct())
+            list(sports_events.order_by('skill_level').values_list('skill_level', flat=True).distinct())
+            list(Event.objects.filter(event_type=sports, sub_category='Football', start_date=date(2030, 3, 1)))
+        with capture_queries(log_path, label='manager_dashboard'):
+            list(Event.objects.filter(event_manager=fixtures['manager'])[:20])
+            list(Registration.objects.filter(event__event_manager=fixtures['manager'])[:20])
+        with capture_queries(log_path, label='mark_conversation_read'):
+            conversation = fixtures['conversation']
+            conversation.messages.filter(is_read=False).exclude(sender=fixtures['owner']).count()
+            mark_conversation_read(conversation, fixtures['owner'])
+        with capture_queries(log_path, label='notifications'):
+            notifications = Notification.objects.filter(user=fixtures['reader'], is_read=False)
+            notifications.count()
+            list(notifications[:20])
+            Message.objects.filter(conversation=fixtures['conversation'], is_read=False).count()
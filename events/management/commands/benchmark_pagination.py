@@ -0,0 +1,115 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.utils import timezone
+
+from event_manager.pagination import cursor_after, paginate
+from events.models import Event, EventType
+from venues.management.commands._synthetic import make_venues
+from venues.models import Venue
+
+from ._synthetic import make_event
+
+
+class Command(BaseCommand):
+    help = (
+        'Time deep pages of a category listing (Event, -created_at) and of '
+        'the venue listing (-is_featured, -average_rating, -created_at) with '
+        'page numbers (COUNT + OFFSET) and with keyset cursors. Everything '
+        'is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=200000)
+        parser.add_argument('--venues', type=int, default=100000)
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--pages', default='1,100,1000,5000',
+                            help='Comma-separated page numbers to time')
+        parser.add_argument('--runs', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        pages = [int(page) for page in options['pages'].split(',')]
+        with transaction.atomic():
+            start = time.perf_counter()
+            event_type = self._make_events(rng, options['events'])
+            make_venues(options['venues'], seed=options['seed'])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            self.stdout.write(f"Synthetic data created in {time.perf_counter() - start:.1f} s")
+
+            # The default orderings plus the id tie breaker keyset pages add,
+            # so both ways of paging agree on where every row belongs.
+            listings = [
+                ('events', Event.objects.filter(event_type=event_type).select_related('venue')
+                 .order_by(*Event._meta.ordering, '-id')),
+                ('venues', Venue.objects.filter(status='active').order_by(*Venue._meta.ordering, '-id')),
+            ]
+            for label, queryset in listings:
+                self.stdout.write(f"\n{label}: {'page':>6} {'offset':>10} {'keyset':>10} {'approx count':>13}")
+                for number in pages:
+                    position = (number - 1) * options['page_size']
+                    if position and position >= queryset.count():
+                        continue
+                    if number == 1:
+                        cursor = None
+                    else:
+                        row = queryset[position - 1:position].get()
+                        cursor = cursor_after(row, queryset)
+                    offset_ms = self._time(
+                        lambda: list(Paginator(queryset, options['page_size']).page(number)), options['runs']
+                    )
+                    keyset_ms = self._time(
+                        lambda: list(paginate(queryset, cursor, options['page_size'])), options['runs']
+                    )
+                    approximate_ms = self._time(
+                        lambda: paginate(queryset, cursor, options['page_size'], count='approximate'), options['runs']
+                    )
+                    self.stdout.write(
+                        f"{'':7} {number:>6} {offset_ms:8.2f}ms {keyset_ms:8.2f}ms {approximate_ms:11.2f}ms"
+                    )
+                    if number > 1:
+                        expected = [row.pk for row in Paginator(queryset, options['page_size']).page(number)]
+                        if [row.pk for row in paginate(queryset, cursor, options['page_size'])] != expected:
+                            self.stdout.write(self.style.ERROR(f"{'':7} page {number} differs from OFFSET"))
+            transaction.set_rollback(True)
+
+    def _make_events(self, rng, count):
+        base = make_event()
+        event_type, _ = EventType.objects.get_or_create(name='Sports')
+        tag = uuid.uuid4().hex[:6].upper()
+        now = timezone.now()
+        events = [
+            Event(
+                event_id=f'EVT{tag}{i}', title=f'Paged event {i}', description='Benchmark event',
+                event_type=event_type, start_date=base.start_date, end_date=base.end_date,
+                start_time=base.start_time, end_time=base.end_time, expected_guests=50,
+                venue=base.venue, organizer=base.organizer, total_budget=1000, venue_cost=100, total_cost=100,
+            )
+            for i in range(count)
+        ]
+        Event.objects.bulk_create(events, batch_size=2000)
+        # auto_now_add stamps one time per batch: spread them out, with ties.
+        created = [now - timedelta(seconds=rng.randrange(count // 2 or 1)) for _ in range(count)]
+        ids = list(Event.objects.filter(event_id__startswith=f'EVT{tag}').values_list('id', flat=True))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'UPDATE {Event._meta.db_table} SET created_at = %s WHERE id = %s',
+                [(connection.ops.adapt_datetimefield_value(at), pk) for pk, at in zip(ids, created)],
+            )
+        return event_type
+
+    def _time(self, run, runs):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
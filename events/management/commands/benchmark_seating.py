@@ -0,0 +1,67 @@
+import math
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from events.seating import assign_seating, plan_seating
+
+from ._synthetic import make_event, make_guests
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the seating optimizer on synthetic events: random parties, '
+        'plus-ones, dietary needs and separated pairs. Reports the greedy-only '
+        'plan next to the time-budgeted plan and the cost of writing it back. '
+        'Everything is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--guests', type=int, default=5000)
+        parser.add_argument('--table-size', type=int, default=10)
+        parser.add_argument('--slack', type=float, default=0.05, help='Spare seat fraction beyond the seats needed.')
+        parser.add_argument('--separate', type=int, default=500, help='Guest pairs that must not share a table.')
+        parser.add_argument('--time-budget', type=float, default=2.0)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            event = make_event(expected_guests=options['guests'])
+            guests = make_guests(event, options['guests'], seed=options['seed'])
+            parties = self._parties(guests, rng)
+            separate = [tuple(rng.sample(guests, 2)) for _ in range(options['separate'])]
+            separate = [(a.id, b.id) for a, b in separate]
+            seats = sum(1 + guest.plus_ones for guest in guests)
+            tables = [options['table_size']] * math.ceil(seats * (1 + options['slack']) / options['table_size'])
+            self.stdout.write(
+                f"{len(guests)} guests needing {seats} seats, {len(parties)} parties, "
+                f"{len(separate)} separated pairs, {len(tables)} tables of {options['table_size']}"
+            )
+
+            for label, budget in (('greedy only', 0), (f"+ {options['time_budget']:g}s search", options['time_budget'])):
+                start = time.perf_counter()
+                plan = plan_seating(guests, tables, parties, separate, time_budget=budget, seed=options['seed'])
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'{label:>16}: {elapsed:.2f} s, {plan.conflicts} conflicts, diet cost {plan.diet_cost}, '
+                    f'{len(plan.unseated)} unseated, {plan.iterations:,} search steps'
+                )
+
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                assign_seating(event, tables, parties, separate, time_budget=options['time_budget'], seed=options['seed'])
+                elapsed = time.perf_counter() - start
+            self.stdout.write(f'  assign_seating: {elapsed:.2f} s end to end, {len(queries)} queries')
+            transaction.set_rollback(True)
+
+    def _parties(self, guests, rng):
+        parties, i = [], 0
+        while i < len(guests):
+            size = rng.choice([1, 1, 2, 2, 3, 4, 6])
+            parties.append([guest.id for guest in guests[i:i + size]])
+            i += size
+        return parties
@@ -0,0 +1,178 @@
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, time as clock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from events.models import Event, EventGuest, EventType
+from users.models import CustomUser, UserActivity
+from venues.models import Venue, VenueCategory
+
+# The tuned profile when settings run SQLite untuned.
+TUNED_PRAGMAS = {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 5000, 'mmap_size': 268435456}
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the same mixed read/write load from concurrent threads against '
+        'copies of the database opened with Django\'s stock SQLite settings '
+        'and with the tuned profile (event_manager.sqlite), and compare '
+        'throughput, latency and "database is locked" errors.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--seconds', type=float, default=10.0, help='Length of each run')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Share of requests that write')
+        parser.add_argument('--long-read-ratio', type=float, default=0.02, help='Share of requests that read every guest')
+        parser.add_argument('--events', type=int, default=500)
+        parser.add_argument('--guests', type=int, default=50000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if settings.DATABASES['default']['ENGINE'] not in ('django.db.backends.sqlite3', 'event_manager.sqlite'):
+            raise CommandError('The default database is not SQLite.')
+        # Next to the real database, so fsync costs what it costs there.
+        workdir = tempfile.mkdtemp(prefix='sqlite-bench-', dir=os.path.dirname(str(settings.DATABASES['default']['NAME'])))
+        try:
+            template = os.path.join(workdir, 'template.sqlite3')
+            source = sqlite3.connect(str(settings.DATABASES['default']['NAME']))
+            target = sqlite3.connect(template)
+            source.backup(target)
+            source.close()
+            target.execute('PRAGMA journal_mode = DELETE')
+            target.close()
+            self._add_alias('bench_seed', {'ENGINE': 'django.db.backends.sqlite3', 'NAME': template})
+            event_ids, user_ids = self._seed('bench_seed', options)
+            connections['bench_seed'].close()
+
+            pragmas = getattr(settings, 'SQLITE_PRAGMAS', TUNED_PRAGMAS)
+            profiles = [
+                ('stock', {'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': 0}, None),
+                ('tuned', {
+                    'ENGINE': 'event_manager.sqlite', 'OPTIONS': {'pragmas': pragmas},
+                    'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True,
+                }, 'ro'),
+            ]
+            self.stdout.write(
+                f"{options['threads']} threads, {options['write_ratio']:.0%} writes, "
+                f"{options['long_read_ratio']:.0%} long reads, {options['seconds']:.0f} s per profile\n"
+            )
+            self.stdout.write(f"{'profile':<8} {'requests/s':>11} {'p50':>9} {'p99':>9} {'locked':>7}")
+            for name, params, read_only in profiles:
+                path = os.path.join(workdir, f'{name}.sqlite3')
+                shutil.copy(template, path)
+                self._add_alias(f'bench_{name}', {**params, 'NAME': path})
+                long_alias = f'bench_{name}'
+                if read_only:
+                    long_alias = f'bench_{name}_ro'
+                    self._add_alias(long_alias, {**params, 'NAME': f'file:{path}?mode=ro'})
+                throughput, p50, p99, locked = self._run(f'bench_{name}', long_alias, event_ids, user_ids, options)
+                self.stdout.write(f"{name:<8} {throughput:>11.0f} {p50:7.2f}ms {p99:7.2f}ms {locked:>7}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _add_alias(self, alias, params):
+        connections.settings[alias] = connections.configure_settings({
+            'default': settings.DATABASES['default'], alias: dict(params),
+        })[alias]
+
+    def _seed(self, alias, options):
+        # bulk_create throughout: no signals, so nothing reaches the real database.
+        rng = random.Random(options['seed'])
+        CustomUser.objects.using(alias).bulk_create([
+            CustomUser(username=f'sqlite-bench-{i}', email=f'sqlite-bench-{i}@example.com', user_type='manager')
+            for i in range(20)
+        ])
+        category = VenueCategory.objects.using(alias).create(name='SQLite benchmark')
+        event_type = EventType.objects.using(alias).create(name='SQLite benchmark')
+        venue = Venue(
+            venue_id='VENUESQLBENCH', slug='sqlite-bench-hall', name='SQLite Bench Hall', category=category,
+            address='1 Bench St', city='Bench City', state='BC', country='US', capacity_max=500,
+            base_price=1000, description='Benchmark venue',
+        )
+        Venue.objects.using(alias).bulk_create([venue])
+        venue = Venue.objects.using(alias).get(venue_id='VENUESQLBENCH')
+        user_ids = list(CustomUser.objects.using(alias).filter(username__startswith='sqlite-bench-').values_list('id', flat=True))
+        Event.objects.using(alias).bulk_create([
+            Event(
+                event_id=f'SQLB{i}', title=f'SQLite bench event {i}', description='Benchmark event',
+                event_type=event_type, start_date=date(2030, 1, 1), end_date=date(2030, 1, 1),
+                start_time=clock(18), end_time=clock(23), expected_guests=100, venue=venue,
+                organizer_id=rng.choice(user_ids), event_manager_id=rng.choice(user_ids),
+                status=rng.choice(['published', 'draft']), total_budget=1000, venue_cost=100, total_cost=100,
+            )
+            for i in range(options['events'])
+        ], batch_size=1000)
+        event_ids = list(Event.objects.using(alias).filter(event_id__startswith='SQLB').values_list('id', flat=True))
+        EventGuest.objects.using(alias).bulk_create([
+            EventGuest(event_id=rng.choice(event_ids), name=f'Guest {i}', email=f'guest{i}@example.com')
+            for i in range(options['guests'])
+        ], batch_size=5000)
+        with connections[alias].cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return event_ids, user_ids
+
+    def _run(self, alias, long_alias, event_ids, user_ids, options):
+        timings = []
+        locked = []
+        deadline = time.perf_counter() + options['seconds']
+
+        def client(seed):
+            rng = random.Random(seed)
+            local, errors = [], 0
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                roll = rng.random()
+                try:
+                    if roll < options['write_ratio']:
+                        # A booking: read, then write, in one transaction.
+                        event_id = rng.choice(event_ids)
+                        email = f'walk-in-{rng.randrange(10 ** 9)}@example.com'
+                        with transaction.atomic(using=alias):
+                            if not EventGuest.objects.using(alias).filter(event_id=event_id, email=email).exists():
+                                EventGuest.objects.using(alias).create(event_id=event_id, name='Walk-in', email=email)
+                            UserActivity.objects.using(alias).create(
+                                user_id=rng.choice(user_ids), activity_type='event_booking', metadata={'event_id': event_id},
+                            )
+                    elif roll < options['write_ratio'] + options['long_read_ratio']:
+                        # An export: every guest, in seating order.
+                        for _ in EventGuest.objects.using(long_alias).order_by('table_number', 'seat_number', 'name', 'id').values_list('name', 'email').iterator(chunk_size=2000):
+                            pass
+                    else:
+                        list(
+                            Event.objects.using(alias).filter(status='published').select_related('venue')
+                            .order_by('-created_at', '-id')[:20]
+                        )
+                        EventGuest.objects.using(alias).filter(event_id=rng.choice(event_ids)).count()
+                except OperationalError as error:
+                    if 'locked' not in str(error):
+                        raise
+                    errors += 1
+                local.append((time.perf_counter() - start) * 1000)
+                # What request_finished does after every request.
+                for name in (alias, long_alias):
+                    connections[name].close_if_unusable_or_obsolete()
+            timings.extend(local)
+            locked.append(errors)
+            for name in (alias, long_alias):
+                connections[name].close()
+
+        threads = [threading.Thread(target=client, args=(options['seed'] + i,)) for i in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        timings.sort()
+        return (
+            len(timings) / options['seconds'], statistics.median(timings),
+            timings[int(len(timings) * 0.99)], sum(locked),
+        )
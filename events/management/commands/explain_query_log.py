@@ -0,0 +1,119 @@
+import json
+from collections import OrderedDict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+
+from event_manager.query_log import EXPLAINABLE, explain, read_query_log, statement_kind, time_statement
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a captured query log (see event_manager.query_log) against the '
+        'database, EXPLAIN every distinct statement and report those that scan '
+        'a table without an index. Optionally time each SELECT and compare '
+        'with an earlier --output report.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('logs', nargs='+', help='JSON-lines query log files')
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--runs', type=int, default=0, help='Time each SELECT this many times (0: explain only)')
+        parser.add_argument('--min-rows', type=int, default=1000,
+                            help='Ignore full scans of tables smaller than this')
+        parser.add_argument('--top', type=int, default=20, help='Statements to list in detail')
+        parser.add_argument('--output', help='Write the report as JSON to this file')
+        parser.add_argument('--baseline', help='Compare with a report written earlier by --output')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        statements = OrderedDict()
+        skipped = 0
+        for path in options['logs']:
+            try:
+                entries = list(read_query_log(path))
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read {path}: {exc}")
+            for sql, params, ms in entries:
+                if statement_kind(sql) not in EXPLAINABLE:
+                    skipped += 1
+                    continue
+                stats = statements.setdefault(sql, {'params': params, 'count': 0, 'logged_ms': 0.0})
+                stats['count'] += 1
+                stats['logged_ms'] += ms or 0.0
+
+        table_rows = {}
+        report = OrderedDict()
+        for sql, stats in statements.items():
+            try:
+                plan, scans, sorts = explain(sql, stats['params'], using)
+            except DatabaseError as exc:
+                report[sql] = {'count': stats['count'], 'error': str(exc)}
+                continue
+            scans = [table for table in scans if self._rows(using, table, table_rows) >= options['min_rows']]
+            entry = {
+                'count': stats['count'],
+                'logged_ms': round(stats['logged_ms'], 3),
+                'plan': plan,
+                'scans': scans,
+                'sorts': sorts,
+            }
+            if options['runs'] and statement_kind(sql) == 'SELECT':
+                entry['ms'] = round(time_statement(sql, stats['params'], options['runs'], using), 3)
+            report[sql] = entry
+
+        baseline = self._load(options['baseline']) if options['baseline'] else {}
+        self._print(report, baseline, options['top'], skipped)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as out:
+                json.dump(report, out, indent=2)
+
+    def _rows(self, using, table, cache):
+        if table not in cache:
+            connection = connections[using]
+            with connection.cursor() as cursor:
+                try:
+                    cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+                    cache[table] = cursor.fetchone()[0]
+                except DatabaseError:
+                    cache[table] = 0
+        return cache[table]
+
+    def _load(self, path):
+        try:
+            with open(path, encoding='utf-8') as baseline:
+                return json.load(baseline)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read baseline {path}: {exc}")
+
+    def _print(self, report, baseline, top, skipped):
+        flagged = [sql for sql, entry in report.items() if entry.get('scans')]
+        errors = [sql for sql, entry in report.items() if 'error' in entry]
+        self.stdout.write(
+            f"{len(report)} distinct statements ({skipped} non-query statements skipped), "
+            f"{len(flagged)} with unindexed scans, {len(errors)} could not be explained"
+        )
+
+        def weight(sql):
+            entry = report[sql]
+            return entry.get('ms', entry.get('logged_ms', 0) / max(entry['count'], 1)) * entry['count']
+
+        for sql in sorted(flagged, key=weight, reverse=True)[:top]:
+            entry = report[sql]
+            self.stdout.write(self.style.WARNING(f"\n[{entry['count']}x] scans {', '.join(entry['scans'])}"))
+            self.stdout.write(f"  {sql[:300]}")
+            for line in entry['plan']:
+                self.stdout.write(f"    {line}")
+
+        timed = [sql for sql, entry in report.items() if 'ms' in entry]
+        if timed:
+            self.stdout.write('\nSlowest statements (median ms):')
+            for sql in sorted(timed, key=lambda sql: report[sql]['ms'], reverse=True)[:top]:
+                entry = report[sql]
+                line = f"  {entry['ms']:9.3f}"
+                before = baseline.get(sql, {})
+                if 'ms' in before:
+                    line += f"  (was {before['ms']:.3f}, scans {len(before.get('scans', []))} -> {len(entry['scans'])})"
+                self.stdout.write(f"{line}  {sql[:120]}")
+        for sql in errors[:top]:
+            self.stdout.write(self.style.ERROR(f"\ncould not explain: {report[sql]['error']}\n  {sql[:300]}"))
@@ -0,0 +1,29 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events.guests import iter_guest_csv, write_guest_xlsx
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Export an event guest list, with seating and RSVP status, to a CSV or XLSX file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_id', type=int)
+        parser.add_argument('path', help='Destination .csv or .xlsx file.')
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.get(pk=options['event_id'])
+        except Event.DoesNotExist:
+            raise CommandError(f"Event {options['event_id']} does not exist.")
+        file_format = os.path.splitext(options['path'])[1].lower().lstrip('.')
+        if file_format == 'xlsx':
+            write_guest_xlsx(event, options['path'])
+        elif file_format == 'csv':
+            with open(options['path'], 'w', newline='', encoding='utf-8') as fileobj:
+                fileobj.writelines(iter_guest_csv(event))
+        else:
+            raise CommandError('Guest lists must be exported as .csv or .xlsx files.')
+        self.stdout.write(self.style.SUCCESS(f"Exported {event.guests.count()} guests to {options['path']}."))
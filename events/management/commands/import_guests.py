@@ -0,0 +1,39 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events.guests import CHUNK_SIZE, import_guests, iter_rows
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Import a CSV or XLSX guest list into an event, de-duplicating on email/phone.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_id', type=int)
+        parser.add_argument('path', help='Path to a .csv or .xlsx file.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows written per bulk query.')
+        parser.add_argument('--skip-existing', action='store_true', help='Leave guests already on the list untouched.')
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.get(pk=options['event_id'])
+        except Event.DoesNotExist:
+            raise CommandError(f"Event {options['event_id']} does not exist.")
+        file_format = os.path.splitext(options['path'])[1].lower().lstrip('.')
+        if file_format not in ('csv', 'xlsx'):
+            raise CommandError('Guest lists must be .csv or .xlsx files.')
+
+        with open(options['path'], 'rb') as fileobj:
+            result = import_guests(
+                event,
+                iter_rows(fileobj, file_format),
+                update_existing=not options['skip_existing'],
+                chunk_size=options['chunk_size'],
+            )
+        for row_number, error in result.errors:
+            self.stderr.write(f'Row {row_number}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{result.created} added, {result.updated} updated, {result.duplicates} duplicates skipped, '
+            f'{len(result.errors)} invalid rows reported.'
+        ))
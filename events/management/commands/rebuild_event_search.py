@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from events import search
+
+
+class Command(BaseCommand):
+    help = 'Re-index every event for full-text search (after bulk loads that bypass signals).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with transaction.atomic(using=options['database']):
+            indexed = search.rebuild(options['database'], options['batch_size'])
+        backend = search.get_backend(options['database']).name
+        self.stdout.write(f"Indexed {indexed} events with the {backend} backend in {time.perf_counter() - start:.1f} s")
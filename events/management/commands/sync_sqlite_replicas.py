@@ -0,0 +1,39 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from event_manager.routers import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the SQLite primary into every SQLite replica in DB_REPLICAS, for '
+        'trying the replica routing locally. --loop keeps them trailing the '
+        'primary like real replicas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep copying instead of exiting after one pass.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between copies with --loop.')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('The primary is not SQLite; use the database\'s own replication.')
+        aliases = replicas()
+        if not aliases:
+            raise CommandError('No replicas configured; set DB_REPLICAS to one or more SQLite files.')
+        while True:
+            for alias in aliases:
+                connections[alias].close()
+                source = sqlite3.connect(str(connections['default'].settings_dict['NAME']))
+                target = sqlite3.connect(str(connections[alias].settings_dict['NAME']))
+                with target:
+                    source.backup(target)
+                source.close()
+                target.close()
+                self.stdout.write(f"Copied the primary to {alias} ({connections[alias].settings_dict['NAME']}).")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0005_availability_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["event_type", "sub_category", "skill_level", "start_date"],
+                name="events_type_subcat_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["event_manager", "created_at"],
+                name="events_manager_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="registration",
+            index=models.Index(fields=["email"], name="registration_email_idx"),
+        ),
+    ]
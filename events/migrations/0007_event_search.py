@@ -0,0 +1,77 @@
+from django.db import migrations
+
+SEARCH_TABLE = "events_search"
+COLUMNS = ["title", "tags", "theme", "venue_name", "description"]
+
+
+def create_search_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA compile_options")
+            if ("ENABLE_FTS5",) not in cursor.fetchall():
+                return  # events.search falls back to its in-process index
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+            f"event_type_id UNINDEXED, {', '.join(COLUMNS)}, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        insert = (
+            f"INSERT INTO {SEARCH_TABLE} (rowid, event_type_id, {', '.join(COLUMNS)})"
+        )
+    elif connection.vendor == "mysql":
+        schema_editor.execute(
+            f"CREATE TABLE {SEARCH_TABLE} ("
+            "event_id bigint NOT NULL PRIMARY KEY, event_type_id bigint NULL, "
+            "title varchar(200) NOT NULL, tags longtext NOT NULL, theme varchar(100) NOT NULL, "
+            "venue_name varchar(200) NOT NULL, description longtext NOT NULL, "
+            "KEY events_search_type_idx (event_type_id), "
+            f"FULLTEXT KEY events_search_text_idx ({', '.join(COLUMNS)})"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+        )
+        insert = f"INSERT INTO {SEARCH_TABLE} (event_id, event_type_id, {', '.join(COLUMNS)})"
+    else:
+        return
+
+    Event = apps.get_model("events", "Event")
+    rows = []
+    for event in (
+        Event.objects.select_related("venue").order_by("pk").iterator(chunk_size=2000)
+    ):
+        tags = (
+            event.tags
+            if isinstance(event.tags, (list, tuple))
+            else [event.tags] if event.tags else []
+        )
+        rows.append(
+            (
+                event.pk,
+                event.event_type_id,
+                event.title or "",
+                " ".join(str(tag) for tag in tags),
+                event.theme or "",
+                event.venue.name,
+                event.description or "",
+            )
+        )
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), 2000):
+            cursor.executemany(
+                f"{insert} VALUES ({', '.join(['%s'] * 7)})", rows[start : start + 2000]
+            )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor in ("sqlite", "mysql"):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0006_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
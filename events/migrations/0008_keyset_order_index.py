@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 08:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0007_event_search"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["event_type", "created_at"], name="events_type_created_idx"
+            ),
+        ),
+    ]
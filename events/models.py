@@ -116,6 +116,18 @@ class Event(models.Model):
     class Meta:
         db_table = 'events'
         ordering = ['-created_at']
+        indexes = [
+            # Venue availability: bookings overlapping a day, and per venue
+            models.Index(fields=['start_date', 'end_date'], name='events_dates_idx'),
+            models.Index(fields=['venue', 'start_date'], name='events_venue_start_idx'),
+            # Category listings (sports_events and friends) and their tab values
+            models.Index(fields=['event_type', 'sub_category', 'skill_level', 'start_date'], name='events_type_subcat_idx'),
+            # Keyset pages of a category listing in the default order (-created_at,
+            # -id): read backwards, an ascending index matches it column for column
+            models.Index(fields=['event_type', 'created_at'], name='events_type_created_idx'),
+            # A manager's events, newest first (manager dashboards)
+            models.Index(fields=['event_manager', 'created_at'], name='events_manager_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.start_date}"
@@ -449,5 +461,11 @@ class Registration(models.Model):
     phone = models.CharField(max_length=20)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # booking_page lists a visitor's registrations by email
+            models.Index(fields=['email'], name='registration_email_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.event.title}"
@@ -0,0 +1,395 @@
+"""
+Ranked full-text search over events.
+
+Every event is indexed as one document made of its title, description,
+tags, theme and venue name, and searches return event ids ordered by
+BM25 relevance. The index lives in a shadow table kept up to date by
+events.signals (rebuild_event_search refills it after bulk loads):
+
+* SQLite: an FTS5 virtual table, ranked with its bm25() function.
+* MySQL (USE_MYSQL): an InnoDB table with a FULLTEXT index, ranked by
+  MySQL's own relevance score.
+* Anything else, or SQLite built without FTS5: an inverted index held in
+  the process and scored with BM25 in Python. It is built on first use
+  and only sees the changes made by the same process, so it suits
+  development and single-process deployments.
+
+EVENT_SEARCH_BACKEND ('auto', 'sqlite', 'mysql' or 'python') overrides
+the choice. All terms of a query must match; the last one also matches
+as a prefix, so partly typed words find results.
+"""
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.db import connections, transaction
+
+SEARCH_TABLE = 'events_search'
+# Relative weight of each indexed field, in table column order.
+FIELD_WEIGHTS = {
+    'title': 10.0,
+    'tags': 5.0,
+    'theme': 3.0,
+    'venue_name': 2.0,
+    'description': 1.0,
+}
+MAX_RESULTS = 1000
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_WORD = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    """
+    Lower-case words of text without diacritics, split the way the FTS5
+    unicode61 tokenizer splits them.
+    """
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _WORD.findall(text.lower())
+
+
+def document(event):
+    """
+    {field: text} of the indexed fields of an event.
+    """
+    tags = event.tags if isinstance(event.tags, (list, tuple)) else [event.tags] if event.tags else []
+    return {
+        'title': event.title or '',
+        'tags': ' '.join(str(tag) for tag in tags),
+        'theme': event.theme or '',
+        'venue_name': event.venue.name if event.venue_id else '',
+        'description': event.description or '',
+    }
+
+
+def _rows(events):
+    for event in events:
+        yield (event.pk, event.event_type_id, *document(event).values())
+
+
+# Backends
+
+class SQLiteBackend:
+    name = 'sqlite'
+
+    def __init__(self, using):
+        self.using = using
+
+    def index(self, events):
+        rows = list(_rows(events))
+        if not rows:
+            return
+        with connections[self.using].cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, event_type_id, {", ".join(FIELD_WEIGHTS)}) '
+                f'VALUES (%s, %s, {", ".join(["%s"] * len(FIELD_WEIGHTS))})',
+                rows,
+            )
+
+    def remove(self, event_ids):
+        with connections[self.using].cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(pk,) for pk in event_ids])
+
+    def clear(self):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+    def search(self, terms, event_type_id, limit):
+        match = ' '.join(f'"{term}"' for term in terms) + '*'
+        # bm25() weights follow the column order; event_type_id is UNINDEXED.
+        weights = ', '.join(['0'] + [str(weight) for weight in FIELD_WEIGHTS.values()])
+        sql = f'SELECT rowid, bm25({SEARCH_TABLE}, {weights}) AS score FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s'
+        params = [match]
+        if event_type_id is not None:
+            sql += ' AND event_type_id = %s'
+            params.append(event_type_id)
+        sql += ' ORDER BY score LIMIT %s'
+        params.append(limit)
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(sql, params)
+            # bm25() is negative, best first.
+            return [(pk, -score) for pk, score in cursor.fetchall()]
+
+
+class MySQLBackend:
+    name = 'mysql'
+    COLUMNS = ', '.join(FIELD_WEIGHTS)
+
+    def __init__(self, using):
+        self.using = using
+
+    def index(self, events):
+        rows = list(_rows(events))
+        if not rows:
+            return
+        updates = ', '.join(f'{column} = VALUES({column})' for column in ['event_type_id', *FIELD_WEIGHTS])
+        with connections[self.using].cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (event_id, event_type_id, {self.COLUMNS}) '
+                f'VALUES (%s, %s, {", ".join(["%s"] * len(FIELD_WEIGHTS))}) ON DUPLICATE KEY UPDATE {updates}',
+                rows,
+            )
+
+    def remove(self, event_ids):
+        with connections[self.using].cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE event_id = %s', [(pk,) for pk in event_ids])
+
+    def clear(self):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+    def search(self, terms, event_type_id, limit):
+        against = ' '.join(f'+{term}' for term in terms) + '*'
+        sql = (
+            f'SELECT event_id, MATCH ({self.COLUMNS}) AGAINST (%s IN BOOLEAN MODE) AS score FROM {SEARCH_TABLE} '
+            f'WHERE MATCH ({self.COLUMNS}) AGAINST (%s IN BOOLEAN MODE)'
+        )
+        params = [against, against]
+        if event_type_id is not None:
+            sql += ' AND event_type_id = %s'
+            params.append(event_type_id)
+        sql += ' ORDER BY score DESC LIMIT %s'
+        params.append(limit)
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(sql, params)
+            return [(pk, float(score)) for pk, score in cursor.fetchall()]
+
+
+class PythonBackend:
+    """
+    In-process inverted index with BM25F-style field weights: a term's
+    frequency in a document is the weighted sum of its frequencies in the
+    fields, and so is the document length.
+    """
+    name = 'python'
+
+    def __init__(self, using):
+        self.using = using
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._postings = defaultdict(dict)  # term -> {event_id: weighted frequency}
+        self._documents = {}  # event_id -> (event_type_id, weighted length, terms)
+        self._total_length = 0.0
+        self._vocabulary = None  # sorted terms, rebuilt after new terms appear
+
+    def _load(self):
+        from .models import Event
+
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            events = Event.objects.using(self.using).select_related('venue').order_by('pk')
+            for event in events.iterator(chunk_size=2000):
+                self._add(*next(_rows([event])))
+
+    def _add(self, pk, event_type_id, *texts):
+        self._discard(pk)
+        frequencies = defaultdict(float)
+        for text, weight in zip(texts, FIELD_WEIGHTS.values()):
+            for term in tokenize(text):
+                frequencies[term] += weight
+        for term, frequency in frequencies.items():
+            if term not in self._postings:
+                self._vocabulary = None
+            self._postings[term][pk] = frequency
+        length = sum(frequencies.values())
+        self._documents[pk] = (event_type_id, length, tuple(frequencies))
+        self._total_length += length
+
+    def _discard(self, pk):
+        entry = self._documents.pop(pk, None)
+        if entry is None:
+            return
+        _, length, terms = entry
+        self._total_length -= length
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(pk, None)
+            if not postings:
+                del self._postings[term]
+                self._vocabulary = None
+
+    def _apply(self, rows, removed):
+        with self._lock:
+            if not self._loaded:
+                return  # the first search loads the committed state
+            for pk in removed:
+                self._discard(pk)
+            for row in rows:
+                self._add(*row)
+
+    def index(self, events):
+        rows = list(_rows(events))
+        transaction.on_commit(lambda: self._apply(rows, ()), using=self.using)
+
+    def remove(self, event_ids):
+        event_ids = list(event_ids)
+        transaction.on_commit(lambda: self._apply((), event_ids), using=self.using)
+
+    def clear(self):
+        with self._lock:
+            self._loaded = False
+            self._postings.clear()
+            self._documents.clear()
+            self._total_length = 0.0
+            self._vocabulary = None
+
+    def _expand(self, prefix):
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        start = bisect_left(self._vocabulary, prefix)
+        terms = []
+        for term in self._vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, terms, event_type_id, limit):
+        self._load()
+        with self._lock:
+            count = len(self._documents)
+            if not count:
+                return []
+            average_length = self._total_length / count
+            # Every term is one group of postings; the last expands to its prefix matches.
+            groups = [[term] for term in terms[:-1]] + [self._expand(terms[-1])]
+            group_postings = [[self._postings[term] for term in group if term in self._postings] for group in groups]
+            if not all(group_postings):
+                return []
+            # Score group by group, smallest first, keeping only the documents
+            # every group so far has matched: one pass over each posting list.
+            group_postings.sort(key=lambda group: sum(len(postings) for postings in group))
+            scores = None
+            for group in group_postings:
+                matched = defaultdict(float)
+                for postings in group:
+                    idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    if scores is not None and len(scores) < len(postings):
+                        items = ((pk, postings[pk]) for pk in scores if pk in postings)
+                    else:
+                        items = postings.items()
+                    for pk, frequency in items:
+                        if scores is not None and pk not in scores:
+                            continue
+                        event_type, length, _ = self._documents[pk]
+                        if event_type_id is not None and event_type != event_type_id:
+                            continue
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                        matched[pk] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                if scores is not None:
+                    for pk, score in matched.items():
+                        matched[pk] = score + scores[pk]
+                scores = matched
+                if not scores:
+                    return []
+            scored = ((score, pk) for pk, score in scores.items())
+            return [(pk, score) for score, pk in heapq.nlargest(limit, scored)]
+
+
+_BACKENDS = {backend.name: backend for backend in (SQLiteBackend, MySQLBackend, PythonBackend)}
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def _choose(using):
+    name = getattr(settings, 'EVENT_SEARCH_BACKEND', 'auto')
+    if name != 'auto':
+        return name
+    connection = connections[using]
+    if connection.vendor in ('sqlite', 'mysql'):
+        with connection.cursor() as cursor:
+            if SEARCH_TABLE in connection.introspection.table_names(cursor):
+                return connection.vendor
+    return 'python'
+
+
+def get_backend(using='default'):
+    with _instances_lock:
+        if using not in _instances:
+            _instances[using] = _BACKENDS[_choose(using)](using)
+        return _instances[using]
+
+
+# Public API
+
+def index_events(events, using='default'):
+    """
+    Add or refresh events (with their venues selected) in the index.
+    """
+    get_backend(using).index(events)
+
+
+def remove_events(event_ids, using='default'):
+    get_backend(using).remove(event_ids)
+
+
+def rebuild(using='default', batch_size=2000):
+    """
+    Re-index every event; returns how many were indexed.
+    """
+    from .models import Event
+
+    backend = get_backend(using)
+    backend.clear()
+    if isinstance(backend, PythonBackend):
+        backend._load()
+        return len(backend._documents)
+    indexed = 0
+    events = Event.objects.using(using).select_related('venue').order_by('pk')
+    batch = []
+    for event in events.iterator(chunk_size=batch_size):
+        batch.append(event)
+        if len(batch) == batch_size:
+            backend.index(batch)
+            indexed += len(batch)
+            batch = []
+    backend.index(batch)
+    return indexed + len(batch)
+
+
+def search(query, event_type=None, limit=MAX_RESULTS, using='default'):
+    """
+    [(event_id, score), ...] of the events matching every word of query,
+    most relevant first; optionally only events of event_type.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return []
+    event_type_id = getattr(event_type, 'pk', event_type)
+    return get_backend(using).search(terms, event_type_id, limit)
+
+
+def ranked_ids(query, event_type=None, limit=MAX_RESULTS, using='default'):
+    return [pk for pk, _ in search(query, event_type, limit, using)]
+
+
+class RankedResults(Sequence):
+    """
+    The events of queryset among ids, in the order of ids, loading only the
+    slices asked for; pass it to a Paginator in place of the queryset.
+    """
+    def __init__(self, queryset, ids):
+        self.queryset = queryset
+        allowed = set(queryset.filter(pk__in=ids).values_list('pk', flat=True))
+        self.ids = [pk for pk in ids if pk in allowed]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            ids = self.ids[index]
+            events = self.queryset.in_bulk(ids)
+            return [events[pk] for pk in ids if pk in events]
+        return self.queryset.get(pk=self.ids[index])
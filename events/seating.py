@@ -0,0 +1,275 @@
+"""
+Seating-plan optimizer for EventGuest table assignment.
+
+A guest occupies 1 + plus_ones seats, and guests listed together as a
+party are seated at the same table as one unit. The plan minimises
+
+    CONFLICT_PENALTY * (separated pairs sharing a table)
+    + sum over tables of the distinct dietary needs served there
+
+so keeping listed pairs apart always wins over dietary grouping, and
+guests with the same dietary need end up on as few tables as possible.
+A greedy best-fit pass builds the first plan and a local search of unit
+moves and swaps improves it until the time budget runs out.
+"""
+import random
+import time
+from collections import Counter, defaultdict, namedtuple
+
+from django.db import transaction
+from django.db.models import Q
+
+from .guests import update_guests
+from .models import EventGuest
+
+CONFLICT_PENALTY = 1000
+DEFAULT_TIME_BUDGET = 2.0
+# Guests with these statuses do not need a seat.
+UNSEATED_STATUSES = ('declined', 'no_show')
+
+SeatingPlan = namedtuple('SeatingPlan', ['assignments', 'unseated', 'conflicts', 'diet_cost', 'iterations'])
+
+
+def dietary_key(value):
+    return ' '.join((value or '').lower().split())
+
+
+class _Unit:
+    """
+    Guests that must share a table.
+    """
+    __slots__ = ('guests', 'size', 'diets', 'table')
+
+    def __init__(self, guests):
+        self.guests = guests
+        self.size = sum(1 + guest.plus_ones for guest in guests)
+        self.diets = Counter(key for key in (dietary_key(guest.dietary_restrictions) for guest in guests) if key)
+        self.table = None
+
+
+class _Table:
+    __slots__ = ('number', 'capacity', 'used', 'units', 'guest_ids', 'diets', 'conflicts')
+
+    def __init__(self, number, capacity):
+        self.number = number
+        self.capacity = capacity
+        self.used = 0
+        self.units = []
+        self.guest_ids = set()
+        self.diets = Counter()
+        self.conflicts = 0
+
+    @property
+    def free(self):
+        return self.capacity - self.used
+
+    @property
+    def cost(self):
+        return CONFLICT_PENALTY * self.conflicts + len(self.diets)
+
+
+class _Planner:
+    def __init__(self, units, tables, separate, rng):
+        self.units = units
+        self.tables = tables
+        self.rng = rng
+        self.avoid = defaultdict(set)
+        for a, b in separate:
+            self.avoid[a].add(b)
+            self.avoid[b].add(a)
+
+    def conflicts_with(self, unit, table):
+        return sum(
+            1
+            for guest in unit.guests
+            for other in self.avoid.get(guest.id, ())
+            if other in table.guest_ids
+        )
+
+    def add(self, unit, table):
+        table.conflicts += self.conflicts_with(unit, table)
+        table.used += unit.size
+        table.units.append(unit)
+        table.guest_ids.update(guest.id for guest in unit.guests)
+        table.diets.update(unit.diets)
+        unit.table = table
+
+    def remove(self, unit):
+        table = unit.table
+        table.used -= unit.size
+        table.units.remove(unit)
+        table.guest_ids.difference_update(guest.id for guest in unit.guests)
+        table.diets.subtract(unit.diets)
+        table.diets += Counter()  # drop zero counts
+        table.conflicts -= self.conflicts_with(unit, table)
+        unit.table = None
+
+    def greedy(self):
+        """
+        Seat units largest first, dietary groups together, each at the
+        table where it adds the least cost, breaking ties by best fit.
+        Returns the units that fit nowhere.
+        """
+        order = sorted(self.units, key=lambda unit: (not unit.diets, sorted(unit.diets), -unit.size))
+        unseated = []
+        for unit in order:
+            best, best_key = None, None
+            for table in self.tables:
+                if table.free < unit.size:
+                    continue
+                new_diets = sum(1 for diet in unit.diets if diet not in table.diets)
+                key = (self.conflicts_with(unit, table), new_diets, table.free - unit.size)
+                if best_key is None or key < best_key:
+                    best, best_key = table, key
+                    if key == (0, 0, 0):
+                        break
+            if best is None:
+                unseated.append(unit)
+            else:
+                self.add(unit, best)
+        return unseated
+
+    def improve(self, deadline):
+        """
+        Hill-climb with random moves and swaps of units between tables,
+        accepting any change that does not raise the cost.
+        """
+        seated = [unit for unit in self.units if unit.table is not None]
+        if len(seated) < 2 or len(self.tables) < 2 or time.perf_counter() >= deadline:
+            return 0
+        # Half the moves aim a unit at a table serving one of its diets.
+        by_diet = defaultdict(list)
+        for unit in seated:
+            for diet in unit.diets:
+                by_diet[diet].append(unit)
+        iterations = 0
+        while True:
+            iterations += 1
+            if iterations % 256 == 0 and time.perf_counter() >= deadline:
+                return iterations
+            unit = self.rng.choice(seated)
+            source = unit.table
+            if unit.diets and self.rng.random() < 0.5:
+                target = self.rng.choice(by_diet[self.rng.choice(list(unit.diets))]).table
+            else:
+                target = self.rng.choice(self.tables)
+            if target is source:
+                continue
+            before = source.cost + target.cost
+            if target.free >= unit.size:
+                self.remove(unit)
+                self.add(unit, target)
+                if source.cost + target.cost > before:
+                    self.remove(unit)
+                    self.add(unit, source)
+                continue
+            if not target.units:
+                continue
+            other = self.rng.choice(target.units)
+            if target.free + other.size < unit.size or source.free + unit.size < other.size:
+                continue
+            self.remove(unit)
+            self.remove(other)
+            self.add(unit, target)
+            self.add(other, source)
+            if source.cost + target.cost > before:
+                self.remove(unit)
+                self.remove(other)
+                self.add(unit, source)
+                self.add(other, target)
+
+
+def _build_units(guests, parties):
+    by_id = {guest.id: guest for guest in guests}
+    units, placed = [], set()
+    for party in parties:
+        members = [by_id[guest_id] for guest_id in party if guest_id in by_id and guest_id not in placed]
+        if members:
+            placed.update(guest.id for guest in members)
+            units.append(_Unit(members))
+    units.extend(_Unit([guest]) for guest in guests if guest.id not in placed)
+    return units
+
+
+def _split_oversized(units, largest):
+    """
+    A party bigger than the largest table cannot stay together; split it
+    into table-sized pieces rather than leaving it unseated.
+    """
+    result = []
+    for unit in units:
+        if unit.size <= largest:
+            result.append(unit)
+            continue
+        piece, size = [], 0
+        for guest in unit.guests:
+            if piece and size + 1 + guest.plus_ones > largest:
+                result.append(_Unit(piece))
+                piece, size = [], 0
+            piece.append(guest)
+            size += 1 + guest.plus_ones
+        result.append(_Unit(piece))
+    return result
+
+
+def plan_seating(guests, tables, parties=(), separate=(), time_budget=DEFAULT_TIME_BUDGET, seed=None):
+    """
+    Assign guests to tables without touching the database.
+
+    tables is {table_number: capacity} or a list of capacities numbered
+    from 1; parties is an iterable of guest-id groups to seat together;
+    separate is an iterable of guest-id pairs that must not share a table.
+    Returns a SeatingPlan whose assignments map guest id to
+    (table_number, seat_number); seat_number is the guest's first seat,
+    with their plus-ones in the seats after it.
+    """
+    if not isinstance(tables, dict):
+        tables = {number: capacity for number, capacity in enumerate(tables, start=1)}
+    tables = [_Table(number, capacity) for number, capacity in sorted(tables.items()) if capacity > 0]
+    deadline = time.perf_counter() + time_budget
+
+    units = _build_units(list(guests), parties)
+    if tables:
+        units = _split_oversized(units, max(table.capacity for table in tables))
+    planner = _Planner(units, tables, separate, random.Random(seed))
+    unseated = planner.greedy()
+    iterations = planner.improve(deadline)
+
+    assignments = {}
+    for table in tables:
+        seat = 1
+        for unit in sorted(table.units, key=lambda unit: min(guest.id for guest in unit.guests)):
+            for guest in sorted(unit.guests, key=lambda guest: (not guest.is_primary_guest, guest.id)):
+                assignments[guest.id] = (table.number, seat)
+                seat += 1 + guest.plus_ones
+    return SeatingPlan(
+        assignments=assignments,
+        unseated=[guest.id for unit in unseated for guest in unit.guests],
+        conflicts=sum(table.conflicts for table in tables),
+        diet_cost=sum(len(table.diets) for table in tables),
+        iterations=iterations,
+    )
+
+
+def assign_seating(event, tables, parties=(), separate=(), time_budget=DEFAULT_TIME_BUDGET, seed=None):
+    """
+    Plan seating for every guest of event who still needs a seat and write
+    table_number/seat_number back in one bulk update. Guests that could not
+    be seated, and those who declined or did not show, have both cleared.
+    """
+    guests = list(
+        EventGuest.objects.filter(event=event)
+        .exclude(status__in=UNSEATED_STATUSES)
+        .only('id', 'plus_ones', 'dietary_restrictions', 'is_primary_guest')
+        .order_by('id')
+    )
+    plan = plan_seating(guests, tables, parties, separate, time_budget, seed)
+    for guest in guests:
+        guest.table_number, guest.seat_number = plan.assignments.get(guest.id, (None, None))
+    with transaction.atomic():
+        update_guests(guests, ['table_number', 'seat_number'])
+        # Their old seats may now be someone else's.
+        EventGuest.objects.filter(event=event, status__in=UNSEATED_STATUSES).filter(
+            Q(table_number__isnull=False) | Q(seat_number__isnull=False)
+        ).update(table_number=None, seat_number=None)
+    return plan
@@ -0,0 +1,67 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from venues.models import Venue
+
+from . import facets, search
+from .models import Event
+
+# A field of a row loaded with .only()/.defer(), which is not read in
+# post_init: that would cost a query per loaded instance.
+UNKNOWN = object()
+
+
+@receiver(post_init, sender=Event)
+def remember_event_type(sender, instance, **kwargs):
+    # An event moved to another type changes the facets of both types.
+    instance._loaded_event_type_id = instance.__dict__.get('event_type_id', UNKNOWN)
+
+
+@receiver(pre_save, sender=Event)
+@receiver(pre_delete, sender=Event)
+def load_unknown_event_type(sender, instance, **kwargs):
+    if instance._loaded_event_type_id is UNKNOWN:
+        instance._loaded_event_type_id = (
+            sender._base_manager.filter(pk=instance.pk).values_list('event_type_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_event_facets(sender, instance, **kwargs):
+    # Still deferred: not changed, so the type it was loaded with.
+    current = instance.__dict__.get('event_type_id', instance._loaded_event_type_id)
+    for event_type_id in {instance._loaded_event_type_id, current}:
+        if event_type_id:
+            facets.invalidate(event_type_id)
+    instance._loaded_event_type_id = current
+
+
+@receiver(post_save, sender=Venue)
+@receiver(post_delete, sender=Venue)
+def invalidate_venue_facets(sender, instance, **kwargs):
+    facets.invalidate_venues()
+
+
+@receiver(post_save, sender=Event)
+def index_event(sender, instance, **kwargs):
+    search.index_events([instance])
+
+
+@receiver(post_delete, sender=Event)
+def unindex_event(sender, instance, **kwargs):
+    search.remove_events([instance.pk])
+
+
+@receiver(post_init, sender=Venue)
+def remember_venue_name(sender, instance, **kwargs):
+    instance._loaded_name = instance.__dict__.get('name', UNKNOWN)
+
+
+@receiver(post_save, sender=Venue)
+def reindex_venue_events(sender, instance, created, **kwargs):
+    # Events are indexed with their venue's name; reindex when it may have changed.
+    name = instance.__dict__.get('name', UNKNOWN)
+    if not created and (name is UNKNOWN or name != instance._loaded_name):
+        search.index_events(instance.events.select_related('venue'))
+    instance._loaded_name = name
@@ -16,4 +16,6 @@ urlpatterns = [
     path('<int:event_id>/register/', views.event_registration, name='event_registration'),
     path('bookings/', views.booking_page, name='booking_page'),
     path('add/', views.add_event, name='add_event'),
+    path('<int:event_id>/guests/import/', views.guest_import, name='guest_import'),
+    path('<int:event_id>/guests/export/', views.guest_export, name='guest_export'),
 ] 
\ No newline at end of file
@@ -1,14 +1,15 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import HttpResponse
-from django.db.models import Q
+from django.http import FileResponse, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 from .models import Event, EventType, Registration
-from venues.models import Venue
-from datetime import datetime
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from . import facets, guests, search
+import os
+import tempfile
+from event_manager.pagination import paginate
+from event_manager.routers import use_replicas
 from django.contrib import messages
-from django.core.mail import send_mail
+from communications.mail_queue import enqueue_mail
 from django.contrib.auth.decorators import login_required, user_passes_test
-from users import role_required
+from users import activity, authorization, role_required
 
 try:
     from .forms import EventForm
@@ -30,89 +31,89 @@ def event_detail(request, event_id):
 def event_categories(request):
     return render(request, 'events/event_categories.html')
 
-@role_required(['user'])
-def sports_events(request):
-    # Get the EventType for Sports
-    sports_type = EventType.objects.filter(name__iexact='Sports').first()
-    if not sports_type:
-        return render(request, 'events/sports_events.html', {'events': [], 'subcategories': [], 'venues': [], 'selected': {}})
-
-    # Get all sports events
-    events = Event.objects.filter(event_type=sports_type)
-
-    # Filtering
-    subcategory = request.GET.get('subcategory', '')
-    date = request.GET.get('date', '')
-    location = request.GET.get('location', '')
-    skill = request.GET.get('skill', '')
-    search = request.GET.get('search', '')
-
-    if subcategory:
-        events = events.filter(sub_category__iexact=subcategory)
-    if date:
-        try:
-            date_obj = datetime.strptime(date, '%Y-%m-%d').date()
-            events = events.filter(start_date=date_obj)
-        except ValueError:
-            pass
-    if location:
-        events = events.filter(venue__name__icontains=location)
-    if skill:
-        events = events.filter(skill_level__iexact=skill)
-    if search:
-        events = events.filter(Q(title__icontains=search) | Q(description__icontains=search))
-
-    # Subcategories for tabs
-    subcategories = events.values_list('sub_category', flat=True).distinct()
-    venues = Venue.objects.filter(events__event_type=sports_type).distinct()
-    skills = events.values_list('skill_level', flat=True).distinct()
-
-    # Pagination
-    page = request.GET.get('page', 1)
-    paginator = Paginator(events, 6)  # 6 events per page
+# Category pages: (EventType name, title, icon, tagline, template)
+CATEGORY_PAGES = {
+    'sports': ('Sports', 'Sports Events', 'fa-futbol',
+               'From football tournaments to pickleball competitions – find your perfect sports event!',
+               'events/sports_events.html'),
+    'adventure': ('Adventure', 'Adventure Events', 'fa-mountain',
+                  'Thrilling outdoor activities and expeditions', 'events/category_events.html'),
+    'music': ('Music', 'Music Events', 'fa-music',
+              'Concerts, open mics, and music workshops', 'events/category_events.html'),
+    'cooking': ('Cooking', 'Cooking Events', 'fa-utensils',
+                'Classes, competitions, and food tastings', 'events/category_events.html'),
+    'coding': ('Coding', 'Coding Events', 'fa-code',
+               'Workshops, hackathons, and programming challenges', 'events/category_events.html'),
+    'movie': ('Movie', 'Movie Events', 'fa-film',
+              'Screenings, drive-ins, and film festivals', 'events/category_events.html'),
+}
+
+
+@use_replicas
+def _category_events(request, category):
+    type_name, title, icon, tagline, template = CATEGORY_PAGES[category]
+    filters = facets.parse_filters(request.GET)
+    context = {
+        'category': {'title': title, 'icon': icon, 'tagline': tagline},
+        'selected': filters._asdict(),
+    }
+    event_type = EventType.objects.filter(name__iexact=type_name).first()
+    if not event_type:
+        context.update({'events': [], 'subcategories': [], 'venues': [], 'skills': []})
+        return render(request, template, context)
+
+    if filters.search:
+        # Ranked full-text matches, most relevant first.
+        ranked_ids = search.ranked_ids(filters.search, event_type)
+        events = search.RankedResults(
+            facets.filter_events(event_type, filters, ranked_ids).select_related('venue'), ranked_ids
+        )
+    else:
+        events = facets.filter_events(event_type, filters).select_related('venue')
+    # Tabs and filter choices change only when events do (events.facets).
+    facet_values = facets.get_facets(event_type, filters)
+
+    # Keyset pagination: 6 events per page, deep pages as cheap as the first
     try:
-        events_page = paginator.page(page)
-    except PageNotAnInteger:
-        events_page = paginator.page(1)
-    except EmptyPage:
-        events_page = paginator.page(paginator.num_pages)
+        events_page = paginate(events, request.GET.get('cursor'), page_size=6)
+    except ValueError:
+        events_page = paginate(events, page_size=6)
+    query = request.GET.copy()
+    query.pop('cursor', None)
 
-    context = {
+    context.update({
         'events': events_page,
-        'subcategories': subcategories,
-        'venues': venues,
-        'skills': skills,
-        'selected': {
-            'subcategory': subcategory,
-            'date': date,
-            'location': location,
-            'skill': skill,
-            'search': search,
-        },
+        'subcategories': facet_values['subcategories'],
+        'venues': facet_values['venues'],
+        'skills': facet_values['skills'],
         'page_obj': events_page,
-        'paginator': paginator,
-    }
-    return render(request, 'events/sports_events.html', context)
+        'query_string': query.urlencode(),
+    })
+    return render(request, template, context)
+
+@role_required(['user'])
+def sports_events(request):
+    return _category_events(request, 'sports')
 
 @role_required(['user'])
 def adventure_events(request):
-    return render(request, 'events/adventure_events.html')
+    return _category_events(request, 'adventure')
 
 @role_required(['user'])
 def music_events(request):
-    return render(request, 'events/music_events.html')
+    return _category_events(request, 'music')
 
 @role_required(['user'])
 def cooking_events(request):
-    return render(request, 'events/cooking_events.html')
+    return _category_events(request, 'cooking')
 
 @role_required(['user'])
 def coding_events(request):
-    return render(request, 'events/coding_events.html')
+    return _category_events(request, 'coding')
 
 @role_required(['user'])
 def movie_events(request):
-    return render(request, 'events/movie_events.html')
+    return _category_events(request, 'movie')
 
 @role_required(['user'])
 def event_registration(request, event_id):
@@ -127,22 +128,21 @@ def event_registration(request, event_id):
         phone = request.POST.get('phone')
         if name and email and phone:
             reg = Registration.objects.create(event=event, name=name, email=email, phone=phone)
-            # Send email to user
-            send_mail(
+            activity.record(request.user, 'event_booking', metadata={
+                'event_id': event.pk, 'venue_id': event.venue_id, 'registration_id': reg.pk,
+            }, request=request)
+            # Queue email to user
+            enqueue_mail(
                 subject=f'Registration Confirmation for {event.title}',
                 message=f'Thank you {name} for registering for {event.title}!',
-                from_email=None,
                 recipient_list=[email],
-                fail_silently=True,
             )
-            # Send email to event manager
+            # Queue email to event manager
             if event.event_manager and event.event_manager.email:
-                send_mail(
+                enqueue_mail(
                     subject=f'New Registration for {event.title}',
                     message=f'{name} ({email}, {phone}) registered for your event.',
-                    from_email=None,
                     recipient_list=[event.event_manager.email],
-                    fail_silently=True,
                 )
             messages.success(request, 'Registration successful! A confirmation email has been sent.')
             return redirect('events:booking_page')
@@ -158,9 +158,53 @@ def booking_page(request):
     return render(request, 'events/booking_page.html', {'bookings': bookings})
 
 def is_manager(user):
-    return user.groups.filter(name='Event Managers').exists() or user.is_superuser
+    return authorization.for_user(user).is_manager
 
 @role_required(['manager'])
 def add_event(request):
     # Remove EventForm and add_event view for now
     pass
+
+
+def can_manage_guests(user, event):
+    return user.user_type == 'admin' or user.is_superuser or user.id in (event.organizer_id, event.event_manager_id)
+
+@role_required(['manager', 'admin'])
+def guest_import(request, event_id):
+    event = get_object_or_404(Event, id=event_id)
+    if not can_manage_guests(request.user, event):
+        return HttpResponseForbidden()
+    result = None
+    if request.method == 'POST':
+        upload = request.FILES.get('guest_file')
+        file_format = os.path.splitext(upload.name)[1].lower().lstrip('.') if upload else ''
+        if file_format not in ('csv', 'xlsx'):
+            messages.error(request, 'Please upload a .csv or .xlsx guest list.')
+        else:
+            # Uploads above FILE_UPLOAD_MAX_MEMORY_SIZE are already spooled to disk.
+            try:
+                result = guests.import_guests(
+                    event,
+                    guests.iter_rows(upload.file, file_format),
+                    update_existing=request.POST.get('update_existing') == 'on',
+                )
+            except ValueError as exc:
+                messages.error(request, str(exc))
+            else:
+                messages.success(request, f'Imported guest list: {result.created} added, {result.updated} updated, {result.duplicates} duplicates skipped.')
+    return render(request, 'events/guest_import.html', {'event': event, 'result': result, 'columns': guests.GUEST_COLUMNS})
+
+@role_required(['manager', 'admin'])
+def guest_export(request, event_id):
+    event = get_object_or_404(Event, id=event_id)
+    if not can_manage_guests(request.user, event):
+        return HttpResponseForbidden()
+    filename = f'guests-event-{event.id}'
+    if request.GET.get('format') == 'xlsx':
+        output = tempfile.TemporaryFile()
+        guests.write_guest_xlsx(event, output)
+        output.seek(0)
+        return FileResponse(output, as_attachment=True, filename=f'{filename}.xlsx')
+    response = StreamingHttpResponse(guests.iter_guest_csv(event), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
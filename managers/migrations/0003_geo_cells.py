@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:49
+
+from django.db import migrations, models
+
+from venues.geo import travel_band
+
+
+def fill_travel_bands(apps, schema_editor):
+    EventManager = apps.get_model("managers", "EventManager")
+    radii = EventManager.objects.values_list("travel_radius", flat=True).distinct()
+    for radius in list(radii):
+        EventManager.objects.filter(travel_radius=radius).update(
+            travel_band=travel_band(radius)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("managers", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="eventmanager",
+            name="geo_cell",
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="eventmanager",
+            name="latitude",
+            field=models.DecimalField(
+                blank=True, decimal_places=6, max_digits=9, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="eventmanager",
+            name="longitude",
+            field=models.DecimalField(
+                blank=True, decimal_places=6, max_digits=9, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="eventmanager",
+            name="travel_band",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="eventmanager",
+            index=models.Index(
+                fields=["travel_band", "geo_cell"], name="managers_travel_band_cell_idx"
+            ),
+        ),
+        migrations.RunPython(fill_travel_bands, migrations.RunPython.noop),
+    ]
@@ -6,6 +6,8 @@ from imagekit.models import ProcessedImageField
 from imagekit.processors import ResizeToFill
 import uuid
 
+from venues import geo
+
 
 class ManagerSpecialization(models.Model):
     """
@@ -62,8 +64,12 @@ class EventManager(models.Model):
     tax_id = models.CharField(max_length=50, blank=True)
     
     # Service areas
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    geo_cell = models.IntegerField(null=True, blank=True, editable=False)  # see venues.geo
     service_areas = models.JSONField(default=list, blank=True)
-    travel_radius = models.PositiveIntegerField(default=50)  # in miles/km
+    travel_radius = models.PositiveIntegerField(default=50)  # in km
+    travel_band = models.PositiveSmallIntegerField(default=0, editable=False)  # see venues.geo
     
     # Pricing
     hourly_rate = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
@@ -123,6 +129,10 @@ class EventManager(models.Model):
     class Meta:
         db_table = 'event_managers'
         ordering = ['-featured', '-average_rating', '-created_at']
+        indexes = [
+            # Travel-radius coverage (venues.nearby)
+            models.Index(fields=['travel_band', 'geo_cell'], name='managers_travel_band_cell_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - Event Manager"
@@ -130,6 +140,8 @@ class EventManager(models.Model):
     def save(self, *args, **kwargs):
         if not self.manager_id:
             self.manager_id = f"EM{uuid.uuid4().hex[:8].upper()}"
+        self.geo_cell = geo.cell_for(self.latitude, self.longitude)
+        self.travel_band = geo.travel_band(self.travel_radius)
         super().save(*args, **kwargs)
     
     @property
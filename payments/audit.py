@@ -0,0 +1,30 @@
+"""
+PaymentLog writing. Rows go through the PaymentLog write-behind buffer
+(see event_manager.write_behind), so logging never adds an INSERT to the
+request that pays.
+"""
+from django.utils import timezone
+
+from event_manager import write_behind
+
+from .models import PaymentLog
+
+
+def log(user, message, level='info', payment=None, details=None, request=None):
+    """
+    Log a payment event for a user; anonymous users are not logged.
+    """
+    if user is None or not user.is_authenticated:
+        return None
+    entry = PaymentLog(
+        payment=payment,
+        user=user,
+        level=level,
+        message=message,
+        details=details or {},
+        ip_address=request.META.get('REMOTE_ADDR') if request else None,
+        user_agent=request.META.get('HTTP_USER_AGENT', '') if request else '',
+        created_at=timezone.now(),
+    )
+    write_behind.buffer_for(PaymentLog).add(entry)
+    return entry
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:15
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="paymentlog",
+            name="created_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
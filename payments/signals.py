@@ -0,0 +1,26 @@
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+
+from . import audit
+from .models import Payment
+
+# Statuses worth more than an info line in the payment log.
+LEVELS = {'failed': 'error', 'cancelled': 'warning', 'refunded': 'warning'}
+
+
+@receiver(post_init, sender=Payment)
+def remember_status(sender, instance, **kwargs):
+    # None for new payments and for rows loaded without their status.
+    instance._loaded_status = instance.__dict__.get('status') if instance.pk else None
+
+
+@receiver(post_save, sender=Payment)
+def log_status_change(sender, instance, created=False, raw=False, **kwargs):
+    old, new = instance._loaded_status, instance.status
+    instance._loaded_status = new
+    if raw or old == new or (old is None and not created):
+        return
+    message = f"Payment {instance.payment_id} {new}" if created else f"Payment {instance.payment_id} {old} -> {new}"
+    audit.log(instance.user, message, level=LEVELS.get(new, 'info'), payment=instance, details={
+        'from': old, 'to': new, 'amount': str(instance.amount), 'currency': instance.currency,
+    })
@@ -0,0 +1,166 @@
+// 360° Event Manager - Chat rooms
+
+(function() {
+    var container = document.getElementById('chat-messages');
+    if (!container) {
+        return;
+    }
+
+    function initial(name) {
+        return (name || '?').charAt(0).toUpperCase();
+    }
+
+    function formatDate(iso) {
+        var date = new Date(iso);
+        return date.toLocaleString(undefined, {month: 'short', day: '2-digit', hour: '2-digit', minute: '2-digit', hour12: false});
+    }
+
+    function buildRow(message) {
+        var row = document.createElement('div');
+        row.className = 'message-row flex' + (message.is_own ? ' user' : '');
+        row.dataset.messageId = message.id;
+
+        var avatar = document.createElement('div');
+        avatar.className = 'message-avatar';
+        avatar.textContent = initial(message.sender_name);
+
+        var body = document.createElement('div');
+        var bubble = document.createElement('div');
+        bubble.className = 'message-bubble';
+        bubble.textContent = message.content;
+        var meta = document.createElement('div');
+        meta.className = 'message-meta';
+        meta.textContent = message.sender_name + ' · ' + formatDate(message.created_at);
+        body.appendChild(bubble);
+        body.appendChild(meta);
+
+        row.appendChild(avatar);
+        row.appendChild(body);
+        return row;
+    }
+
+    // "Load older" pages backwards through the keyset cursor API.
+    var loadOlder = document.getElementById('load-older');
+    if (loadOlder) {
+        loadOlder.addEventListener('click', function() {
+            var cursor = container.dataset.olderCursor;
+            if (!cursor) {
+                return;
+            }
+            loadOlder.disabled = true;
+            fetch(container.dataset.historyUrl + '?before=' + encodeURIComponent(cursor), {credentials: 'same-origin'})
+                .then(function(response) { return response.json(); })
+                .then(function(data) {
+                    var anchor = loadOlder.nextSibling;
+                    var previousHeight = container.scrollHeight;
+                    data.messages.forEach(function(message) {
+                        container.insertBefore(buildRow(message), anchor);
+                    });
+                    container.scrollTop += container.scrollHeight - previousHeight;
+                    container.dataset.olderCursor = data.older_cursor || '';
+                    if (data.older_cursor) {
+                        loadOlder.disabled = false;
+                    } else {
+                        loadOlder.remove();
+                    }
+                })
+                .catch(function() {
+                    loadOlder.disabled = false;
+                });
+        });
+    }
+
+    function appendMessage(message) {
+        if (container.querySelector('[data-message-id="' + message.id + '"]')) {
+            return;
+        }
+        var empty = container.querySelector('.text-muted.text-center');
+        if (empty) {
+            empty.remove();
+        }
+        var atBottom = container.scrollHeight - container.scrollTop - container.clientHeight < 40;
+        container.appendChild(buildRow(message));
+        if (atBottom || message.is_own) {
+            container.scrollTop = container.scrollHeight;
+        }
+    }
+
+    // Live delivery over the thread's WebSocket. The form keeps working as a
+    // plain POST whenever the socket is not open.
+    var form = document.querySelector('form.chat-input-row');
+    var input = form ? form.querySelector('input[name="content"]') : null;
+    var typingIndicator = document.getElementById('typing-indicator');
+    var socket = null;
+    var typingTimer = null;
+    var typingHideTimer = null;
+
+    function send(payload) {
+        if (socket && socket.readyState === WebSocket.OPEN) {
+            socket.send(JSON.stringify(payload));
+            return true;
+        }
+        return false;
+    }
+
+    function connect(attempt) {
+        if (!container.dataset.socketPath || !window.WebSocket) {
+            return;
+        }
+        var scheme = window.location.protocol === 'https:' ? 'wss://' : 'ws://';
+        socket = new WebSocket(scheme + window.location.host + container.dataset.socketPath);
+        socket.onopen = function() {
+            attempt = 0;
+            send({type: 'read'});
+        };
+        socket.onmessage = function(event) {
+            var data = JSON.parse(event.data);
+            if (data.type === 'message') {
+                appendMessage(data.message);
+                if (!data.message.is_own && document.visibilityState === 'visible') {
+                    send({type: 'read'});
+                }
+            } else if (data.type === 'typing' && typingIndicator) {
+                typingIndicator.hidden = !data.is_typing;
+                clearTimeout(typingHideTimer);
+                typingHideTimer = setTimeout(function() { typingIndicator.hidden = true; }, 5000);
+            }
+        };
+        socket.onclose = function(event) {
+            socket = null;
+            // 44xx are permanent refusals from the server.
+            if (event.code < 4400 || event.code >= 4500) {
+                setTimeout(function() { connect(attempt + 1); }, Math.min(30000, 1000 * Math.pow(2, attempt)));
+            }
+        };
+    }
+
+    if (form && input) {
+        form.addEventListener('submit', function(event) {
+            var content = input.value.trim();
+            if (content && send({type: 'message', content: content})) {
+                event.preventDefault();
+                input.value = '';
+                send({type: 'typing', is_typing: false});
+            }
+        });
+        input.addEventListener('input', function() {
+            if (!typingTimer) {
+                send({type: 'typing', is_typing: true});
+            }
+            clearTimeout(typingTimer);
+            typingTimer = setTimeout(function() {
+                typingTimer = null;
+                send({type: 'typing', is_typing: false});
+            }, 3000);
+        });
+    }
+
+    document.addEventListener('visibilitychange', function() {
+        if (document.visibilityState === 'visible') {
+            send({type: 'read'});
+        }
+    });
+
+    container.scrollTop = container.scrollHeight;
+    connect(0);
+})();
@@ -8,20 +8,23 @@ def role_required(allowed_roles):
     Redirects to the appropriate dashboard if not allowed.
     Usage: @role_required(['user']) or @role_required(['manager', 'admin'])
     """
+    # Imported here: this package is imported before its models are ready.
+    from .authorization import for_user
+
     def decorator(view_func):
         @wraps(view_func)
         def _wrapped_view(request, *args, **kwargs):
-            user = request.user
-            if not user.is_authenticated:
+            access = for_user(request.user)
+            if not access.is_authenticated:
                 return redirect('users:login')
-            if user.user_type in allowed_roles:
+            if access.has_role(allowed_roles):
                 return view_func(request, *args, **kwargs)
             # Redirect based on user_type
-            if user.user_type == 'user':
+            if access.role == 'user':
                 return redirect(reverse('users:dashboard'))
-            elif user.user_type == 'manager':
+            elif access.role == 'manager':
                 return redirect(reverse('users:manager_dashboard'))
-            elif user.user_type == 'admin':
+            elif access.role == 'admin':
                 return redirect(reverse('users:admin_dashboard'))
             else:
                 return redirect('users:login')
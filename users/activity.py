@@ -0,0 +1,211 @@
+"""
+UserActivity ingestion and time-bucketed rollups.
+
+record() is the way to log an activity. Rows go through the UserActivity
+write-behind buffer (see event_manager.write_behind), so they are written
+in batches outside the request. Put the venue an activity concerns in
+``metadata['venue_id']`` so it is counted per venue.
+
+roll_up() (the rollup_activity command, from cron or with --loop) folds
+raw rows past a watermark into ActivityRollup counts per hour, day and
+week, by activity type, user type and venue. compact() then applies
+retention: raw rows older than ACTIVITY_RAW_RETENTION_DAYS, hourly
+buckets older than ACTIVITY_HOURLY_RETENTION_DAYS and daily buckets
+older than ACTIVITY_DAILY_RETENTION_DAYS are deleted, their counts
+living on in the coarser buckets. Weekly buckets are kept.
+
+activity_counts() answers analytics queries from the rollups, plus the
+few raw rows not rolled up yet.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, IntegerField, Max, Sum
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast, Trunc
+from django.utils import timezone
+
+from event_manager import write_behind
+from event_manager.routers import long_reads
+
+from .models import ActivityRollup, RollupWatermark, UserActivity
+
+ROLLUP_BATCH_SIZE = getattr(settings, 'ACTIVITY_ROLLUP_BATCH_SIZE', 50000)
+RAW_RETENTION_DAYS = getattr(settings, 'ACTIVITY_RAW_RETENTION_DAYS', 30)
+HOURLY_RETENTION_DAYS = getattr(settings, 'ACTIVITY_HOURLY_RETENTION_DAYS', 14)
+DAILY_RETENTION_DAYS = getattr(settings, 'ACTIVITY_DAILY_RETENTION_DAYS', 400)
+# Rows younger than this are left for the next run, so a slow transaction
+# committing a lower id is not skipped by the watermark.
+ROLLUP_LAG = timedelta(seconds=getattr(settings, 'ACTIVITY_ROLLUP_LAG_SECONDS', 60))
+
+WATERMARK = 'user_activity'
+PERIODS = ('hour', 'day', 'week')
+DIMENSIONS = ('activity_type', 'user_type', 'venue_id')
+DELETE_CHUNK = 10000
+
+def record(user, activity_type, description='', metadata=None, request=None):
+    """
+    Log one activity of an authenticated user; anonymous ones are ignored.
+    """
+    if user is None or not user.is_authenticated:
+        return None
+    activity = UserActivity(
+        user=user,
+        activity_type=activity_type,
+        description=description,
+        metadata=metadata or {},
+        ip_address=request.META.get('REMOTE_ADDR') if request else None,
+        user_agent=request.META.get('HTTP_USER_AGENT', '') if request else '',
+        created_at=timezone.now(),
+    )
+    write_behind.buffer_for(UserActivity).add(activity)
+    return activity
+
+
+def _hourly(queryset):
+    """(hour, activity_type, user_type, venue_id, count) rows of raw activities."""
+    return (
+        queryset.annotate(
+            hour=Trunc('created_at', 'hour'),
+            venue=Cast(KeyTextTransform('venue_id', 'metadata'), IntegerField()),
+        )
+        .values_list('hour', 'activity_type', 'user__user_type', 'venue')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+
+def bucket_start(moment, period):
+    """Start of the hour, day or week (from Monday) holding a datetime."""
+    moment = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    if period == 'hour':
+        return moment
+    day = moment.replace(hour=0)
+    return day if period == 'day' else day - timedelta(days=day.weekday())
+
+
+def _fold(rows, periods=PERIODS):
+    counts = Counter()
+    starts = {}
+    for hour, activity_type, user_type, venue_id, count in rows:
+        if hour not in starts:
+            starts[hour] = [(period, bucket_start(hour, period)) for period in periods]
+        for period, start in starts[hour]:
+            counts[period, start, activity_type, user_type, venue_id or 0] += count
+    return counts
+
+
+def _store(counts):
+    # One upsert adding to the stored counts in SQL; building and saving
+    # a model per bucket costs more than folding the raw rows.
+    ops = connection.ops
+    table = ops.quote_name(ActivityRollup._meta.db_table)
+    columns = ['period', 'start', 'activity_type', 'user_type', 'venue_id', 'count']
+    names = ', '.join(ops.quote_name(column) for column in columns)
+    total = f"{table}.{ops.quote_name('count')}"
+    sql = f"INSERT INTO {table} ({names}) VALUES ({', '.join(['%s'] * len(columns))}) "
+    if connection.vendor == 'mysql':
+        sql += f"ON DUPLICATE KEY UPDATE {ops.quote_name('count')} = {total} + VALUES({ops.quote_name('count')})"
+    else:
+        sql += (
+            f"ON CONFLICT ({', '.join(ops.quote_name(column) for column in columns[:-1])}) "
+            f"DO UPDATE SET {ops.quote_name('count')} = {total} + excluded.{ops.quote_name('count')}"
+        )
+    rows = [
+        (period, ops.adapt_datetimefield_value(start), activity_type, user_type, venue_id, count)
+        for (period, start, activity_type, user_type, venue_id), count in counts.items()
+    ]
+    with connection.cursor() as cursor:
+        for offset in range(0, len(rows), 5000):
+            cursor.executemany(sql, rows[offset:offset + 5000])
+
+
+def roll_up(batch_size=ROLLUP_BATCH_SIZE, now=None):
+    """
+    Fold up to batch_size raw activities past the watermark into the
+    rollups. Returns how many were folded; 0 once caught up.
+    """
+    cutoff = (now or timezone.now()) - ROLLUP_LAG
+    with transaction.atomic():
+        mark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=WATERMARK)
+        pending = UserActivity.objects.filter(pk__gt=mark.last_id, created_at__lt=cutoff)
+        last = list(pending.order_by('pk').values_list('pk', flat=True)[batch_size - 1:batch_size])
+        last = last[0] if last else pending.aggregate(last=Max('pk'))['last']
+        if last is None:
+            return 0
+        counts = _fold(_hourly(UserActivity.objects.filter(pk__gt=mark.last_id, pk__lte=last)))
+        if counts:
+            _store(counts)
+        mark.last_id = last
+        mark.save(update_fields=['last_id', 'updated_at'])
+    return sum(count for key, count in counts.items() if key[0] == 'hour')
+
+
+def compact(now=None):
+    """
+    Apply the retention periods. Raw rows are only deleted once rolled up.
+    Returns the number of raw rows, hourly and daily buckets deleted.
+    """
+    now = now or timezone.now()
+    mark = RollupWatermark.objects.filter(name=WATERMARK).values_list('last_id', flat=True).first() or 0
+    expired = UserActivity.objects.filter(pk__lte=mark, created_at__lt=now - timedelta(days=RAW_RETENTION_DAYS))
+    raw = 0
+    while True:
+        # In chunks, so the write lock is never held for long.
+        ids = list(expired.order_by('pk').values_list('pk', flat=True)[:DELETE_CHUNK])
+        if not ids:
+            break
+        raw += UserActivity.objects.filter(pk__in=ids).delete()[0]
+    hourly = ActivityRollup.objects.filter(
+        period='hour', start__lt=now - timedelta(days=HOURLY_RETENTION_DAYS)
+    ).delete()[0]
+    daily = ActivityRollup.objects.filter(
+        period='day', start__lt=now - timedelta(days=DAILY_RETENTION_DAYS)
+    ).delete()[0]
+    return raw, hourly, daily
+
+
+def activity_counts(period='day', since=None, until=None, by=('activity_type',), include_recent=True, **filters):
+    """
+    Activity counts per period bucket starting in [since, until), grouped
+    by any of DIMENSIONS and filtered on them, e.g.
+
+        activity_counts('week', since=start, by=('venue_id',), activity_type='venue_view')
+
+    Returns [{'start': ..., <by>..., 'count': n}] ordered by start. Hourly
+    and daily buckets only reach back as far as their retention.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period {period!r}")
+    unknown = (set(by) | set(filters)) - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown dimensions: {', '.join(sorted(unknown))}")
+    by = tuple(by)
+
+    db = long_reads()
+    rollups = ActivityRollup.objects.using(db).filter(period=period, **filters)
+    if since is not None:
+        rollups = rollups.filter(start__gte=since)
+    if until is not None:
+        rollups = rollups.filter(start__lt=until)
+    totals = Counter()
+    for row in rollups.values('start', *by).annotate(total=Sum('count')).order_by():
+        totals[(row['start'], *(row[field] for field in by))] += row['total']
+
+    if include_recent:
+        mark = RollupWatermark.objects.using(db).filter(name=WATERMARK).values_list('last_id', flat=True).first() or 0
+        recent = _hourly(UserActivity.objects.using(db).filter(pk__gt=mark))
+        for (_, start, *values), count in _fold(recent, (period,)).items():
+            row = dict(zip(DIMENSIONS, values))
+            if any(row[field] != value for field, value in filters.items()):
+                continue
+            if (since is not None and start < since) or (until is not None and start >= until):
+                continue
+            totals[(start, *(row[field] for field in by))] += count
+
+    return [
+        {'start': key[0], **dict(zip(by, key[1:])), 'count': count}
+        for key, count in sorted(totals.items())
+    ]
@@ -0,0 +1,156 @@
+"""
+Cached authorization facts about a user, shared by role_required, the
+event manager checks and the chat contact lists.
+
+for_user() returns the Authorization of a user, kept on the user object
+for the rest of the request. Its role and superuser flag come from the
+user row the authentication middleware already loaded. Its group names
+and allowed-contact ids are cached:
+
+* group names per user, under the user's group version (bumped when
+  their memberships change) and the group catalog version (bumped when
+  a group is renamed or deleted);
+* allowed-contact ids per audience (the roles a user may chat with),
+  under the directory version, bumped when a user is created, deleted
+  or changes role.
+
+users.signals does the bumping. Writes that bypass signals (bulk_create,
+raw SQL) are picked up once the cached entries expire after
+CACHE_TIMEOUT seconds.
+"""
+from django.core.cache import cache
+
+from event_manager.cache import bump_version, get_or_compute
+
+from .models import CustomUser
+
+CACHE_TIMEOUT = 10 * 60
+EVENT_MANAGERS_GROUP = 'Event Managers'
+GROUP_CATALOG_VERSION_KEY = 'authorization:groups'
+DIRECTORY_VERSION_KEY = 'authorization:directory'
+
+# The roles each role may chat with; None means everyone.
+CONTACT_ROLES = {
+    'admin': None,
+    'manager': ('user', 'admin'),
+    'user': ('manager',),
+}
+
+
+# Versioning
+
+def _group_version_key(user_id):
+    return f'authorization:user_groups:{user_id}'
+
+
+def invalidate_groups(user_ids):
+    """
+    The group memberships of these users changed.
+    """
+    for user_id in user_ids:
+        bump_version(_group_version_key(user_id))
+
+
+def invalidate_group_catalog():
+    """
+    A group was renamed or deleted: drop every cached group list.
+    """
+    bump_version(GROUP_CATALOG_VERSION_KEY)
+
+
+def invalidate_directory():
+    """
+    A user was created, deleted or changed role: drop every cached contact set.
+    """
+    bump_version(DIRECTORY_VERSION_KEY)
+
+
+# Lookups
+
+def _group_names(user_id):
+    versions = cache.get_many([GROUP_CATALOG_VERSION_KEY, _group_version_key(user_id)])
+    key = 'authorization:groups:{}:{}:{}'.format(
+        user_id, versions.get(GROUP_CATALOG_VERSION_KEY, 0), versions.get(_group_version_key(user_id), 0),
+    )
+    return get_or_compute(
+        key,
+        lambda: frozenset(CustomUser.groups.through.objects.filter(customuser_id=user_id).values_list('group__name', flat=True)),
+        CACHE_TIMEOUT,
+    )
+
+
+def _contact_ids(roles):
+    audience = ','.join(roles) if roles is not None else '*'
+    key = f"authorization:contacts:{audience}:{cache.get(DIRECTORY_VERSION_KEY, 0)}"
+
+    def compute():
+        users = CustomUser.objects.all() if roles is None else CustomUser.objects.filter(user_type__in=roles)
+        return frozenset(users.values_list('pk', flat=True))
+    return get_or_compute(key, compute, CACHE_TIMEOUT)
+
+
+class Authorization:
+    """
+    What one user may do; see the module docstring for what is cached.
+    """
+    def __init__(self, user):
+        self.user_id = user.pk
+        self.is_authenticated = user.is_authenticated
+        self.role = getattr(user, 'user_type', None) if self.is_authenticated else None
+        self.is_superuser = self.is_authenticated and user.is_superuser
+        self._groups = None
+
+    def has_role(self, roles):
+        return self.role in roles
+
+    @property
+    def groups(self):
+        if self._groups is None:
+            self._groups = _group_names(self.user_id) if self.is_authenticated else frozenset()
+        return self._groups
+
+    def in_group(self, name):
+        return name in self.groups
+
+    @property
+    def is_manager(self):
+        return self.is_superuser or self.in_group(EVENT_MANAGERS_GROUP)
+
+    @property
+    def contact_roles(self):
+        """
+        The roles this user may chat with (None for everyone), or () for nobody.
+        """
+        if self.is_superuser:
+            return None
+        return CONTACT_ROLES.get(self.role, ())
+
+    def _audience(self):
+        roles = self.contact_roles
+        return frozenset() if roles == () else _contact_ids(roles)
+
+    def contact_ids(self):
+        return self._audience() - {self.user_id}
+
+    def can_contact(self, user_id):
+        return user_id != self.user_id and user_id in self._audience()
+
+    def contacts(self):
+        """
+        A queryset of the users this user may chat with.
+        """
+        roles = self.contact_roles
+        if roles == ():
+            return CustomUser.objects.none()
+        users = CustomUser.objects.all() if roles is None else CustomUser.objects.filter(user_type__in=roles)
+        return users.exclude(id=self.user_id)
+
+
+def for_user(user):
+    """
+    The Authorization of a user (or AnonymousUser), built once per user object.
+    """
+    authorization = getattr(user, '_authorization', None)
+    if authorization is None:
+        authorization = user._authorization = Authorization(user)
+    return authorization
@@ -1,8 +1,8 @@
 from django.http import HttpResponse
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
-from communications.utils import get_allowed_chat_targets
-from users import role_required
+from communications import directory
+from users.views import admin_dashboard, manager_dashboard  # noqa: F401 (also served under /dashboard/)
 
 def dashboard_home(request):
     return HttpResponse("Dashboard home - Coming soon!")
@@ -19,10 +19,6 @@ def user_payments(request):
 def user_messages(request):
     return HttpResponse("User messages - Coming soon!")
 
-@role_required(['manager'])
-def manager_dashboard(request):
-    return render(request, 'users/manager_dashboard.html')
-
 def manager_clients(request):
     return HttpResponse("Manager clients - Coming soon!")
 
@@ -35,10 +31,6 @@ def manager_consultations(request):
 def manager_earnings(request):
     return HttpResponse("Manager earnings - Coming soon!")
 
-@role_required(['admin'])
-def admin_dashboard(request):
-    return render(request, 'users/admin_dashboard.html')
-
 def admin_users(request):
     return HttpResponse("Admin users - Coming soon!")
 
@@ -62,7 +54,8 @@ def admin_reports(request):
 
 @login_required
 def dashboard(request):
-    allowed_contacts = get_allowed_chat_targets(request.user)
+    contacts = directory.search(request.user)
     return render(request, 'users/dashboard.html', {
-        'allowed_contacts': allowed_contacts,
+        'allowed_contacts': contacts.contacts,
+        'contacts_next_cursor': contacts.next_cursor,
     }) 
\ No newline at end of file
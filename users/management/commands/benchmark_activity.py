@@ -0,0 +1,134 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+
+from communications.management.commands._synthetic import make_users
+from event_manager import write_behind
+from users import activity
+from users.models import UserActivity
+
+ACTIVITY_TYPES = [activity_type for activity_type, _ in UserActivity.ACTIVITY_TYPES]
+
+
+class Command(BaseCommand):
+    help = (
+        'Time activity ingestion one row at a time and batched, the rollup '
+        'job, and a 30-day analytics query against the raw log and against '
+        'the rollups. Everything is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--activities', type=int, default=1000000)
+        parser.add_argument('--days', type=int, default=90, help='Spread of the synthetic log')
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--venues', type=int, default=200)
+        parser.add_argument('--ingest', type=int, default=5000, help='Activities timed through record()')
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            users = make_users(options['users'] // 2) + make_users(options['users'] // 2, user_type='manager')
+
+            def metadata():
+                return {'venue_id': rng.randrange(1, options['venues'] + 1)} if rng.random() < 0.6 else {}
+
+            start = time.perf_counter()
+            with override_settings(WRITE_BEHIND_MODE='sync'):
+                for _ in range(options['ingest']):
+                    activity.record(rng.choice(users), rng.choice(ACTIVITY_TYPES), metadata=metadata())
+            single = time.perf_counter() - start
+            start = time.perf_counter()
+            # Flushed on this thread, inside the transaction rolled back below.
+            with override_settings(WRITE_BEHIND_MODE='request'):
+                for _ in range(options['ingest']):
+                    activity.record(rng.choice(users), rng.choice(ACTIVITY_TYPES), metadata=metadata())
+                write_behind.flush_all()
+            batched = time.perf_counter() - start
+            self.stdout.write(
+                f"record() x{options['ingest']}: one INSERT each {single * 1e6 / options['ingest']:.0f}us/activity, "
+                f"batched {batched * 1e6 / options['ingest']:.0f}us/activity"
+            )
+
+            start = time.perf_counter()
+            self._make_log(rng, users, options)
+            self.stdout.write(f"Synthetic log of {options['activities']} activities in {time.perf_counter() - start:.1f} s")
+
+            since = activity.bucket_start(timezone.now() - timedelta(days=30), 'day')
+
+            def raw_query():
+                return list(
+                    UserActivity.objects.filter(created_at__gte=since)
+                    .annotate(day=TruncDay('created_at')).values('day', 'activity_type')
+                    .annotate(count=Count('id')).order_by('day', 'activity_type')
+                )
+
+            def rollup_query():
+                return activity.activity_counts('day', since=since, by=('activity_type',))
+
+            raw_ms = self._time(raw_query, options['runs'])
+            start = time.perf_counter()
+            folded = 0
+            while True:
+                count = activity.roll_up(now=timezone.now() + activity.ROLLUP_LAG)
+                if not count:
+                    break
+                folded += count
+            self.stdout.write(f"roll_up: {folded} activities in {time.perf_counter() - start:.1f} s")
+            rollup_ms = self._time(rollup_query, options['runs'])
+            self.stdout.write(f"30 days by day and type: raw log {raw_ms:.1f}ms, rollups {rollup_ms:.2f}ms")
+            expected = {(row['day'], row['activity_type']): row['count'] for row in raw_query()}
+            if {(row['start'], row['activity_type']): row['count'] for row in rollup_query()} != expected:
+                self.stdout.write(self.style.ERROR('rollup counts differ from the raw log'))
+
+            start = time.perf_counter()
+            raw, hourly, daily = activity.compact()
+            self.stdout.write(
+                f"compact: {raw} raw rows, {hourly} hourly and {daily} daily buckets in {time.perf_counter() - start:.1f} s"
+            )
+            transaction.set_rollback(True)
+
+    def _make_log(self, rng, users, options):
+        now = timezone.now()
+        user_ids = [user.pk for user in users]
+        span = options['days'] * 24 * 3600
+        rows = []
+        for _ in range(options['activities']):
+            venue = rng.randrange(1, options['venues'] + 1) if rng.random() < 0.6 else None
+            rows.append(UserActivity(
+                user_id=rng.choice(user_ids), activity_type=rng.choice(ACTIVITY_TYPES),
+                metadata={'venue_id': venue} if venue else {},
+            ))
+        UserActivity.objects.bulk_create(rows, batch_size=5000)
+        # bulk_create stamps one time on every row: spread them over the span,
+        # oldest first as ids are handed out.
+        first = UserActivity.objects.order_by('-pk').values_list('pk', flat=True)[options['activities'] - 1]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'UPDATE {UserActivity._meta.db_table} SET created_at = %s WHERE id = %s',
+                [
+                    (connection.ops.adapt_datetimefield_value(now - timedelta(seconds=ago)), pk)
+                    for pk, ago in zip(
+                        range(first, first + options['activities']),
+                        sorted((rng.randrange(span) for _ in range(options['activities'])), reverse=True),
+                    )
+                ],
+            )
+            cursor.execute('ANALYZE')
+
+    def _time(self, run, runs):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
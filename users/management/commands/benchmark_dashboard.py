@@ -0,0 +1,131 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+
+from communications.management.commands._synthetic import make_users
+from events.management.commands._synthetic import make_event
+from events.models import Event, Registration
+from users import stats
+from users.models import CustomUser
+
+
+def live_admin_dashboard():
+    # What admin_dashboard used to do: full COUNTs, then venue and manager
+    # loaded per listed event.
+    counts = (Event.objects.count(), CustomUser.objects.count(), Registration.objects.count())
+    for event in Event.objects.all()[:5]:
+        event.venue, event.event_manager
+    list(CustomUser.objects.all()[:5])
+    return counts
+
+
+def live_manager_dashboard(manager):
+    events = Event.objects.filter(event_manager=manager)
+    registrations = Registration.objects.filter(event__event_manager=manager)
+    counts = (events.count(), registrations.count())
+    for event in events[:5]:
+        event.venue, event.registrations.count()
+    for registration in registrations[:5]:
+        registration.event
+    return counts
+
+
+def materialized_admin_dashboard():
+    dashboard = stats.dashboard_stats(stats.SITE)
+    list(Event.objects.select_related('venue', 'event_manager').order_by('-id')[:5])
+    list(CustomUser.objects.order_by('-id')[:5])
+    return dashboard
+
+
+def materialized_manager_dashboard(manager):
+    dashboard = stats.dashboard_stats(manager.pk)
+    events = list(Event.objects.filter(event_manager=manager).select_related('venue').order_by('-created_at', '-id')[:5])
+    dict(Registration.objects.filter(event__in=events).values_list('event_id').annotate(count=Count('id')).order_by())
+    list(Registration.objects.filter(event__event_manager=manager).select_related('event').order_by('-id')[:5])
+    return dashboard
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the admin and manager dashboards computed from the live '
+        'tables with the materialized statistics, and time the per-booking '
+        'cost of keeping them current. Everything is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=100000)
+        parser.add_argument('--registrations', type=int, default=500000)
+        parser.add_argument('--managers', type=int, default=50)
+        parser.add_argument('--runs', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            start = time.perf_counter()
+            managers = make_users(options['managers'], user_type='manager', prefix='dash-bench')
+            base = make_event()
+            statuses = [status for status, _ in Event.EVENT_STATUS_CHOICES]
+            Event.objects.bulk_create([
+                Event(
+                    event_id=f'DSH{i}', title=f'Dashboard event {i}', description='Benchmark event',
+                    event_type=base.event_type, start_date=base.start_date, end_date=base.end_date,
+                    start_time=base.start_time, end_time=base.end_time, expected_guests=50,
+                    venue=base.venue, organizer=base.organizer, event_manager=rng.choice(managers),
+                    status=rng.choice(statuses), total_budget=1000, venue_cost=100, total_cost=100,
+                )
+                for i in range(options['events'])
+            ], batch_size=2000)
+            event_ids = list(Event.objects.filter(event_id__startswith='DSH').values_list('id', flat=True))
+            Registration.objects.bulk_create([
+                Registration(event_id=rng.choice(event_ids), name=f'Guest {i}', email=f'guest{i}@example.com', phone='1')
+                for i in range(options['registrations'])
+            ], batch_size=5000)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            self.stdout.write(f"Synthetic data created in {time.perf_counter() - start:.1f} s")
+
+            start = time.perf_counter()
+            counters, days = stats.rebuild()
+            self.stdout.write(
+                f"rebuild_dashboard_stats: {counters} counters, {days} daily rows in {time.perf_counter() - start:.2f} s"
+            )
+
+            manager = managers[0]
+            self.stdout.write(f"\n{'dashboard':<10} {'':<13} {'queries':>8} {'median':>10}")
+            for label, live, materialized in [
+                ('admin', live_admin_dashboard, materialized_admin_dashboard),
+                ('manager', lambda: live_manager_dashboard(manager), lambda: materialized_manager_dashboard(manager)),
+            ]:
+                for kind, run in (('live tables', live), ('materialized', materialized)):
+                    queries, median = self._time(run, options['runs'])
+                    self.stdout.write(f"{label:<10} {kind:<13} {queries:>8} {median:8.2f}ms")
+            site = stats.dashboard_stats(stats.SITE)
+            if (site.events.total, site.registrations.total) != live_admin_dashboard()[::2]:
+                self.stdout.write(self.style.ERROR('materialized totals differ from the live counts'))
+
+            # Bookings go through Registration.save(), which now also updates
+            # two DailyStat rows (site and manager) in the same transaction.
+            event = Event.objects.get(pk=rng.choice(event_ids))
+            timings = []
+            for i in range(200):
+                start = time.perf_counter()
+                Registration.objects.create(event=event, name='Timed guest', email=f'timed{i}@example.com', phone='1')
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(f"\nRegistration.objects.create() with stats upkeep: {statistics.median(timings):.2f}ms")
+            transaction.set_rollback(True)
+
+    def _time(self, run, runs):
+        with CaptureQueriesContext(connection) as queries:
+            run()
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+        return len(queries), statistics.median(timings)
@@ -0,0 +1,114 @@
+import os
+import random
+import statistics
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.test.utils import override_settings
+
+from event_manager import write_behind
+from events.models import Event
+from payments import audit
+from payments.models import PaymentLog
+from users import activity
+from users.models import CustomUser, UserActivity
+
+
+class Command(BaseCommand):
+    help = (
+        'Time simulated requests that log two activities and a payment event '
+        'from concurrent threads, with the rows written inline (sync), at '
+        'request end and by the background writer; then kill a process with '
+        'rows still buffered and replay its spill file. Runs against the real '
+        'database and deletes its rows afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=500, help='Requests per thread and mode')
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        tag = uuid.uuid4().hex[:8]
+        # Created one by one so the dashboard counters see them come and go.
+        users = [
+            CustomUser.objects.create(
+                username=f'wb-bench-{tag}-{i}', email=f'wb-bench-{tag}-{i}@example.com', user_type='user',
+            )
+            for i in range(options['users'])
+        ]
+        try:
+            self.stdout.write(f"{'mode':<12} {'requests':>9} {'p50':>9} {'p99':>9} {'max':>9} {'rows':>7}")
+            for current_mode in ('sync', 'request', 'background'):
+                self._run(current_mode, users, rng, options)
+            self._crash(users)
+        finally:
+            write_behind.flush_all()
+            UserActivity.objects.filter(user__in=users).delete()
+            PaymentLog.objects.filter(user__in=users).delete()
+            for user in users:
+                user.delete()
+
+    def _run(self, current_mode, users, rng, options):
+        expected = options['threads'] * options['requests']
+        before = (
+            UserActivity.objects.filter(user__in=users).count(), PaymentLog.objects.filter(user__in=users).count()
+        )
+        timings = []
+        choices = [[rng.choice(users) for _ in range(options['requests'])] for _ in range(options['threads'])]
+
+        def client(picks):
+            local = []
+            for user in picks:
+                start = time.perf_counter()
+                # The request itself: one read, then its log rows.
+                Event.objects.filter(status='published').exists()
+                activity.record(user, 'event_view', metadata={'venue_id': 1})
+                activity.record(user, 'event_booking', metadata={'venue_id': 1})
+                audit.log(user, 'Benchmark payment', details={'amount': '10.00'})
+                if current_mode == 'request':
+                    write_behind.flush_all()
+                local.append((time.perf_counter() - start) * 1000)
+            timings.extend(local)
+            close_old_connections()
+            connections.close_all()
+
+        with override_settings(WRITE_BEHIND_MODE=current_mode):
+            threads = [threading.Thread(target=client, args=(picks,)) for picks in choices]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            write_behind.flush_all()
+        rows = (
+            UserActivity.objects.filter(user__in=users).count() - before[0]
+            + PaymentLog.objects.filter(user__in=users).count() - before[1]
+        )
+        timings.sort()
+        self.stdout.write(
+            f"{current_mode:<12} {len(timings):>9} {statistics.median(timings):7.2f}ms "
+            f"{timings[int(len(timings) * 0.99)]:7.2f}ms {timings[-1]:7.2f}ms {rows:>7}"
+        )
+        if rows != 3 * expected:
+            self.stdout.write(self.style.ERROR(f'{current_mode}: expected {3 * expected} rows, found {rows}'))
+
+    def _crash(self, users):
+        # A child process buffers rows and dies before writing them.
+        before = UserActivity.objects.filter(user__in=users).count()
+        connections.close_all()
+        with override_settings(WRITE_BEHIND_MODE='request'):
+            pid = os.fork()
+            if pid == 0:
+                for user in users:
+                    activity.record(user, 'event_view')
+                os._exit(1)
+            os.waitpid(pid, 0)
+        replayed = write_behind.replay()
+        found = UserActivity.objects.filter(user__in=users).count() - before
+        style = self.style.SUCCESS if found == len(users) else self.style.ERROR
+        self.stdout.write(style(f"\nKilled process: {replayed} rows replayed from its spill file, {found}/{len(users)} written"))
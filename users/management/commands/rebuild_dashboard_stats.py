@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users import stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the materialized dashboard statistics from the source tables '
+        '(after bulk loads that bypass signals, or nightly to be safe).'
+    )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        counters, days = stats.rebuild()
+        self.stdout.write(f"Rebuilt {counters} counters and {days} daily rows in {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from event_manager.write_behind import SPILL_DIR, replay
+
+
+class Command(BaseCommand):
+    help = 'Write the buffered log rows that crashed or killed processes left in the write-behind spill files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', default='*', help='Only replay one model, e.g. users.useractivity.')
+
+    def handle(self, *args, **options):
+        written = replay(options['model'])
+        self.stdout.write(self.style.SUCCESS(f'Replayed {written} rows from {SPILL_DIR}.'))
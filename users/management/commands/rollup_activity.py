@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.activity import ROLLUP_BATCH_SIZE, compact, roll_up
+
+
+class Command(BaseCommand):
+    help = 'Fold new user activities into hourly, daily and weekly rollups, then apply the retention periods.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=ROLLUP_BATCH_SIZE, help='Raw rows folded per transaction.')
+        parser.add_argument('--no-compact', action='store_true', help='Roll up only; keep expired rows and buckets.')
+        parser.add_argument('--loop', action='store_true', help='Keep rolling up instead of exiting once caught up.')
+        parser.add_argument('--interval', type=float, default=60.0, help='Seconds to sleep between runs with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            folded = 0
+            while True:
+                count = roll_up(batch_size=options['batch_size'])
+                if not count:
+                    break
+                folded += count
+            message = f'Rolled up {folded} activities.'
+            if not options['no_compact']:
+                raw, hourly, daily = compact()
+                message += f' Deleted {raw} expired activities, {hourly} hourly and {daily} daily buckets.'
+            self.stdout.write(message)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.7 on 2026-10-17 08:46
+
+from django.db import migrations, models
+
+
+def fill_dashboard_stats(apps, schema_editor):
+    from users.stats import rebuild
+
+    rebuild(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+        ("events", "0008_keyset_order_index"),
+        ("payments", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("scope", models.PositiveIntegerField()),
+                ("day", models.DateField()),
+                ("events", models.IntegerField(default=0)),
+                ("users", models.IntegerField(default=0)),
+                ("registrations", models.IntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+            options={
+                "db_table": "daily_stats",
+                "ordering": ["scope", "day"],
+            },
+        ),
+        migrations.CreateModel(
+            name="DashboardStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("scope", models.PositiveIntegerField()),
+                ("metric", models.CharField(max_length=50)),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "dashboard_stats",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dashboardstat",
+            constraint=models.UniqueConstraint(
+                fields=("scope", "metric"), name="dashboard_stat_unique"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="dailystat",
+            constraint=models.UniqueConstraint(
+                fields=("scope", "day"), name="daily_stat_unique"
+            ),
+        ),
+        migrations.RunPython(fill_dashboard_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 4.2.7 on 2026-10-17 08:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_dashboard_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ActivityRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("hour", "Hour"), ("day", "Day"), ("week", "Week")],
+                        max_length=4,
+                    ),
+                ),
+                ("start", models.DateTimeField()),
+                (
+                    "activity_type",
+                    models.CharField(
+                        choices=[
+                            ("login", "Login"),
+                            ("logout", "Logout"),
+                            ("profile_update", "Profile Update"),
+                            ("venue_view", "Venue View"),
+                            ("event_booking", "Event Booking"),
+                            ("payment", "Payment"),
+                            ("message_sent", "Message Sent"),
+                            ("consultation_request", "Consultation Request"),
+                        ],
+                        max_length=50,
+                    ),
+                ),
+                (
+                    "user_type",
+                    models.CharField(
+                        choices=[
+                            ("user", "Regular User"),
+                            ("manager", "Event Manager"),
+                            ("admin", "Administrator"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("venue_id", models.PositiveIntegerField(default=0)),
+                ("count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "user_activity_rollups",
+            },
+        ),
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("last_id", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "rollup_watermarks",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="useractivity",
+            index=models.Index(fields=["created_at"], name="user_activity_created_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="activityrollup",
+            constraint=models.UniqueConstraint(
+                fields=("period", "start", "activity_type", "user_type", "venue_id"),
+                name="activity_rollup_unique",
+            ),
+        ),
+    ]
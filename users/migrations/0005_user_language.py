@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0004_activity_created_default"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="language",
+            field=models.CharField(blank=True, max_length=10),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import RegexValidator
 from django_countries.fields import CountryField
@@ -65,6 +66,8 @@ class CustomUser(AbstractUser):
     notification_email = models.BooleanField(default=True)
     notification_sms = models.BooleanField(default=False)
     notification_push = models.BooleanField(default=True)
+    # Language code notifications are rendered in; blank for LANGUAGE_CODE
+    language = models.CharField(max_length=10, blank=True)
     
     # Social media links
     facebook_url = models.URLField(blank=True)
@@ -269,11 +272,105 @@ class UserActivity(models.Model):
     metadata = models.JSONField(default=dict, blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when recorded, not when the write-behind buffer gets to the INSERT.
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         db_table = 'user_activities'
         ordering = ['-created_at']
+        indexes = [
+            # Retention deletes (users.activity.compact) and newest-first lists
+            models.Index(fields=['created_at'], name='user_activity_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.get_activity_type_display()} at {self.created_at}"
+
+
+class ActivityRollup(models.Model):
+    """
+    UserActivity counts per time bucket, built by users.activity
+    """
+    PERIOD_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+        ('week', 'Week'),
+    ]
+    
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    start = models.DateTimeField()
+    activity_type = models.CharField(max_length=50, choices=UserActivity.ACTIVITY_TYPES)
+    user_type = models.CharField(max_length=10, choices=CustomUser.USER_TYPE_CHOICES)
+    # metadata['venue_id'] of the activities, 0 when they had none
+    venue_id = models.PositiveIntegerField(default=0)
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'user_activity_rollups'
+        constraints = [
+            # Also the index of analytics reads: a period over a range of starts
+            models.UniqueConstraint(
+                fields=['period', 'start', 'activity_type', 'user_type', 'venue_id'], name='activity_rollup_unique',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.period} {self.start}: {self.activity_type} x{self.count}"
+
+
+class RollupWatermark(models.Model):
+    """
+    Highest source row id a rollup job has folded in
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'rollup_watermarks'
+    
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
+
+
+class DashboardStat(models.Model):
+    """
+    Materialized dashboard counter (events by status, users by type),
+    kept current by users.stats
+    """
+    # 0 for the site-wide admin dashboard, otherwise a manager's user id
+    scope = models.PositiveIntegerField()
+    metric = models.CharField(max_length=50)
+    value = models.BigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'dashboard_stats'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'metric'], name='dashboard_stat_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope}:{self.metric} = {self.value}"
+
+
+class DailyStat(models.Model):
+    """
+    Per-day totals behind the dashboards' period figures, kept current
+    by users.stats
+    """
+    scope = models.PositiveIntegerField()
+    day = models.DateField()
+    events = models.IntegerField(default=0)
+    users = models.IntegerField(default=0)
+    registrations = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        db_table = 'daily_stats'
+        ordering = ['scope', 'day']
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'day'], name='daily_stat_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope}:{self.day}"
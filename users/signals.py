@@ -0,0 +1,160 @@
+from django.contrib.auth.models import Group
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from events.models import Event, Registration
+from payments.models import Payment
+
+from .models import CustomUser
+from . import activity, authorization, stats
+
+# Rows counted on the dashboards: the fields their state reads, how to
+# take that state and how to count it (see users.stats).
+COUNTED = {
+    Event: (('status', 'event_manager_id', 'created_at'), stats.event_state, stats.count_event),
+    Registration: (('event_id', 'created_at'), stats.registration_state, stats.count_registration),
+    Payment: (
+        ('status', 'invoice_id', 'payment_date', 'created_at', 'amount'),
+        stats.payment_state, stats.count_payment,
+    ),
+    CustomUser: (('user_type', 'date_joined'), stats.user_state, stats.count_user),
+}
+
+# State of a row loaded with .only()/.defer(): read from the table if it
+# is saved or deleted, rather than loading deferred fields one by one.
+UNKNOWN = object()
+
+# Never NULL in the table, so None means the instance was built by hand
+# (Event(pk=1)) or by a fixture rather than loaded: its state is unknown too.
+CREATED_FIELDS = ('created_at', 'date_joined')
+
+
+@receiver(post_init, sender=Event)
+@receiver(post_init, sender=Registration)
+@receiver(post_init, sender=Payment)
+@receiver(post_init, sender=CustomUser)
+def remember_counted_state(sender, instance, **kwargs):
+    fields, state, _ = COUNTED[sender]
+    if instance.pk is None:
+        instance._loaded_stats = None
+    elif all(field in instance.__dict__ for field in fields) and not any(
+        instance.__dict__[field] is None for field in fields if field in CREATED_FIELDS
+    ):
+        instance._loaded_stats = state(instance)
+    else:
+        instance._loaded_stats = UNKNOWN
+
+
+@receiver(pre_save, sender=Event)
+@receiver(pre_save, sender=Registration)
+@receiver(pre_save, sender=Payment)
+@receiver(pre_save, sender=CustomUser)
+@receiver(pre_delete, sender=Event)
+@receiver(pre_delete, sender=Registration)
+@receiver(pre_delete, sender=Payment)
+@receiver(pre_delete, sender=CustomUser)
+def load_unknown_state(sender, instance, **kwargs):
+    if instance._loaded_stats is UNKNOWN:
+        stored = sender._base_manager.filter(pk=instance.pk).first()
+        instance._loaded_stats = COUNTED[sender][1](stored) if stored else None
+
+
+@receiver(post_save, sender=Event)
+def move_event_totals(sender, instance, raw=False, **kwargs):
+    # Runs before count_saved below replaces the remembered state.
+    old = instance._loaded_stats
+    if not raw and old and old[1] != instance.event_manager_id:
+        stats.move_event(instance.pk, old[1], instance.event_manager_id)
+
+
+@receiver(post_save, sender=Payment)
+def log_completed_payment(sender, instance, raw=False, **kwargs):
+    # A payment's stats state is only set once it is completed.
+    if not raw and instance._loaded_stats is None and stats.payment_state(instance):
+        activity.record(instance.user, 'payment', metadata={
+            'payment_id': instance.payment_id, 'amount': str(instance.amount), 'currency': instance.currency,
+        })
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Registration)
+@receiver(post_save, sender=Payment)
+@receiver(post_save, sender=CustomUser)
+def count_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _, state, count = COUNTED[sender]
+    old, new = instance._loaded_stats, state(instance)
+    if old != new:
+        if old:
+            count(old, -1)
+        if new:
+            count(new, 1)
+    instance._loaded_stats = new
+
+
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Registration)
+@receiver(post_delete, sender=Payment)
+@receiver(post_delete, sender=CustomUser)
+def count_deleted(sender, instance, **kwargs):
+    if instance._loaded_stats:
+        COUNTED[sender][2](instance._loaded_stats, -1)
+    instance._loaded_stats = None
+    if sender is CustomUser:
+        stats.forget_scope(instance.pk)
+
+
+@receiver(post_init, sender=CustomUser)
+def remember_role(sender, instance, **kwargs):
+    # UNKNOWN when user_type was deferred: treat a save as a role change.
+    instance._loaded_role = instance.__dict__.get('user_type', UNKNOWN) if instance.pk is not None else None
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_saved_user(sender, instance, created, raw=False, **kwargs):
+    # The Authorization built for this object may describe its old role.
+    instance.__dict__.pop('_authorization', None)
+    if raw:
+        return
+    if created or instance._loaded_role != instance.user_type:
+        authorization.invalidate_directory()
+    instance._loaded_role = instance.user_type
+
+
+@receiver(post_delete, sender=CustomUser)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    authorization.invalidate_directory()
+    authorization.invalidate_groups([instance.pk])
+
+
+@receiver(m2m_changed, sender=CustomUser.groups.through)
+def invalidate_memberships(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        authorization.invalidate_groups([instance.pk])
+    elif action == 'pre_clear':
+        # group.user_set.clear(): the members are only known beforehand.
+        instance._cleared_member_ids = list(instance.user_set.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        authorization.invalidate_groups(instance.__dict__.pop('_cleared_member_ids', []))
+    else:
+        authorization.invalidate_groups(pk_set)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_catalog(sender, instance, **kwargs):
+    authorization.invalidate_group_catalog()
+
+
+@receiver(user_logged_in)
+def log_login(sender, request, user, **kwargs):
+    activity.record(user, 'login', request=request)
+
+
+@receiver(user_logged_out)
+def log_logout(sender, request, user, **kwargs):
+    activity.record(user, 'logout', request=request)
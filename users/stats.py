@@ -0,0 +1,243 @@
+"""
+Materialized statistics behind the admin and manager dashboards.
+
+Counters (events by status, users by type) live in DashboardStat and
+per-day totals (new events, new users, bookings, revenue) in DailyStat,
+each under a scope: SITE for the admin dashboard, or a manager's user id
+for that manager's dashboard. The receivers in users.signals apply deltas
+in the same transaction as the write behind them, so a dashboard costs
+two indexed reads however many rows it sums up.
+
+Writes that skip model signals (bulk_create, QuerySet.update, raw SQL)
+are not counted: run ``manage.py rebuild_dashboard_stats`` after them,
+or on a schedule to be safe.
+"""
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from events.models import Event, Registration
+from payments.models import Payment
+
+from .models import CustomUser, DailyStat, DashboardStat
+
+SITE = 0
+
+DAILY_FIELDS = ('events', 'users', 'registrations', 'revenue')
+
+
+class Period(namedtuple('Period', 'total this_month last_month')):
+    __slots__ = ()
+
+    @property
+    def change(self):
+        """Percent change from last month to this month so far, or None."""
+        if not self.last_month:
+            return None
+        return round((self.this_month - self.last_month) * 100 / self.last_month)
+
+
+DashboardStats = namedtuple('DashboardStats', 'events users registrations revenue events_by_status users_by_type')
+
+
+def _scopes(manager_id):
+    return (SITE, manager_id) if manager_id else (SITE,)
+
+
+def _day(value):
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def _upsert(model, key, deltas):
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**key).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Another writer created the row between our update and insert.
+        model.objects.filter(**key).update(**updates)
+
+
+def add(scope, metric, delta):
+    """Add delta to one counter of a scope."""
+    if delta:
+        _upsert(DashboardStat, {'scope': scope, 'metric': metric}, {'value': delta})
+
+
+def add_day(scope, day, **deltas):
+    """Add to the daily totals of a scope, e.g. add_day(SITE, day, events=1)."""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if deltas:
+        _upsert(DailyStat, {'scope': scope, 'day': day}, deltas)
+
+
+def _manager_of(event_id):
+    return Event.objects.filter(pk=event_id).values_list('event_manager_id', flat=True).first()
+
+
+# What each counted row contributes, as a hashable state remembered when
+# the row is loaded. A save takes the old state back and adds the new.
+
+def event_state(event):
+    return (event.status, event.event_manager_id, _day(event.created_at))
+
+
+def count_event(state, sign):
+    status, manager_id, day = state
+    for scope in _scopes(manager_id):
+        add(scope, f'events:{status}', sign)
+        add_day(scope, day, events=sign)
+
+
+def registration_state(registration):
+    return (registration.event_id, _day(registration.created_at))
+
+
+def count_registration(state, sign):
+    event_id, day = state
+    for scope in _scopes(_manager_of(event_id)):
+        add_day(scope, day, registrations=sign)
+
+
+def payment_state(payment):
+    # Only completed payments are revenue; the rest contribute nothing.
+    if payment.status != 'completed':
+        return None
+    return (payment.invoice_id, _day(payment.payment_date or payment.created_at), payment.amount)
+
+
+def count_payment(state, sign):
+    invoice_id, day, amount = state
+    manager_id = Event.objects.filter(invoices=invoice_id).values_list('event_manager_id', flat=True).first()
+    for scope in _scopes(manager_id):
+        add_day(scope, day, revenue=sign * Decimal(str(amount)))
+
+
+def user_state(user):
+    return (user.user_type, _day(user.date_joined))
+
+
+def count_user(state, sign):
+    user_type, day = state
+    add(SITE, f'users:{user_type}', sign)
+    add_day(SITE, day, users=sign)
+
+
+def move_event(event_id, old_manager_id, new_manager_id):
+    """Move an event's bookings and revenue from one manager's scope to another's."""
+    bookings = list(
+        Registration.objects.filter(event_id=event_id)
+        .annotate(day=TruncDate('created_at')).values('day').annotate(count=Count('id')).order_by()
+    )
+    revenue = list(
+        Payment.objects.filter(invoice__event_id=event_id, status='completed')
+        .annotate(day=TruncDate(Coalesce('payment_date', 'created_at')))
+        .values('day').annotate(amount=Sum('amount')).order_by()
+    )
+    for scope, sign in ((old_manager_id, -1), (new_manager_id, 1)):
+        if not scope:
+            continue
+        for row in bookings:
+            add_day(scope, row['day'], registrations=sign * row['count'])
+        for row in revenue:
+            add_day(scope, row['day'], revenue=sign * row['amount'])
+
+
+def forget_scope(scope):
+    """Drop the rows of a manager who no longer exists."""
+    DashboardStat.objects.filter(scope=scope).delete()
+    DailyStat.objects.filter(scope=scope).delete()
+
+
+@transaction.atomic
+def rebuild(apps=global_apps):
+    """
+    Recompute every counter and daily total from the source tables. A
+    migration passes its historical apps.
+    """
+    Event, Registration = apps.get_model('events', 'Event'), apps.get_model('events', 'Registration')
+    Payment, CustomUser = apps.get_model('payments', 'Payment'), apps.get_model('users', 'CustomUser')
+    DashboardStat, DailyStat = apps.get_model('users', 'DashboardStat'), apps.get_model('users', 'DailyStat')
+    counters = defaultdict(int)
+    days = defaultdict(lambda: defaultdict(int))
+
+    rows = (
+        Event.objects.annotate(day=TruncDate('created_at'))
+        .values_list('status', 'event_manager_id', 'day').annotate(count=Count('id')).order_by()
+    )
+    for status, manager_id, day, count in rows:
+        for scope in _scopes(manager_id):
+            counters[scope, f'events:{status}'] += count
+            days[scope, day]['events'] += count
+    rows = (
+        CustomUser.objects.annotate(day=TruncDate('date_joined'))
+        .values_list('user_type', 'day').annotate(count=Count('id')).order_by()
+    )
+    for user_type, day, count in rows:
+        counters[SITE, f'users:{user_type}'] += count
+        days[SITE, day]['users'] += count
+    rows = (
+        Registration.objects.annotate(day=TruncDate('created_at'))
+        .values_list('event__event_manager_id', 'day').annotate(count=Count('id')).order_by()
+    )
+    for manager_id, day, count in rows:
+        for scope in _scopes(manager_id):
+            days[scope, day]['registrations'] += count
+    rows = (
+        Payment.objects.filter(status='completed').annotate(day=TruncDate(Coalesce('payment_date', 'created_at')))
+        .values_list('invoice__event__event_manager_id', 'day').annotate(amount=Sum('amount')).order_by()
+    )
+    for manager_id, day, amount in rows:
+        for scope in _scopes(manager_id):
+            days[scope, day]['revenue'] += amount
+
+    DashboardStat.objects.all().delete()
+    DailyStat.objects.all().delete()
+    DashboardStat.objects.bulk_create(
+        [DashboardStat(scope=scope, metric=metric, value=value) for (scope, metric), value in counters.items() if value],
+        batch_size=1000,
+    )
+    DailyStat.objects.bulk_create(
+        [DailyStat(scope=scope, day=day, **totals) for (scope, day), totals in days.items()],
+        batch_size=1000,
+    )
+    return len(counters), len(days)
+
+
+def dashboard_stats(scope=SITE):
+    """The counters and period totals of a scope: SITE or a manager's user id."""
+    counters = dict(DashboardStat.objects.filter(scope=scope).values_list('metric', 'value'))
+    this_month = timezone.localdate().replace(day=1)
+    last_month = (this_month - timedelta(days=1)).replace(day=1)
+    totals = DailyStat.objects.filter(scope=scope).aggregate(**{field: Sum(field) for field in DAILY_FIELDS})
+    # At most two months of rows: cheaper summed here than as twelve
+    # filtered aggregates, which cost more to compile than to run.
+    months = {this_month: dict.fromkeys(DAILY_FIELDS, 0), last_month: dict.fromkeys(DAILY_FIELDS, 0)}
+    for day, *values in DailyStat.objects.filter(scope=scope, day__gte=last_month).values_list('day', *DAILY_FIELDS):
+        month = months.get(day.replace(day=1))  # None for future-dated rows
+        if month is None:
+            continue
+        for field, value in zip(DAILY_FIELDS, values):
+            month[field] += value
+    periods = {
+        field: Period(totals[field] or 0, months[this_month][field], months[last_month][field])
+        for field in DAILY_FIELDS
+    }
+
+    def breakdown(prefix):
+        return {
+            metric[len(prefix):]: value
+            for metric, value in counters.items() if metric.startswith(prefix) and value
+        }
+
+    return DashboardStats(
+        events_by_status=breakdown('events:'), users_by_type=breakdown('users:'), **periods,
+    )
@@ -4,10 +4,12 @@ from django.contrib.auth import login, logout, authenticate, update_session_auth
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, PasswordChangeForm
+from django.db.models import Count
 from .forms import CustomUserCreationForm, CustomUserChangeForm
 from .models import CustomUser
 from events.models import Event, Registration
-from . import role_required
+from event_manager.routers import use_replicas
+from . import role_required, stats
 
 def home(request):
     """Home page view"""
@@ -168,21 +170,35 @@ def my_messages(request):
     return render(request, 'users/placeholder.html', context)
 
 @role_required(['admin'])
+@use_replicas
 def admin_dashboard(request):
-    events = Event.objects.all()
-    registrations = Registration.objects.all()
-    users = CustomUser.objects.all()
+    # Totals come from the materialized stats; only the short lists touch
+    # the source tables, newest first by primary key.
+    recent_events = Event.objects.select_related('venue', 'event_manager').order_by('-id')[:5]
+    recent_users = CustomUser.objects.order_by('-id')[:5]
     return render(request, 'users/admin_dashboard.html', {
-        'events': events,
-        'registrations': registrations,
-        'users': users,
+        'stats': stats.dashboard_stats(stats.SITE),
+        'recent_events': recent_events,
+        'recent_users': recent_users,
     })
 
 @role_required(['manager'])
+@use_replicas
 def manager_dashboard(request):
-    events = Event.objects.filter(event_manager=request.user)
-    registrations = Registration.objects.filter(event__event_manager=request.user)
+    recent_events = list(
+        Event.objects.filter(event_manager=request.user).select_related('venue').order_by('-created_at', '-id')[:5]
+    )
+    bookings = dict(
+        Registration.objects.filter(event__in=recent_events)
+        .values_list('event_id').annotate(count=Count('id')).order_by()
+    )
+    for event in recent_events:
+        event.booking_count = bookings.get(event.pk, 0)
+    recent_registrations = (
+        Registration.objects.filter(event__event_manager=request.user).select_related('event').order_by('-id')[:5]
+    )
     return render(request, 'users/manager_dashboard.html', {
-        'events': events,
-        'registrations': registrations,
+        'stats': stats.dashboard_stats(request.user.pk),
+        'recent_events': recent_events,
+        'recent_registrations': recent_registrations,
     })
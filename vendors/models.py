@@ -6,6 +6,8 @@ from imagekit.models import ProcessedImageField
 from imagekit.processors import ResizeToFill
 import uuid
 
+from venues import geo
+
 
 class VendorCategory(models.Model):
     """
@@ -64,8 +66,12 @@ class Vendor(models.Model):
     state = models.CharField(max_length=100)
     country = CountryField()
     postal_code = models.CharField(max_length=20, blank=True)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    geo_cell = models.IntegerField(null=True, blank=True, editable=False)  # see venues.geo
     service_areas = models.JSONField(default=list, blank=True)
-    travel_radius = models.PositiveIntegerField(default=50)  # in miles/km
+    travel_radius = models.PositiveIntegerField(default=50)  # in km
+    travel_band = models.PositiveSmallIntegerField(default=0, editable=False)  # see venues.geo
     
     # Services and pricing
     description = models.TextField()
@@ -118,6 +124,10 @@ class Vendor(models.Model):
     class Meta:
         db_table = 'vendors'
         ordering = ['-is_featured', '-average_rating', '-created_at']
+        indexes = [
+            # Travel-radius coverage (venues.nearby)
+            models.Index(fields=['travel_band', 'geo_cell'], name='vendors_travel_band_cell_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -127,6 +137,8 @@ class Vendor(models.Model):
             self.vendor_id = f"VENDOR{uuid.uuid4().hex[:8].upper()}"
         if not self.slug:
             self.slug = f"{self.name.lower().replace(' ', '-')}-{self.vendor_id.lower()}"
+        self.geo_cell = geo.cell_for(self.latitude, self.longitude)
+        self.travel_band = geo.travel_band(self.travel_radius)
         super().save(*args, **kwargs)
     
     @property
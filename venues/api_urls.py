@@ -6,8 +6,10 @@ app_name = 'venues_api'
 urlpatterns = [
     # Venue API endpoints
     path('venues/', api_views.VenueListView.as_view(), name='venue_list'),
-    path('venues/<slug:slug>/', api_views.VenueDetailView.as_view(), name='venue_detail'),
+    path('venues/available/', api_views.AvailableVenuesView.as_view(), name='available_venues'),
     path('venues/search/', api_views.VenueSearchView.as_view(), name='venue_search'),
+    path('venues/nearby/', api_views.NearbyVenuesView.as_view(), name='nearby_venues'),
+    path('venues/<slug:slug>/', api_views.VenueDetailView.as_view(), name='venue_detail'),
     
     # 360° Tour API
     path('venues/<slug:slug>/tour/', api_views.Venue360TourView.as_view(), name='venue_tour'),
@@ -17,6 +19,7 @@ urlpatterns = [
     path('venues/<slug:slug>/availability/', api_views.VenueAvailabilityView.as_view(), name='venue_availability'),
     path('venues/<slug:slug>/book/', api_views.VenueBookingView.as_view(), name='venue_booking'),
     path('venues/<slug:slug>/packages/', api_views.VenuePackagesView.as_view(), name='venue_packages'),
+    path('venues/<slug:slug>/providers/', api_views.VenueProvidersView.as_view(), name='venue_providers'),
     
     # Venue reviews
     path('venues/<slug:slug>/reviews/', api_views.VenueReviewsView.as_view(), name='venue_reviews'),
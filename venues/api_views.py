@@ -1,6 +1,27 @@
 from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
+from django.utils.decorators import method_decorator
 from django.views import View
 
+from event_manager.routers import use_replicas
+
+from . import availability, nearby, search
+from .models import Venue
+
+
+def _window(request):
+    """
+    The ?start=&end= ISO datetimes of an availability query.
+    """
+    start = parse_datetime(request.GET.get('start', ''))
+    end = parse_datetime(request.GET.get('end', ''))
+    if start is None or end is None:
+        raise ValueError("start and end must be ISO 8601 datetimes.")
+    if end <= start:
+        raise ValueError("end must be after start.")
+    return start, end
+
 class VenueListView(View):
     def get(self, request):
         return JsonResponse({"message": "Venue list API - Coming soon!"})
@@ -9,9 +30,33 @@ class VenueDetailView(View):
     def get(self, request, slug):
         return JsonResponse({"message": f"Venue detail API for {slug} - Coming soon!"})
 
+@method_decorator(use_replicas, name='dispatch')
 class VenueSearchView(View):
+    """
+    Filtered, sorted and paged venues with facet counts for every filter;
+    ?cursor= takes the next or previous cursor of an earlier response.
+    """
     def get(self, request):
-        return JsonResponse({"message": "Venue search API - Coming soon!"})
+        try:
+            filters = search.parse_filters(request.GET)
+            page_size = int(request.GET.get('page_size', search.PAGE_SIZE))
+            result = search.search_venues(
+                filters,
+                cursor=request.GET.get('cursor'),
+                page_size=page_size,
+                sort=request.GET.get('sort', 'relevance'),
+                with_facets=request.GET.get('facets') != '0',
+            )
+        except ValueError as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+        return JsonResponse({
+            "count": result.count,
+            "next": result.next_cursor,
+            "previous": result.previous_cursor,
+            "page_size": result.page_size,
+            "results": result.results,
+            "facets": result.facets,
+        })
 
 class Venue360TourView(View):
     def get(self, request, slug):
@@ -22,8 +67,122 @@ class TourHotspotsView(View):
         return JsonResponse({"message": f"Tour hotspots API for {slug} - Coming soon!"})
 
 class VenueAvailabilityView(View):
+    """
+    Is the venue free for ?start=&end=, and if not, what is in the way.
+    """
+    def get(self, request, slug):
+        venue = get_object_or_404(Venue, slug=slug)
+        try:
+            start, end = _window(request)
+        except ValueError as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+        result = availability.check_venue(venue, start, end)
+        return JsonResponse({
+            "venue": venue.slug,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "available": result.available and venue.is_available,
+            "price": str(result.price if result.price is not None else venue.base_price),
+            "conflicts": [
+                {
+                    "kind": conflict.kind,
+                    "id": conflict.reference,
+                    "date": day.isoformat(),
+                    "start": f"{conflict.start // 60:02d}:{conflict.start % 60:02d}",
+                    "end": f"{conflict.end // 60:02d}:{conflict.end % 60:02d}",
+                }
+                for day, conflict in result.conflicts
+            ],
+        })
+
+
+@method_decorator(use_replicas, name='dispatch')
+class AvailableVenuesView(View):
+    """
+    Venues free for the whole of ?start=&end= that seat ?guests=, tightest fit first.
+    """
+    MAX_RESULTS = 100
+
+    def get(self, request):
+        try:
+            start, end = _window(request)
+            guests = int(request.GET.get('guests', 1))
+        except ValueError as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+        quotes = availability.free_venues(start, end, guests)
+        page = quotes[:self.MAX_RESULTS]
+        slugs = dict(Venue.objects.filter(id__in=[quote.venue_id for quote in page]).values_list('id', 'slug'))
+        return JsonResponse({
+            "count": len(quotes),
+            "venues": [
+                {"slug": slugs[quote.venue_id], "capacity_max": quote.capacity_max, "price": str(quote.price)}
+                for quote in page
+                if quote.venue_id in slugs
+            ],
+        })
+
+@method_decorator(use_replicas, name='dispatch')
+class NearbyVenuesView(View):
+    """
+    Venues within ?km= of ?lat=&lng=, nearest first.
+    """
+    def get(self, request):
+        try:
+            lat, lng = float(request.GET['lat']), float(request.GET['lng'])
+            radius_km = float(request.GET.get('km', 10))
+            limit = min(int(request.GET.get('limit', nearby.DEFAULT_LIMIT)), nearby.MAX_LIMIT)
+            results = nearby.venues_within(lat, lng, radius_km, limit=max(1, limit))
+        except (KeyError, ValueError):
+            return JsonResponse({"error": "lat and lng are required; lat, lng, km and limit must be numbers."}, status=400)
+        return JsonResponse({
+            "venues": [
+                {
+                    "slug": result.obj.slug,
+                    "name": result.obj.name,
+                    "city": result.obj.city,
+                    "category": result.obj.category.name,
+                    "capacity_max": result.obj.capacity_max,
+                    "distance_km": result.distance_km,
+                }
+                for result in results
+            ],
+        })
+
+
+class VenueProvidersView(View):
+    """
+    Vendors and event managers whose travel radius covers the venue, nearest first.
+    """
     def get(self, request, slug):
-        return JsonResponse({"message": f"Availability API for {slug} - Coming soon!"})
+        venue = get_object_or_404(Venue, slug=slug)
+        try:
+            limit = max(1, min(int(request.GET.get('limit', nearby.DEFAULT_LIMIT)), nearby.MAX_LIMIT))
+        except ValueError:
+            return JsonResponse({"error": "limit must be a number."}, status=400)
+        if venue.latitude is None or venue.longitude is None:
+            return JsonResponse({"error": "This venue has no coordinates."}, status=400)
+        return JsonResponse({
+            "venue": venue.slug,
+            "vendors": [
+                {
+                    "slug": result.obj.slug,
+                    "name": result.obj.name,
+                    "category": result.obj.category.name,
+                    "travel_radius": result.obj.travel_radius,
+                    "distance_km": result.distance_km,
+                }
+                for result in nearby.vendors_covering(venue.latitude, venue.longitude, limit)
+            ],
+            "managers": [
+                {
+                    "manager_id": result.obj.manager_id,
+                    "name": result.obj.user.get_full_name() or result.obj.user.username,
+                    "travel_radius": result.obj.travel_radius,
+                    "distance_km": result.distance_km,
+                }
+                for result in nearby.managers_covering(venue.latitude, venue.longitude, limit)
+            ],
+        })
 
 class VenueBookingView(View):
     def post(self, request, slug):
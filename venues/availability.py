@@ -0,0 +1,331 @@
+"""
+Venue availability and conflict detection.
+
+Busy time for a venue comes from two sources: blocked VenueAvailability
+slots (is_blocked, or is_available=False) and Event bookings that are not
+cancelled or postponed. Available slots carrying a special_price are
+price overrides for the time they cover. Venues are open unless one of
+those says otherwise.
+
+Queries are answered from an in-memory index per calendar day. A day is
+built from one indexed range query per source, then held per venue as
+merged, sorted, disjoint [start, end) minute intervals. Overlap with a
+window is one bisect, the same answer an interval tree gives, without
+tree nodes to allocate. Days and the venue catalog carry version numbers
+in the Django cache; signals bump them when a booking, slot or venue
+changes, so every process drops stale days on its next query. They are
+built from the primary database, as a lagging replica would keep a stale
+day under its new version.
+"""
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, namedtuple
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from event_manager.cache import bump_version
+from event_manager.routers import primary
+from events.models import Event
+
+from .models import Venue, VenueAvailability
+
+MINUTES_PER_DAY = 24 * 60
+# Bookings in these states do not occupy the venue.
+INACTIVE_EVENT_STATUSES = ('cancelled', 'postponed')
+BOOKABLE_VENUE_STATUSES = ('active', 'featured')
+# Days kept in memory per process, and how long a day may be served
+# without re-checking its version (covers writes that bypass signals).
+MAX_CACHED_DAYS = 400
+MAX_DAY_AGE = 300
+
+Conflict = namedtuple('Conflict', ['kind', 'reference', 'start', 'end'])
+VenueAvailabilityResult = namedtuple('VenueAvailabilityResult', ['venue_id', 'available', 'conflicts', 'price'])
+VenueQuote = namedtuple('VenueQuote', ['venue_id', 'capacity_max', 'price'])
+
+
+# Versioning
+
+def _day_version_key(day):
+    return f'venue_availability:day:{day.isoformat()}'
+
+
+CATALOG_VERSION_KEY = 'venue_availability:catalog'
+
+
+def invalidate_days(first, last=None):
+    """
+    Mark every day from first to last (inclusive) as changed.
+    """
+    day = first
+    last = last or first
+    while day <= last:
+        bump_version(_day_version_key(day))
+        day += timedelta(days=1)
+
+
+def invalidate_catalog():
+    bump_version(CATALOG_VERSION_KEY)
+
+
+# Day index
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _merge(intervals):
+    intervals.sort()
+    starts, ends = [], []
+    for start, end in intervals:
+        if ends and start <= ends[-1]:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+def _overlaps(starts, ends, start, end):
+    """
+    True if [start, end) meets any of the disjoint sorted intervals.
+    """
+    i = bisect_right(starts, start) - 1
+    if i >= 0 and ends[i] > start:
+        return True
+    return i + 1 < len(starts) and starts[i + 1] < end
+
+
+class DayIndex:
+    """
+    Busy intervals and price overrides of every venue on one date.
+    """
+    __slots__ = ('day', 'version', 'built_at', 'busy', 'details', 'prices')
+
+    def __init__(self, day, version):
+        self.day = day
+        self.version = version
+        self.built_at = timezone.now()
+        self.busy = {}      # venue_id -> (starts, ends)
+        self.details = {}   # venue_id -> [Conflict, ...]
+        self.prices = {}    # venue_id -> [(start, end, price), ...]
+
+    @classmethod
+    def build(cls, day, version):
+        index = cls(day, version)
+        raw = {}
+
+        events = (
+            Event.objects.filter(start_date__lte=day, end_date__gte=day, venue__isnull=False)
+            .exclude(status__in=INACTIVE_EVENT_STATUSES)
+            .values_list('id', 'venue_id', 'start_date', 'start_time', 'end_date', 'end_time')
+        )
+        for event_id, venue_id, start_date, start_time, end_date, end_time in events:
+            start = _minutes(start_time) if start_date == day else 0
+            end = _minutes(end_time) if end_date == day else MINUTES_PER_DAY
+            if end <= start:
+                end = MINUTES_PER_DAY
+            raw.setdefault(venue_id, []).append(Conflict('event', event_id, start, end))
+
+        slots = VenueAvailability.objects.filter(date=day).values_list(
+            'id', 'venue_id', 'start_time', 'end_time', 'is_available', 'is_blocked', 'special_price'
+        )
+        for slot_id, venue_id, start_time, end_time, is_available, is_blocked, special_price in slots:
+            start, end = _minutes(start_time), _minutes(end_time)
+            if end <= start:
+                end = MINUTES_PER_DAY
+            if is_blocked or not is_available:
+                raw.setdefault(venue_id, []).append(Conflict('blocked', slot_id, start, end))
+            elif special_price is not None:
+                index.prices.setdefault(venue_id, []).append((start, end, special_price))
+
+        for venue_id, conflicts in raw.items():
+            index.busy[venue_id] = _merge([(c.start, c.end) for c in conflicts])
+            index.details[venue_id] = sorted(conflicts, key=lambda c: c.start)
+        return index
+
+    def is_busy(self, venue_id, start, end):
+        intervals = self.busy.get(venue_id)
+        return intervals is not None and _overlaps(intervals[0], intervals[1], start, end)
+
+    def conflicts(self, venue_id, start, end):
+        return [c for c in self.details.get(venue_id, ()) if c.start < end and c.end > start]
+
+    def special_price(self, venue_id, start, end):
+        prices = [price for s, e, price in self.prices.get(venue_id, ()) if s < end and e > start]
+        return max(prices) if prices else None
+
+
+class _Catalog:
+    """
+    Bookable venues sorted by capacity_max, so "fits N guests" is a bisect.
+    Each venue's base-price quote is built once and shared by every query.
+    """
+    def __init__(self, version):
+        self.version = version
+        self.built_at = timezone.now()
+        rows = sorted(
+            Venue.objects.filter(status__in=BOOKABLE_VENUE_STATUSES)
+            .values_list('capacity_max', 'id', 'capacity_min', 'base_price')
+        )
+        self.capacities = [row[0] for row in rows]
+        self.minimums = [row[2] for row in rows]
+        self.quotes = [VenueQuote(venue_id, capacity_max, base_price) for capacity_max, venue_id, _, base_price in rows]
+        self.base_prices = {quote.venue_id: quote.price for quote in self.quotes}
+
+    def fitting(self, guests):
+        first = bisect_left(self.capacities, guests)
+        minimums = self.minimums
+        return [quote for i, quote in enumerate(self.quotes[first:], first) if minimums[i] <= guests]
+
+
+class AvailabilityIndex:
+    """
+    Process-local cache of DayIndex objects and the venue catalog.
+    """
+    def __init__(self, max_days=MAX_CACHED_DAYS):
+        self.max_days = max_days
+        self.days = OrderedDict()
+        self.catalog = None
+        self.lock = threading.Lock()
+
+    def _fresh(self, entry, version):
+        return (
+            entry is not None
+            and entry.version == version
+            and (timezone.now() - entry.built_at).total_seconds() < MAX_DAY_AGE
+        )
+
+    def get_days(self, days):
+        versions = cache.get_many([_day_version_key(day) for day in days])
+        result = []
+        for day in days:
+            version = versions.get(_day_version_key(day), 0)
+            with self.lock:
+                entry = self.days.get(day)
+                if self._fresh(entry, version):
+                    self.days.move_to_end(day)
+                    result.append(entry)
+                    continue
+            with primary():
+                entry = DayIndex.build(day, version)
+            with self.lock:
+                self.days[day] = entry
+                self.days.move_to_end(day)
+                while len(self.days) > self.max_days:
+                    self.days.popitem(last=False)
+            result.append(entry)
+        return result
+
+    def get_catalog(self):
+        version = cache.get(CATALOG_VERSION_KEY, 0)
+        catalog = self.catalog
+        if not self._fresh(catalog, version):
+            with primary():
+                catalog = self.catalog = _Catalog(version)
+        return catalog
+
+    def clear(self):
+        with self.lock:
+            self.days.clear()
+            self.catalog = None
+
+
+index = AvailabilityIndex()
+
+
+# Queries
+
+def _local(value):
+    if timezone.is_aware(value):
+        value = timezone.localtime(value).replace(tzinfo=None)
+    return value
+
+
+def _day_windows(start, end):
+    """
+    Split [start, end) into (date, start_minute, end_minute) pieces.
+    """
+    start, end = _local(start), _local(end)
+    if end <= start:
+        raise ValueError('The window must end after it starts.')
+    pieces = []
+    day = start.date()
+    while True:
+        day_start = datetime.combine(day, time.min)
+        piece_start = _minutes(start.time()) if day == start.date() else 0
+        if end <= day_start + timedelta(days=1):
+            pieces.append((day, piece_start, _minutes(end.time()) if day == end.date() else MINUTES_PER_DAY))
+            return pieces
+        pieces.append((day, piece_start, MINUTES_PER_DAY))
+        day += timedelta(days=1)
+
+
+def check_venue(venue, start, end):
+    """
+    Is venue (a Venue or its id) free for the whole of [start, end)?
+    Returns a VenueAvailabilityResult listing what is in the way and the
+    price for the window (the highest special_price overlapping it, else
+    base_price).
+    """
+    venue_id = getattr(venue, 'pk', venue)
+    pieces = _day_windows(start, end)
+    days = index.get_days([day for day, _, _ in pieces])
+    conflicts, overrides = [], []
+    for day_index, (day, piece_start, piece_end) in zip(days, pieces):
+        if day_index.is_busy(venue_id, piece_start, piece_end):
+            conflicts.extend(
+                (day, conflict) for conflict in day_index.conflicts(venue_id, piece_start, piece_end)
+            )
+        override = day_index.special_price(venue_id, piece_start, piece_end)
+        if override is not None:
+            overrides.append(override)
+    price = max(overrides) if overrides else index.get_catalog().base_prices.get(venue_id)
+    return VenueAvailabilityResult(venue_id, not conflicts, conflicts, price)
+
+
+def is_venue_free(venue, start, end):
+    venue_id = getattr(venue, 'pk', venue)
+    pieces = _day_windows(start, end)
+    days = index.get_days([day for day, _, _ in pieces])
+    return not any(
+        day_index.is_busy(venue_id, piece_start, piece_end)
+        for day_index, (_, piece_start, piece_end) in zip(days, pieces)
+    )
+
+
+def free_venues(start, end, guests=1):
+    """
+    Bookable venues that seat guests and are free for the whole of
+    [start, end), tightest capacity first, as VenueQuote tuples.
+    """
+    pieces = _day_windows(start, end)
+    days = index.get_days([day for day, _, _ in pieces])
+    catalog = index.get_catalog()
+
+    busy = set()
+    for day_index, (_, piece_start, piece_end) in zip(days, pieces):
+        for venue_id, (starts, ends) in day_index.busy.items():
+            if venue_id not in busy and _overlaps(starts, ends, piece_start, piece_end):
+                busy.add(venue_id)
+
+    priced = set()
+    for day_index in days:
+        priced.update(day_index.prices)
+
+    quotes = []
+    for quote in catalog.fitting(guests):
+        venue_id = quote.venue_id
+        if venue_id in busy:
+            continue
+        if venue_id in priced:
+            overrides = [
+                day_index.special_price(venue_id, piece_start, piece_end)
+                for day_index, (_, piece_start, piece_end) in zip(days, pieces)
+            ]
+            overrides = [override for override in overrides if override is not None]
+            if overrides:
+                quote = quote._replace(price=max(overrides))
+        quotes.append(quote)
+    return quotes
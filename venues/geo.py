@@ -0,0 +1,122 @@
+"""
+Grid cells and great-circle distances for geo queries.
+
+The globe is cut into GRID_DEGREES x GRID_DEGREES cells numbered row by
+row from the south-west corner, and every geo-indexed model stores the
+number of the cell it sits in (geo_cell). A bounding box is then one
+contiguous run of cell numbers per grid row, which an ordinary B-tree
+index on geo_cell answers as a handful of range scans on SQLite and
+MySQL alike. Candidates from the box are refined with the haversine
+distance in Python.
+
+Nothing in this module touches the database, so models can import it.
+"""
+import math
+from bisect import bisect_left
+
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+# 0.1 degree is about 11 km north-south: a 50 km search spans ~10 rows.
+GRID_DEGREES = 0.1
+GRID_COLUMNS = int(round(360 / GRID_DEGREES))
+GRID_ROWS = int(round(180 / GRID_DEGREES))
+# Boxes taller than this many rows are read as one geo_cell span from
+# their first row to their last, refined by the lat/lng range.
+MAX_ROW_RANGES = 12
+# Upper bounds (km) of the travel_radius bands stored as travel_band on
+# vendors and managers; radii past the last bound share one more band.
+TRAVEL_RADIUS_BANDS = [10, 25, 50, 100, 250, 500]
+
+
+def _row(lat):
+    return min(GRID_ROWS - 1, max(0, int(math.floor((lat + 90.0) / GRID_DEGREES))))
+
+
+def _column(lng):
+    return int(math.floor(((lng + 180.0) % 360.0) / GRID_DEGREES)) % GRID_COLUMNS
+
+
+def cell_for(lat, lng):
+    """
+    The grid cell of a point, or None if either coordinate is missing.
+    """
+    if lat is None or lng is None:
+        return None
+    return _row(float(lat)) * GRID_COLUMNS + _column(float(lng))
+
+
+def travel_band(radius_km):
+    """
+    Index into TRAVEL_RADIUS_BANDS of the band holding radius_km.
+    """
+    return bisect_left(TRAVEL_RADIUS_BANDS, radius_km or 0)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (float(lat1), float(lng1), float(lat2), float(lng2)))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat, lng, radius_km):
+    """
+    (min_lat, max_lat, min_lng, max_lng) of every point within radius_km.
+    Longitudes may run past +/-180 when the box crosses the antimeridian;
+    a box reaching a pole spans every longitude.
+    """
+    lat, lng = float(lat), float(lng)
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return min_lat, max_lat, -180.0, 180.0
+    # Widest point of the circle is at the latitude nearest the pole.
+    cos_lat = min(math.cos(math.radians(min_lat)), math.cos(math.radians(max_lat)))
+    dlng = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+    if dlng >= 180.0:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, lng - dlng, lng + dlng
+
+
+def _column_runs(min_lng, max_lng):
+    if max_lng - min_lng >= 360.0 - GRID_DEGREES:
+        return [(0, GRID_COLUMNS - 1)]
+    first, last = _column(min_lng), _column(max_lng)
+    if first <= last:
+        return [(first, last)]
+    return [(first, GRID_COLUMNS - 1), (0, last)]  # crosses the antimeridian
+
+
+def box_terms(lat, lng, radius_km, prefix=''):
+    """
+    Q objects whose union is every geo-indexed row inside the bounding box
+    of the circle: one geo_cell range per grid row, each with the latitude
+    range. Keeping them as separate top-level OR terms lets the database
+    answer each from the geo_cell index. prefix lets the filter run across
+    a relation (e.g. 'venue__').
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    latitude = {f'{prefix}latitude__gte': min_lat, f'{prefix}latitude__lte': max_lat}
+    first_row, last_row = _row(min_lat), _row(max_lat)
+    if last_row - first_row + 1 > MAX_ROW_RANGES:
+        span = {
+            f'{prefix}geo_cell__gte': first_row * GRID_COLUMNS,
+            f'{prefix}geo_cell__lt': (last_row + 1) * GRID_COLUMNS,
+        }
+        if -180.0 <= min_lng and max_lng <= 180.0:
+            span.update({f'{prefix}longitude__gte': min_lng, f'{prefix}longitude__lte': max_lng})
+        return [Q(**latitude, **span)]
+    terms = []
+    for row in range(first_row, last_row + 1):
+        for first, last in _column_runs(min_lng, max_lng):
+            base = row * GRID_COLUMNS
+            terms.append(Q(**latitude, **{f'{prefix}geo_cell__gte': base + first, f'{prefix}geo_cell__lte': base + last}))
+    return terms
+
+
+def box_q(lat, lng, radius_km, prefix=''):
+    return Q(*box_terms(lat, lng, radius_km, prefix), _connector=Q.OR)
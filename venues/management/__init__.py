@@ -0,0 +1 @@
+# Management package for venues app
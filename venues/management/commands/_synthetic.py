@@ -0,0 +1,134 @@
+"""
+Synthetic venues, vendors and managers for the venues benchmarks.
+Everything here is meant to run inside a transaction that the caller
+rolls back.
+"""
+import random
+import uuid
+
+from managers.models import EventManager
+from users.models import CustomUser
+from vendors.models import Vendor, VendorCategory
+from venues import geo
+from venues.models import Venue, VenueCategory
+
+CITIES = [
+    ('Mumbai', 'Maharashtra', 19.0760, 72.8777),
+    ('Delhi', 'Delhi', 28.7041, 77.1025),
+    ('Bengaluru', 'Karnataka', 12.9716, 77.5946),
+    ('Ahmedabad', 'Gujarat', 23.0225, 72.5714),
+    ('Pune', 'Maharashtra', 18.5204, 73.8567),
+    ('Jaipur', 'Rajasthan', 26.9124, 75.7873),
+    ('Chennai', 'Tamil Nadu', 13.0827, 80.2707),
+    ('Kolkata', 'West Bengal', 22.5726, 88.3639),
+]
+CATEGORIES = ['Banquet Hall', 'Garden', 'Conference Centre', 'Rooftop', 'Resort', 'Auditorium']
+FEATURES = ['parking', 'wifi', 'catering', 'ac', 'stage', 'projector', 'pool', 'bar']
+
+
+def make_venues(count, seed=0):
+    rng = random.Random(seed)
+    tag = uuid.uuid4().hex[:6]
+    categories = [VenueCategory.objects.get_or_create(name=name)[0] for name in CATEGORIES]
+    venues = []
+    for i in range(count):
+        city, state, lat, lng = rng.choice(CITIES)
+        capacity = rng.choice([50, 100, 150, 200, 300, 500, 800, 1200])
+        venue_id = f'VENUE{tag.upper()}{i}'
+        latitude = round(lat + rng.uniform(-0.3, 0.3), 6)
+        longitude = round(lng + rng.uniform(-0.3, 0.3), 6)
+        venues.append(Venue(
+            name=f'Bench Venue {i}',
+            slug=f'bench-venue-{tag}-{i}',
+            venue_id=venue_id,
+            category=rng.choice(categories),
+            address=f'{i} Bench Road',
+            city=city,
+            state=state,
+            country='IN',
+            latitude=latitude,
+            longitude=longitude,
+            geo_cell=geo.cell_for(latitude, longitude),
+            capacity_min=max(1, capacity // 10),
+            capacity_max=capacity,
+            base_price=rng.randrange(10000, 500000, 500),
+            price_per_person=rng.randrange(300, 3000, 50),
+            description='Benchmark venue',
+            features=rng.sample(FEATURES, rng.randint(1, 5)),
+            average_rating=round(rng.uniform(2.5, 5.0), 2),
+            status=rng.choice(['active'] * 8 + ['featured', 'inactive']),
+        ))
+    Venue.objects.bulk_create(venues, batch_size=1000)
+    return list(Venue.objects.filter(slug__startswith=f'bench-venue-{tag}-').order_by('id'))
+
+
+TRAVEL_RADII = [10, 25, 25, 50, 50, 50, 100, 100, 250, 800]
+
+
+def _scattered_point(rng):
+    # Most providers near a city, the rest anywhere in the country.
+    if rng.random() < 0.8:
+        _, _, lat, lng = rng.choice(CITIES)
+        return round(lat + rng.uniform(-1.0, 1.0), 6), round(lng + rng.uniform(-1.0, 1.0), 6)
+    return round(rng.uniform(8.0, 32.0), 6), round(rng.uniform(69.0, 89.0), 6)
+
+
+def make_vendors(count, seed=0):
+    rng = random.Random(seed)
+    tag = uuid.uuid4().hex[:6]
+    category, _ = VendorCategory.objects.get_or_create(name='Benchmark')
+    vendors = []
+    for i in range(count):
+        lat, lng = _scattered_point(rng)
+        travel_radius = rng.choice(TRAVEL_RADII)
+        vendor_id = f'V{tag.upper()}{i}'
+        vendors.append(Vendor(
+            name=f'Bench Vendor {i}',
+            slug=f'bench-vendor-{tag}-{i}',
+            vendor_id=vendor_id,
+            category=category,
+            contact_person='Bench',
+            contact_phone='0000000000',
+            contact_email=f'vendor{i}@bench.invalid',
+            address=f'{i} Bench Road',
+            city='Bench',
+            state='Bench',
+            country='IN',
+            latitude=lat,
+            longitude=lng,
+            geo_cell=geo.cell_for(lat, lng),
+            travel_radius=travel_radius,
+            travel_band=geo.travel_band(travel_radius),
+            description='Benchmark vendor',
+            status='active',
+        ))
+    Vendor.objects.bulk_create(vendors, batch_size=1000)
+
+
+def make_managers(count, seed=0):
+    rng = random.Random(seed)
+    tag = uuid.uuid4().hex[:6]
+    CustomUser.objects.bulk_create(
+        [
+            CustomUser(username=f'bench-manager-{tag}-{i}', email=f'manager{i}-{tag}@bench.invalid',
+                       password='!', user_type='manager')
+            for i in range(count)
+        ],
+        batch_size=1000,
+    )
+    users = CustomUser.objects.filter(username__startswith=f'bench-manager-{tag}-').order_by('id')
+    managers = []
+    for i, user in enumerate(users):
+        lat, lng = _scattered_point(rng)
+        travel_radius = rng.choice(TRAVEL_RADII)
+        managers.append(EventManager(
+            user=user,
+            manager_id=f'EM{tag.upper()}{i}',
+            latitude=lat,
+            longitude=lng,
+            geo_cell=geo.cell_for(lat, lng),
+            travel_radius=travel_radius,
+            travel_band=geo.travel_band(travel_radius),
+            status='active',
+        ))
+    EventManager.objects.bulk_create(managers, batch_size=1000)
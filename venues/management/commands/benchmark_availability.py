@@ -0,0 +1,113 @@
+import random
+import time
+import uuid
+from datetime import date, datetime, time as clock, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from events.management.commands._synthetic import make_event
+from events.models import Event
+from venues import availability
+from venues.models import VenueAvailability
+
+from ._synthetic import make_venues
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the venue availability service on synthetic venues, '
+        'bookings and blocked/special-price slots: cold day builds, then '
+        'warm "is X free" and "which venues are free for N guests" queries. '
+        'Everything is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--venues', type=int, default=10000)
+        parser.add_argument('--days', type=int, default=30, help='Days the bookings are spread over.')
+        parser.add_argument('--bookings-per-venue', type=float, default=3.0)
+        parser.add_argument('--slots-per-venue', type=float, default=2.0)
+        parser.add_argument('--queries', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        first_day = date(2030, 1, 1)
+        with transaction.atomic():
+            venues = make_venues(options['venues'], seed=options['seed'])
+            template = make_event()
+            self._make_bookings(template, venues, first_day, options, rng)
+            self._make_slots(venues, first_day, options, rng)
+            availability.index.clear()
+
+            start = time.perf_counter()
+            availability.index.get_days([first_day + timedelta(days=i) for i in range(options['days'])])
+            availability.index.get_catalog()
+            cold = time.perf_counter() - start
+            self.stdout.write(f"cold build of {options['days']} days + catalog: {cold * 1000:.0f} ms")
+
+            windows = [self._window(first_day, options['days'], rng) for _ in range(options['queries'])]
+            self._time('is_venue_free', [
+                lambda w=w, v=rng.choice(venues): availability.is_venue_free(v.pk, *w) for w in windows
+            ])
+            self._time('check_venue', [
+                lambda w=w, v=rng.choice(venues): availability.check_venue(v.pk, *w) for w in windows
+            ])
+            self._time('free_venues', [
+                lambda w=w, n=rng.choice([20, 80, 150, 400]): availability.free_venues(*w, guests=n) for w in windows
+            ])
+            availability.index.clear()
+            transaction.set_rollback(True)
+
+    def _make_bookings(self, template, venues, first_day, options, rng):
+        fields = {
+            field.attname: getattr(template, field.attname)
+            for field in Event._meta.concrete_fields
+            if field.attname not in ('id', 'event_id', 'venue_id', 'start_date', 'end_date', 'start_time', 'end_time')
+        }
+        tag = uuid.uuid4().hex[:6].upper()
+        bookings = []
+        for i in range(int(len(venues) * options['bookings_per_venue'])):
+            day = first_day + timedelta(days=rng.randrange(options['days']))
+            hour = rng.randrange(8, 20)
+            bookings.append(Event(
+                **fields,
+                event_id=f'EVB{tag}{i}',
+                venue_id=rng.choice(venues).pk,
+                start_date=day,
+                end_date=day + timedelta(days=1) if hour >= 19 else day,
+                start_time=clock(hour),
+                end_time=clock((hour + rng.randint(2, 6)) % 24),
+            ))
+        Event.objects.bulk_create(bookings, batch_size=1000)
+
+    def _make_slots(self, venues, first_day, options, rng):
+        slots, seen = [], set()
+        for _ in range(int(len(venues) * options['slots_per_venue'])):
+            venue = rng.choice(venues)
+            day = first_day + timedelta(days=rng.randrange(options['days']))
+            hour = rng.randrange(0, 20)
+            if (venue.pk, day, hour) in seen:
+                continue
+            seen.add((venue.pk, day, hour))
+            blocked = rng.random() < 0.5
+            slots.append(VenueAvailability(
+                venue=venue, date=day, start_time=clock(hour), end_time=clock(hour + 4),
+                is_blocked=blocked, special_price=None if blocked else rng.randrange(20000, 90000, 500),
+            ))
+        VenueAvailability.objects.bulk_create(slots, batch_size=1000)
+
+    def _window(self, first_day, days, rng):
+        start = datetime.combine(first_day + timedelta(days=rng.randrange(days - 1)), clock(rng.randrange(6, 20)))
+        return start, start + timedelta(hours=rng.choice([2, 4, 6, 24]))
+
+    def _time(self, label, calls):
+        timings = []
+        for call in calls:
+            start = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        p50 = timings[len(timings) // 2] * 1000
+        p99 = timings[int(len(timings) * 0.99)] * 1000
+        self.stdout.write(f'{label:>14}: p50 {p50:.3f} ms, p99 {p99:.3f} ms over {len(timings)} warm queries')
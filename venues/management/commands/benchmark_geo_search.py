@@ -0,0 +1,89 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from managers.models import EventManager
+from vendors.models import Vendor
+from venues import geo, nearby
+from venues.models import Venue
+
+from ._synthetic import CITIES, make_managers, make_vendors, make_venues
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark radius search on synthetic venues, vendors and managers: '
+        'latency and queries per lookup, checked against a full scan. '
+        'Everything is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--venues', type=int, default=100000)
+        parser.add_argument('--vendors', type=int, default=20000)
+        parser.add_argument('--managers', type=int, default=5000)
+        parser.add_argument('--queries', type=int, default=100)
+        parser.add_argument('--km', type=float, default=10.0)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            start = time.perf_counter()
+            make_venues(options['venues'], seed=options['seed'])
+            make_vendors(options['vendors'], seed=options['seed'])
+            make_managers(options['managers'], seed=options['seed'])
+            if connection.vendor == 'sqlite':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+            self.stdout.write(f"Synthetic data created in {time.perf_counter() - start:.1f} s")
+
+            points = []
+            for _ in range(options['queries']):
+                _, _, lat, lng = rng.choice(CITIES)
+                points.append((lat + rng.uniform(-0.3, 0.3), lng + rng.uniform(-0.3, 0.3)))
+
+            self._run(f"venues within {options['km']:g} km", points,
+                      lambda lat, lng: nearby.venues_within(lat, lng, options['km']))
+            self._run('vendors covering point', points, nearby.vendors_covering)
+            self._run('managers covering point', points, nearby.managers_covering)
+            self._check(points[:5], options['km'])
+            transaction.set_rollback(True)
+
+    def _run(self, label, points, lookup):
+        timings, query_counts, sizes = [], set(), []
+        for lat, lng in points:
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                results = lookup(lat, lng)
+                timings.append(time.perf_counter() - start)
+            query_counts.add(len(queries))
+            sizes.append(len(results))
+        timings.sort()
+        self.stdout.write(
+            f"{label}: p50 {timings[len(timings) // 2] * 1000:.1f} ms, "
+            f"p99 {timings[int(len(timings) * 0.99)] * 1000:.1f} ms, "
+            f"queries {sorted(query_counts)}, median page {sorted(sizes)[len(sizes) // 2]}"
+        )
+
+    def _check(self, points, km):
+        """
+        The box prefilter must never lose a row that a full scan finds.
+        """
+        venues = list(Venue.objects.filter(status__in=nearby.BOOKABLE_VENUE_STATUSES, latitude__isnull=False)
+                      .values_list('id', 'latitude', 'longitude'))
+        vendors = list(Vendor.objects.filter(status__in=nearby.ACTIVE_PROVIDER_STATUSES, is_available=True)
+                       .values_list('id', 'latitude', 'longitude', 'travel_radius'))
+        managers = list(EventManager.objects.filter(status__in=nearby.ACTIVE_PROVIDER_STATUSES, is_available=True)
+                        .values_list('id', 'latitude', 'longitude', 'travel_radius'))
+        mismatches = 0
+        for lat, lng in points:
+            expected = {pk for pk, a, b in venues if geo.haversine_km(lat, lng, a, b) <= km}
+            found = {result.obj.pk for result in nearby.venues_within(lat, lng, km, limit=len(venues))}
+            mismatches += expected != found
+            for rows, lookup in ((vendors, nearby.vendors_covering), (managers, nearby.managers_covering)):
+                expected = {pk for pk, a, b, radius in rows if a is not None and geo.haversine_km(lat, lng, a, b) <= radius}
+                mismatches += expected != {result.obj.pk for result in lookup(lat, lng, limit=len(rows))}
+        self.stdout.write(f"full-scan check: {mismatches} mismatches over {len(points) * 3} lookups")
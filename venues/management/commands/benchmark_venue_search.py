@@ -0,0 +1,73 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import QueryDict
+from django.test.utils import CaptureQueriesContext
+
+from venues.search import invalidate_facets, parse_filters, search_venues
+
+from ._synthetic import CATEGORIES, CITIES, FEATURES, make_venues
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark faceted venue search on synthetic venues: query count and '
+        'latency for a mix of filter combinations. Everything is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--venues', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            start = time.perf_counter()
+            make_venues(options['venues'], seed=options['seed'])
+            if connection.vendor == 'sqlite':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+            self.stdout.write(f"{options['venues']} venues created in {time.perf_counter() - start:.1f} s")
+
+            searches = [
+                (parse_filters(self._params(rng)), rng.choice(['relevance', 'price', 'rating']))
+                for _ in range(options['queries'])
+            ]
+            invalidate_facets()
+            self._run('cold', searches)
+            self._run('cached facets', searches)
+            transaction.set_rollback(True)
+
+    def _run(self, label, searches):
+        timings, query_counts = [], set()
+        for filters, sort in searches:
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                result = search_venues(filters, sort=sort)
+                timings.append(time.perf_counter() - start)
+            query_counts.add(len(queries))
+        timings.sort()
+        self.stdout.write(
+            f"{label}: p50 {timings[len(timings) // 2] * 1000:.0f} ms, "
+            f"max {timings[-1] * 1000:.0f} ms, queries per search {sorted(query_counts)} "
+            f"(last: {result.count} matches)"
+        )
+
+    def _params(self, rng):
+        params = QueryDict(mutable=True)
+        if rng.random() < 0.7:
+            params.setlist('city', [city for city, *_ in rng.sample(CITIES, rng.randint(1, 2))])
+        if rng.random() < 0.5:
+            params['category'] = rng.choice(CATEGORIES)
+        if rng.random() < 0.5:
+            params['guests'] = rng.choice([50, 120, 300, 700])
+        if rng.random() < 0.4:
+            params['max_price'] = rng.choice([50000, 150000, 300000])
+        if rng.random() < 0.4:
+            params.setlist('features', rng.sample(FEATURES, rng.randint(1, 2)))
+        if rng.random() < 0.3:
+            params['min_rating'] = rng.choice(['3.5', '4.0', '4.5'])
+        return params
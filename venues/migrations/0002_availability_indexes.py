@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("venues", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="venue",
+            index=models.Index(
+                fields=["status", "capacity_max"], name="venues_status_capacity_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="venueavailability",
+            index=models.Index(fields=["date", "venue"], name="venue_avail_date_idx"),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("venues", "0002_availability_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="venue",
+            index=models.Index(
+                fields=["status", "country", "state", "city", "category"],
+                name="venues_status_location_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="venue",
+            index=models.Index(
+                fields=["status", "category", "base_price"],
+                name="venues_status_cat_price_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="venue",
+            index=models.Index(
+                fields=["status", "base_price"], name="venues_status_price_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="venue",
+            index=models.Index(
+                fields=["status", "average_rating"], name="venues_status_rating_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="venue",
+            index=models.Index(
+                fields=["-is_featured", "-average_rating", "-created_at"],
+                name="venues_default_order_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:49
+
+from django.db import migrations, models
+
+from venues.geo import cell_for
+
+
+def fill_geo_cells(apps, schema_editor):
+    Venue = apps.get_model("venues", "Venue")
+    venues = Venue.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for venue in venues.only("latitude", "longitude").iterator(chunk_size=2000):
+        Venue.objects.filter(pk=venue.pk).update(
+            geo_cell=cell_for(venue.latitude, venue.longitude)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("venues", "0003_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="venue",
+            name="geo_cell",
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="venue",
+            index=models.Index(fields=["geo_cell"], name="venues_geo_cell_idx"),
+        ),
+        migrations.RunPython(fill_geo_cells, migrations.RunPython.noop),
+    ]
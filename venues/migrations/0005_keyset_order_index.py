@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-17 08:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("venues", "0004_geo_cells"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="venue",
+            name="venues_default_order_idx",
+        ),
+        migrations.AddIndex(
+            model_name="venue",
+            index=models.Index(
+                fields=["is_featured", "average_rating", "created_at"],
+                name="venues_default_order_idx",
+            ),
+        ),
+    ]
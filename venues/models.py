@@ -6,6 +6,8 @@ from imagekit.models import ProcessedImageField
 from imagekit.processors import ResizeToFill
 import uuid
 
+from . import geo
+
 
 class VenueCategory(models.Model):
     """
@@ -54,6 +56,7 @@ class Venue(models.Model):
     postal_code = models.CharField(max_length=20, blank=True)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    geo_cell = models.IntegerField(null=True, blank=True, editable=False)  # see venues.geo
     
     # Capacity and dimensions
     capacity_min = models.PositiveIntegerField(default=1)
@@ -96,6 +99,17 @@ class Venue(models.Model):
     class Meta:
         db_table = 'venues'
         ordering = ['-is_featured', '-average_rating', '-created_at']
+        indexes = [
+            models.Index(fields=['status', 'capacity_max'], name='venues_status_capacity_idx'),
+            # Search: location and category filters/facets, price and rating ranges
+            models.Index(fields=['status', 'country', 'state', 'city', 'category'], name='venues_status_location_idx'),
+            models.Index(fields=['status', 'category', 'base_price'], name='venues_status_cat_price_idx'),
+            models.Index(fields=['status', 'base_price'], name='venues_status_price_idx'),
+            models.Index(fields=['status', 'average_rating'], name='venues_status_rating_idx'),
+            # Default order plus the keyset tie breaker, read backwards
+            models.Index(fields=['is_featured', 'average_rating', 'created_at'], name='venues_default_order_idx'),
+            models.Index(fields=['geo_cell'], name='venues_geo_cell_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -105,6 +119,7 @@ class Venue(models.Model):
             self.venue_id = f"VENUE{uuid.uuid4().hex[:8].upper()}"
         if not self.slug:
             self.slug = f"{self.name.lower().replace(' ', '-')}-{self.venue_id.lower()}"
+        self.geo_cell = geo.cell_for(self.latitude, self.longitude)
         super().save(*args, **kwargs)
     
     @property
@@ -264,6 +279,10 @@ class VenueAvailability(models.Model):
         db_table = 'venue_availability'
         unique_together = ['venue', 'date', 'start_time']
         ordering = ['date', 'start_time']
+        indexes = [
+            # Availability day index: every slot on one date
+            models.Index(fields=['date', 'venue'], name='venue_avail_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.venue.name} - {self.date} {self.start_time}"
@@ -0,0 +1,97 @@
+"""
+Radius queries over venues, vendors and event managers.
+
+"Venues within K km" prefilters with the geo_cell bounding box (see
+venues.geo), measures the candidates with haversine and loads only the
+nearest page of venues. "Who travels here" works the other way round:
+each vendor or manager has their own travel_radius (in km), so rows
+carry a travel_band (see venues.geo) and each band is boxed with its own
+upper radius, all in one query answered from the (travel_band, geo_cell)
+index. A few providers with a very wide radius do not widen the box for
+everyone else.
+"""
+from collections import namedtuple
+
+from django.db.models import FloatField, Q
+from django.db.models.functions import Cast
+
+from managers.models import EventManager
+from vendors.models import Vendor
+
+from . import geo
+from .availability import BOOKABLE_VENUE_STATUSES
+from .models import Venue
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_RADIUS_KM = 500
+ACTIVE_PROVIDER_STATUSES = ('active', 'verified')
+
+Nearby = namedtuple('Nearby', ['obj', 'distance_km'])
+# Candidates are only measured, so read coordinates as floats rather
+# than paying for a Decimal per value.
+_FLOAT_COORDINATES = ('id', Cast('latitude', FloatField()), Cast('longitude', FloatField()))
+
+
+def _point(lat, lng):
+    lat, lng = float(lat), float(lng)
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        raise ValueError("lat must be within +/-90 and lng within +/-180.")
+    return lat, lng
+
+
+def venues_within(lat, lng, radius_km, limit=DEFAULT_LIMIT, queryset=None):
+    """
+    Venues within radius_km of (lat, lng), nearest first, as Nearby
+    tuples. Defaults to bookable venues; pass queryset to narrow further.
+    """
+    lat, lng = _point(lat, lng)
+    radius_km = min(float(radius_km), MAX_RADIUS_KM)
+    if queryset is None:
+        queryset = Venue.objects.filter(status__in=BOOKABLE_VENUE_STATUSES)
+    candidates = queryset.filter(geo.box_q(lat, lng, radius_km)).values_list(*_FLOAT_COORDINATES)
+    distances = []
+    for venue_id, venue_lat, venue_lng in candidates:
+        distance = geo.haversine_km(lat, lng, venue_lat, venue_lng)
+        if distance <= radius_km:
+            distances.append((distance, venue_id))
+    distances.sort()
+    distances = distances[:limit]
+    venues = queryset.select_related('category').in_bulk([venue_id for _, venue_id in distances])
+    return [Nearby(venues[venue_id], round(distance, 2)) for distance, venue_id in distances if venue_id in venues]
+
+
+def _covering(queryset, lat, lng, limit):
+    """
+    Up to limit rows of queryset (a geo-indexed model with travel_radius)
+    whose travel radius reaches (lat, lng), nearest first.
+    """
+    lat, lng = _point(lat, lng)
+    terms = [
+        Q(term, travel_band=band)
+        for band, upper in enumerate(geo.TRAVEL_RADIUS_BANDS)
+        for term in geo.box_terms(lat, lng, upper)
+    ]
+    terms.append(Q(travel_band=len(geo.TRAVEL_RADIUS_BANDS), latitude__isnull=False))
+    candidates = queryset.filter(Q(*terms, _connector=Q.OR)).values_list(*_FLOAT_COORDINATES, 'travel_radius')
+    distances = []
+    for pk, provider_lat, provider_lng, travel_radius in candidates:
+        distance = geo.haversine_km(lat, lng, provider_lat, provider_lng)
+        if distance <= travel_radius:
+            distances.append((distance, pk))
+    distances.sort()
+    distances = distances[:limit]
+    providers = queryset.in_bulk([pk for _, pk in distances])
+    return [Nearby(providers[pk], round(distance, 2)) for distance, pk in distances if pk in providers]
+
+
+def vendors_covering(lat, lng, limit=DEFAULT_LIMIT, queryset=None):
+    if queryset is None:
+        queryset = Vendor.objects.filter(status__in=ACTIVE_PROVIDER_STATUSES, is_available=True)
+    return _covering(queryset.select_related('category'), lat, lng, limit)
+
+
+def managers_covering(lat, lng, limit=DEFAULT_LIMIT, queryset=None):
+    if queryset is None:
+        queryset = EventManager.objects.filter(status__in=ACTIVE_PROVIDER_STATUSES, is_available=True)
+    return _covering(queryset.select_related('user'), lat, lng, limit)
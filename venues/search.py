@@ -0,0 +1,414 @@
+"""
+Faceted venue search.
+
+Filters are parsed from a query string into a VenueFilters tuple. One
+search runs a fixed number of queries whatever the filters and data:
+
+1. location/category facets: one GROUP BY (country, state, city, category)
+   over venues matching every non-location filter; each facet then drops
+   only its own selection in Python, so selecting a city still shows the
+   counts of the other cities;
+2. range and feature facets: one aggregate() of conditional counts, each
+   bucket counting under every filter except the one on its own dimension;
+3. and 4. the keyset page of results (event_manager.pagination) and its
+   total count.
+
+Facet counts only move when a venue is written, so they are cached per
+filter set under a version number that venues.signals bumps on every
+venue save or delete; the feature vocabulary shares the same version.
+Repeated searches then cost only the page and its count.
+"""
+import hashlib
+from collections import Counter, namedtuple
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django_countries import countries
+
+from event_manager.cache import bump_version, get_or_compute
+from event_manager.pagination import paginate
+
+from .availability import BOOKABLE_VENUE_STATUSES
+from .models import Venue
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+MAX_FEATURE_FACETS = 12
+# Largest guest count or capacity a PositiveIntegerField holds.
+MAX_INTEGER = 2147483647
+FACETS_VERSION_KEY = 'venue_search:version'
+FACETS_TIMEOUT = 60 * 60
+
+# (key, label, lower bound inclusive, upper bound inclusive or None)
+CAPACITY_BUCKETS = [
+    ('0-100', 'Up to 100', 0, 100),
+    ('101-250', '101 - 250', 101, 250),
+    ('251-500', '251 - 500', 251, 500),
+    ('501-1000', '501 - 1,000', 501, 1000),
+    ('1001+', 'Over 1,000', 1001, None),
+]
+# Prices have two decimal places, so a bucket starts a cent above the last.
+PRICE_BUCKETS = [
+    ('0-25000', 'Up to 25,000', 0, 25000),
+    ('25000-75000', '25,000 - 75,000', Decimal('25000.01'), 75000),
+    ('75000-150000', '75,000 - 150,000', Decimal('75000.01'), 150000),
+    ('150000-300000', '150,000 - 300,000', Decimal('150000.01'), 300000),
+    ('300000+', 'Over 300,000', Decimal('300000.01'), None),
+]
+# Rating facets are cumulative: "4 & up" includes "4.5 & up".
+RATING_BUCKETS = [Decimal('4.5'), Decimal('4.0'), Decimal('3.5'), Decimal('3.0')]
+
+SORTS = {
+    'relevance': None,  # model default ordering
+    'price': ('base_price', 'id'),
+    '-price': ('-base_price', '-id'),
+    'rating': ('-average_rating', '-total_reviews', 'id'),
+    'capacity': ('capacity_max', 'id'),
+    '-capacity': ('-capacity_max', '-id'),
+}
+
+VenueFilters = namedtuple('VenueFilters', [
+    'q', 'countries', 'states', 'cities', 'categories', 'guests',
+    'min_capacity', 'max_capacity', 'min_price', 'max_price', 'max_price_per_person',
+    'features', 'min_rating',
+])
+VenueSearchResult = namedtuple('VenueSearchResult', [
+    'count', 'page_size', 'results', 'facets', 'next_cursor', 'previous_cursor',
+])
+
+
+# Parsing
+
+def _number(value, cast, name):
+    if value in (None, ''):
+        return None
+    try:
+        number = cast(value)
+    except (ValueError, InvalidOperation):
+        raise ValueError(f"{name} must be a number.")
+    if isinstance(number, Decimal) and not number.is_finite():
+        raise ValueError(f"{name} must be a finite number.")
+    if number < 0:
+        raise ValueError(f"{name} cannot be negative.")
+    if cast is int and number > MAX_INTEGER:
+        raise ValueError(f"{name} cannot be more than {MAX_INTEGER}.")
+    return number
+
+
+def _values(params, name):
+    values = []
+    for raw in params.getlist(name) if hasattr(params, 'getlist') else [params.get(name)]:
+        values.extend(part.strip() for part in (raw or '').split(',') if part.strip())
+    return tuple(dict.fromkeys(values))
+
+
+def parse_filters(params):
+    """
+    Build VenueFilters from a QueryDict (or dict). Multi-valued filters
+    accept repeated parameters or comma-separated values. Raises ValueError
+    on malformed numbers.
+    """
+    categories = []
+    for value in _values(params, 'category'):
+        categories.append(int(value) if value.isdigit() else value)
+    return VenueFilters(
+        q=(params.get('q') or '').strip(),
+        countries=tuple(value.upper() for value in _values(params, 'country')),
+        states=_values(params, 'state'),
+        cities=_values(params, 'city'),
+        categories=tuple(categories),
+        guests=_number(params.get('guests'), int, 'guests'),
+        min_capacity=_number(params.get('min_capacity'), int, 'min_capacity'),
+        max_capacity=_number(params.get('max_capacity'), int, 'max_capacity'),
+        min_price=_number(params.get('min_price'), Decimal, 'min_price'),
+        max_price=_number(params.get('max_price'), Decimal, 'max_price'),
+        max_price_per_person=_number(params.get('max_price_per_person'), Decimal, 'max_price_per_person'),
+        features=tuple(value.lower() for value in _values(params, 'features')),
+        min_rating=_number(params.get('min_rating'), Decimal, 'min_rating'),
+    )
+
+
+# Filter expressions, one per facet dimension
+
+def _category_q(categories):
+    ids = [value for value in categories if isinstance(value, int)]
+    names = [value for value in categories if not isinstance(value, int)]
+    return Q(category_id__in=ids) | Q(category__name__in=names)
+
+
+def _feature_q(feature):
+    # JSON lists are stored as text on SQLite and compared as text on
+    # MySQL, so a quoted icontains matches one list element on both.
+    return Q(features__icontains=f'"{feature}"')
+
+
+def _dimension_filters(filters):
+    """
+    {dimension: Q} for every active filter. Facets leave out their own
+    dimension; results apply them all.
+    """
+    q = {}
+    if filters.q:
+        q['q'] = Q(name__icontains=filters.q) | Q(description__icontains=filters.q)
+    if filters.countries:
+        q['country'] = Q(country__in=filters.countries)
+    if filters.states:
+        q['state'] = Q(state__in=filters.states)
+    if filters.cities:
+        q['city'] = Q(city__in=filters.cities)
+    if filters.categories:
+        q['category'] = _category_q(filters.categories)
+    capacity = Q()
+    if filters.guests is not None:
+        capacity &= Q(capacity_min__lte=filters.guests, capacity_max__gte=filters.guests)
+    if filters.min_capacity is not None:
+        capacity &= Q(capacity_max__gte=filters.min_capacity)
+    if filters.max_capacity is not None:
+        capacity &= Q(capacity_max__lte=filters.max_capacity)
+    if capacity:
+        q['capacity'] = capacity
+    price = Q()
+    if filters.min_price is not None:
+        price &= Q(base_price__gte=filters.min_price)
+    if filters.max_price is not None:
+        price &= Q(base_price__lte=filters.max_price)
+    if filters.max_price_per_person is not None:
+        price &= Q(price_per_person__lte=filters.max_price_per_person)
+    if price:
+        q['price'] = price
+    if filters.features:
+        features = Q()
+        for feature in filters.features:
+            features &= _feature_q(feature)
+        q['features'] = features
+    if filters.min_rating is not None:
+        q['rating'] = Q(average_rating__gte=filters.min_rating)
+    return q
+
+
+def _combine(q_by_dimension, exclude=()):
+    combined = Q()
+    for dimension, q in q_by_dimension.items():
+        if dimension not in exclude:
+            combined &= q
+    return combined
+
+
+def _bucket_q(field, low, high):
+    q = Q(**{f'{field}__gte': low})
+    if high is not None:
+        q &= Q(**{f'{field}__lte': high})
+    return q
+
+
+def bookable_venues():
+    return Venue.objects.filter(status__in=BOOKABLE_VENUE_STATUSES)
+
+
+# Versioning
+
+def _version():
+    return cache.get(FACETS_VERSION_KEY, 0)
+
+
+def invalidate_facets():
+    """
+    Drop every cached facet count and the feature vocabulary.
+    """
+    bump_version(FACETS_VERSION_KEY)
+
+
+def _facets_key(filters, version):
+    digest = hashlib.md5(repr(tuple(filters)).encode()).hexdigest()
+    return f'venue_search:facets:{version}:{digest}'
+
+
+# Feature vocabulary
+
+def feature_vocabulary(version=None):
+    """
+    The most common feature values across bookable venues, cached until
+    a venue changes (see venues.signals).
+    """
+    version = _version() if version is None else version
+
+    def compute():
+        counts = Counter()
+        for values in bookable_venues().values_list('features', flat=True).iterator(chunk_size=2000):
+            if isinstance(values, list):
+                counts.update(str(value).lower() for value in values)
+        return [feature for feature, _ in counts.most_common(MAX_FEATURE_FACETS)]
+
+    return get_or_compute(f'venue_search:features:{version}', compute, FACETS_TIMEOUT)
+
+
+# Facets
+
+LOCATION_DIMENSIONS = ('country', 'state', 'city', 'category')
+
+
+def _location_facets(filters, q_by_dimension):
+    rows = (
+        bookable_venues()
+        .filter(_combine(q_by_dimension, exclude=LOCATION_DIMENSIONS))
+        .order_by()
+        .values_list('country', 'state', 'city', 'category_id', 'category__name')
+        .annotate(total=Count('id'))
+    )
+    selected = {
+        'country': set(filters.countries),
+        'state': set(filters.states),
+        'city': set(filters.cities),
+        'category': set(filters.categories),
+    }
+    counts = {dimension: Counter() for dimension in LOCATION_DIMENSIONS}
+    labels = {}
+    for country, state, city, category_id, category_name, total in rows:
+        values = {'country': country, 'state': state, 'city': city, 'category': category_id}
+        matches = {
+            dimension: not selected[dimension] or (
+                values[dimension] in selected[dimension]
+                or (dimension == 'category' and category_name in selected[dimension])
+            )
+            for dimension in LOCATION_DIMENSIONS
+        }
+        labels[('category', category_id)] = category_name
+        for dimension in LOCATION_DIMENSIONS:
+            if all(matches[other] for other in LOCATION_DIMENSIONS if other != dimension):
+                counts[dimension][values[dimension]] += total
+
+    def facet(dimension, label):
+        return [
+            {
+                'value': value,
+                'label': label(value),
+                'count': count,
+                'selected': value in selected[dimension] or label(value) in selected[dimension],
+            }
+            for value, count in sorted(counts[dimension].items(), key=lambda item: (-item[1], str(item[0])))
+        ]
+
+    return {
+        'country': facet('country', lambda code: countries.name(code) or code),
+        'state': facet('state', str),
+        'city': facet('city', str),
+        'category': facet('category', lambda category_id: labels[('category', category_id)]),
+    }
+
+
+def _range_facets(filters, q_by_dimension, features):
+    base = bookable_venues().filter(_combine(q_by_dimension, exclude=('capacity', 'price', 'rating', 'features')))
+    without = {
+        dimension: _combine(q_by_dimension, exclude=LOCATION_DIMENSIONS + ('q', dimension))
+        for dimension in ('capacity', 'price', 'rating')
+    }
+    other_features = _combine(q_by_dimension, exclude=LOCATION_DIMENSIONS + ('q',))
+    aggregates = {}
+    for key, _, low, high in CAPACITY_BUCKETS:
+        aggregates[f'capacity:{key}'] = Count('id', filter=_bucket_q('capacity_max', low, high) & without['capacity'])
+    for key, _, low, high in PRICE_BUCKETS:
+        aggregates[f'price:{key}'] = Count('id', filter=_bucket_q('base_price', low, high) & without['price'])
+    for minimum in RATING_BUCKETS:
+        aggregates[f'rating:{minimum}'] = Count('id', filter=Q(average_rating__gte=minimum) & without['rating'])
+    for i, feature in enumerate(features):
+        # Features are ANDed, so each count applies every other filter too.
+        aggregates[f'feature:{i}'] = Count('id', filter=_feature_q(feature) & other_features)
+    counts = base.aggregate(**aggregates)
+
+    def bucket_facet(prefix, buckets, selected):
+        return [
+            {'value': key, 'label': label, 'min': low, 'max': high,
+             'count': counts[f'{prefix}:{key}'], 'selected': selected(low, high)}
+            for key, label, low, high in buckets
+        ]
+
+    return {
+        'capacity': bucket_facet(
+            'capacity', CAPACITY_BUCKETS,
+            lambda low, high: filters.min_capacity == low and filters.max_capacity == high,
+        ),
+        'price': bucket_facet(
+            'price', PRICE_BUCKETS,
+            lambda low, high: filters.min_price == low and filters.max_price == high,
+        ),
+        'rating': [
+            {'value': str(minimum), 'label': f'{minimum} & up', 'count': counts[f'rating:{minimum}'],
+             'selected': filters.min_rating == minimum}
+            for minimum in RATING_BUCKETS
+        ],
+        'features': sorted(
+            (
+                {'value': feature, 'label': feature.replace('_', ' ').title(), 'count': counts[f'feature:{i}'],
+                 'selected': feature in filters.features}
+                for i, feature in enumerate(features)
+            ),
+            key=lambda facet: -facet['count'],
+        ),
+    }
+
+
+def search_facets(filters, q_by_dimension=None):
+    """
+    Facet counts for every dimension, from the cache when no venue has
+    changed since they were last computed for these filters.
+    """
+    version = _version()
+
+    def compute():
+        dimensions = _dimension_filters(filters) if q_by_dimension is None else q_by_dimension
+        facets = {}
+        facets.update(_location_facets(filters, dimensions))
+        facets.update(_range_facets(filters, dimensions, feature_vocabulary(version)))
+        return facets
+
+    return get_or_compute(_facets_key(filters, version), compute, FACETS_TIMEOUT)
+
+
+# Search
+
+def serialize_venue(row):
+    return {
+        'slug': row['slug'],
+        'name': row['name'],
+        'city': row['city'],
+        'state': row['state'],
+        'country': str(row['country']),
+        'category': row['category__name'],
+        'capacity_min': row['capacity_min'],
+        'capacity_max': row['capacity_max'],
+        'base_price': str(row['base_price']),
+        'price_per_person': str(row['price_per_person']) if row['price_per_person'] is not None else None,
+        'average_rating': str(row['average_rating']),
+        'total_reviews': row['total_reviews'],
+        'features': row['features'],
+        'is_featured': row['is_featured'],
+    }
+
+
+RESULT_FIELDS = [
+    'slug', 'name', 'city', 'state', 'country', 'category__name', 'capacity_min', 'capacity_max',
+    'base_price', 'price_per_person', 'average_rating', 'total_reviews', 'features', 'is_featured',
+]
+
+
+def search_venues(filters, cursor=None, page_size=PAGE_SIZE, sort='relevance', with_facets=True):
+    """
+    Run a search and return a VenueSearchResult with one keyset page of
+    serialized venues and, unless with_facets is False, facet counts for
+    every dimension. Raises ValueError on a malformed cursor.
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    q_by_dimension = _dimension_filters(filters)
+    queryset = bookable_venues().filter(_combine(q_by_dimension))
+    ordering = SORTS.get(sort)
+    if ordering:
+        queryset = queryset.order_by(*ordering)
+    else:
+        queryset = queryset.order_by(*Venue._meta.ordering, 'id')
+
+    page = paginate(queryset.values(*RESULT_FIELDS), cursor, page_size, count='exact')
+    results = [serialize_venue(row) for row in page]
+
+    facets = search_facets(filters, q_by_dimension) if with_facets else {}
+    return VenueSearchResult(page.count, page_size, results, facets, page.next_cursor, page.previous_cursor)
@@ -0,0 +1,60 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from events.models import Event
+
+from .models import Venue, VenueAvailability
+from . import availability, search
+
+DATE_FIELDS = ('start_date', 'end_date')
+
+# Dates of an event loaded with .only()/.defer(): read from the table if
+# it is saved or deleted, rather than loading the fields one by one.
+UNKNOWN = object()
+
+
+def _current_dates(instance):
+    # Fields still deferred were not changed, so they keep their loaded value.
+    return tuple(
+        instance.__dict__.get(field, loaded) for field, loaded in zip(DATE_FIELDS, instance._loaded_dates)
+    )
+
+
+@receiver(post_init, sender=Event)
+def remember_event_dates(sender, instance, **kwargs):
+    # A moved booking frees its old days as well as taking the new ones.
+    fields = instance.__dict__
+    instance._loaded_dates = (
+        tuple(fields[field] for field in DATE_FIELDS) if all(field in fields for field in DATE_FIELDS) else UNKNOWN
+    )
+
+
+@receiver(pre_save, sender=Event)
+@receiver(pre_delete, sender=Event)
+def load_unknown_dates(sender, instance, **kwargs):
+    if instance._loaded_dates is UNKNOWN:
+        stored = sender._base_manager.filter(pk=instance.pk).values_list(*DATE_FIELDS).first()
+        instance._loaded_dates = stored or (None, None)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_event_days(sender, instance, **kwargs):
+    current = _current_dates(instance)
+    for first, last in {instance._loaded_dates, current}:
+        if first and last:
+            availability.invalidate_days(first, last)
+    instance._loaded_dates = current
+
+
+@receiver(post_save, sender=VenueAvailability)
+@receiver(post_delete, sender=VenueAvailability)
+def invalidate_slot_day(sender, instance, **kwargs):
+    availability.invalidate_days(instance.date)
+
+
+@receiver(post_save, sender=Venue)
+@receiver(post_delete, sender=Venue)
+def invalidate_venue_catalog(sender, instance, **kwargs):
+    availability.invalidate_catalog()
+    search.invalidate_facets()
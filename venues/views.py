@@ -1,5 +1,9 @@
+from django.contrib import messages
 from django.shortcuts import render
-from users import role_required
+from event_manager.routers import use_replicas
+from users import activity, role_required
+from .models import Venue
+from . import search
 
 # A helper function to render the placeholder page
 def _render_placeholder(request, feature_name, page_title):
@@ -10,9 +14,36 @@ def _render_placeholder(request, feature_name, page_title):
 def venue_list(request):
     return _render_placeholder(request, "Venue List", "Venues")
 
+def _without(query, *names):
+    query = query.copy()
+    for name in names:
+        query.pop(name, None)
+    return query.urlencode()
+
 @role_required(['user'])
+@use_replicas
 def venue_search(request):
-    return _render_placeholder(request, "Venue Search", "Venue Search")
+    sort = request.GET.get('sort', 'relevance')
+    try:
+        filters = search.parse_filters(request.GET)
+        result = search.search_venues(filters, cursor=request.GET.get('cursor'), sort=sort)
+    except ValueError as exc:
+        messages.error(request, str(exc))
+        filters = search.parse_filters({})
+        result = search.search_venues(filters, sort=sort)
+    query = request.GET.copy()
+    query.pop('cursor', None)
+    context = {
+        'result': result,
+        'filters': filters,
+        'sort': sort,
+        'query_string': query.urlencode(),
+        # Facet links replace their own filters rather than repeat them.
+        'price_query_string': _without(query, 'min_price', 'max_price'),
+        'capacity_query_string': _without(query, 'min_capacity', 'max_capacity'),
+        'rating_query_string': _without(query, 'min_rating'),
+    }
+    return render(request, 'venues/venue_search.html', context)
 
 @role_required(['user'])
 def venue_list_by_category(request, category_slug):
@@ -20,6 +51,9 @@ def venue_list_by_category(request, category_slug):
 
 @role_required(['user'])
 def venue_detail(request, venue_slug):
+    venue_id = Venue.objects.filter(slug=venue_slug).values_list('id', flat=True).first()
+    if venue_id:
+        activity.record(request.user, 'venue_view', metadata={'venue_id': venue_id}, request=request)
     return _render_placeholder(request, f"Venue Details for {venue_slug}", "Venue Details")
 
 @role_required(['user'])